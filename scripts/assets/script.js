@@ -1,9 +1,5 @@
 /* HTML Chat Archive Converter - Main JavaScript */
 
-// Global variables
-let conversationsData = [];
-let filteredConversations = [];
-
 // Initialize theme system
 function initializeTheme() {
     const savedTheme = localStorage.getItem('chat-archive-theme') || 'light';
@@ -27,72 +23,300 @@ function toggleTheme() {
 }
 
 
+// Conversation index
+// The index page embeds every conversation as column-oriented JSON (see
+// conversations_data_json in index_generator.py). Search, the source filter
+// and sorting run in a Web Worker, and the list only creates elements for
+// the rows near the viewport, so typing stays responsive on large archives.
+
+const SEARCH_DEBOUNCE_MS = 150;
+const LIST_OVERSCAN_ROWS = 10;
+const LIST_ROW_GAP = 10;
+
+// Builds the search index. Runs in the worker, which receives this
+// function as source text, so it must not use anything outside itself.
+function createSearchIndex(data) {
+    const count = data.title.length;
+    const haystacks = new Array(count);
+    for (let i = 0; i < count; i++) {
+        haystacks[i] = `${data.title[i]}\n${data.preview[i]}\n${data.sources[data.source[i]]}`.toLowerCase();
+    }
+
+    const collator = new Intl.Collator();
+    const comparators = {
+        date: (a, b) => (data.date[a] < data.date[b] ? -1 : data.date[a] > data.date[b] ? 1 : 0),
+        title: (a, b) => collator.compare(data.title[a], data.title[b]),
+        messages: (a, b) => data.messages[a] - data.messages[b]
+    };
+    const orders = {};
+
+    // Row order for a sort option such as "date-desc", computed once
+    function getOrder(sort) {
+        if (!orders[sort]) {
+            const key = sort.split('-')[0];
+            if (!comparators[key]) {
+                return getOrder('date-desc');
+            }
+            const ascending = Array.from({ length: count }, (_, i) => i);
+            ascending.sort((a, b) => comparators[key](a, b) || a - b);
+            orders[`${key}-asc`] = ascending;
+            orders[`${key}-desc`] = ascending.slice().reverse();
+        }
+        return orders[sort];
+    }
+
+    // Matching rows in display order
+    function search(request) {
+        const query = (request.query || '').toLowerCase().trim();
+        const source = request.source ? data.sources.indexOf(request.source) : -1;
+        const rows = new Int32Array(request.source && source < 0 ? 0 : count);
+        const order = getOrder(request.sort || 'date-desc');
+        let matches = 0;
+
+        for (let i = 0; i < rows.length; i++) {
+            const row = order[i];
+            if (source >= 0 && data.source[row] !== source) continue;
+            if (query && !haystacks[row].includes(query)) continue;
+            rows[matches++] = row;
+        }
+        return rows.slice(0, matches);
+    }
+
+    return { search };
+}
+
+function searchWorkerMain() {
+    let index = null;
+    self.onmessage = event => {
+        const message = event.data;
+        if (message.type === 'init') {
+            index = createSearchIndex(JSON.parse(message.json));
+        } else if (message.type === 'search') {
+            const rows = index.search(message);
+            self.postMessage({ seq: message.seq, rows }, [rows.buffer]);
+        }
+    };
+}
+
+// Runs searches in a worker, or on the main thread where workers are
+// unavailable. Only the results of the latest search are delivered.
+function createSearchClient(json, data, onResults) {
+    let worker = null;
+    let localIndex = null;
+    let seq = 0;
+    let lastRequest = null;
+
+    function searchLocally(request) {
+        if (!localIndex) {
+            localIndex = createSearchIndex(data);
+        }
+        onResults(localIndex.search(request));
+    }
+
+    if (window.Worker && window.Blob && window.URL) {
+        try {
+            // A Blob worker also works for pages opened from file://
+            const source = `${createSearchIndex.toString()}\n(${searchWorkerMain.toString()})();`;
+            worker = new Worker(URL.createObjectURL(new Blob([source], { type: 'text/javascript' })));
+            worker.onmessage = event => {
+                if (event.data.seq === seq) {
+                    onResults(event.data.rows);
+                }
+            };
+            worker.onerror = () => {
+                console.warn('Search worker failed, searching on the main thread');
+                worker.terminate();
+                worker = null;
+                if (lastRequest) {
+                    searchLocally(lastRequest);
+                }
+            };
+            worker.postMessage({ type: 'init', json });
+        } catch (err) {
+            worker = null;
+        }
+    }
+
+    return {
+        search(request) {
+            lastRequest = request;
+            seq += 1;
+            if (worker) {
+                worker.postMessage({ type: 'search', seq, ...request });
+            } else {
+                searchLocally(request);
+            }
+        }
+    };
+}
+
+function createRowElement(tag, className, text) {
+    const element = document.createElement(tag);
+    element.className = className;
+    if (text !== undefined) {
+        element.textContent = text;
+    }
+    return element;
+}
+
+function createConversationRow(data, row) {
+    const source = data.sources[data.source[row]];
+    const item = createRowElement('li', 'conversation-item');
+    const link = createRowElement('a', 'conversation-link');
+    link.href = data.dirs[data.dir[row]] + data.file[row];
+
+    const header = createRowElement('div', 'conversation-header');
+    header.append(
+        createRowElement('h2', 'conversation-title', data.title[row]),
+        createRowElement('span', 'date', data.date[row] || 'N/A')
+    );
+    const meta = createRowElement('div', 'conversation-meta');
+    meta.append(
+        createRowElement('span', 'message-count', `${data.messages[row]} messages`),
+        createRowElement('span', `source-badge source-${source}`, source.charAt(0).toUpperCase() + source.slice(1).toLowerCase())
+    );
+
+    link.append(header, createRowElement('div', 'conversation-preview', data.preview[row]), meta);
+    item.appendChild(link);
+    return item;
+}
+
+// Window-scrolled list that only keeps the rows near the viewport in the
+// DOM. Rows have one fixed height (see .conversation-list.virtual).
+function createVirtualList(list, data) {
+    let rows = new Int32Array(0);
+    let rowHeight = 0;
+    let frame = 0;
+    const rendered = new Map();
+
+    function clear() {
+        rendered.clear();
+        list.textContent = '';
+    }
+
+    function measure() {
+        const probe = createConversationRow(data, rows[0]);
+        probe.style.visibility = 'hidden';
+        list.appendChild(probe);
+        rowHeight = Math.max(probe.getBoundingClientRect().height, 1) + LIST_ROW_GAP;
+        probe.remove();
+    }
+
+    function render() {
+        frame = 0;
+        if (!rows.length) {
+            list.style.height = '0px';
+            return;
+        }
+        if (!rowHeight) {
+            measure();
+        }
+        list.style.height = `${rows.length * rowHeight - LIST_ROW_GAP}px`;
+
+        const scrolled = -list.getBoundingClientRect().top;
+        const first = Math.max(0, Math.floor(scrolled / rowHeight) - LIST_OVERSCAN_ROWS);
+        const last = Math.min(rows.length, Math.ceil((scrolled + window.innerHeight) / rowHeight) + LIST_OVERSCAN_ROWS);
+
+        for (const [position, item] of rendered) {
+            if (position < first || position >= last) {
+                item.remove();
+                rendered.delete(position);
+            }
+        }
+        for (let position = first; position < last; position++) {
+            if (!rendered.has(position)) {
+                const item = createConversationRow(data, rows[position]);
+                item.style.top = `${position * rowHeight}px`;
+                list.appendChild(item);
+                rendered.set(position, item);
+            }
+        }
+    }
+
+    function scheduleRender() {
+        if (!frame) {
+            frame = requestAnimationFrame(render);
+        }
+    }
+
+    window.addEventListener('scroll', scheduleRender, { passive: true });
+    window.addEventListener('resize', () => {
+        // Row height depends on the layout (e.g. the mobile header)
+        rowHeight = 0;
+        clear();
+        scheduleRender();
+    });
+
+    return {
+        setRows(newRows) {
+            rows = newRows;
+            list.classList.add('virtual');
+            clear();
+            render();
+        }
+    };
+}
+
 // Initialize search functionality
-    
+
+let conversationsData = null;
+let conversationList = null;
+let searchClient = null;
+let searchTimer = 0;
+
 function initializeSearch() {
     const searchInput = document.getElementById('search-input');
     const clearButton = document.getElementById('clear-search');
-    
-    if (!searchInput) return;
-    
-    // Load conversations data if available
-    if (window.conversationsData) {
-        conversationsData = window.conversationsData;
-        filteredConversations = [...conversationsData];
-    }
-    
+    const list = document.getElementById('conversations-list');
+    const dataElement = document.getElementById('conversations-data');
+
+    if (!searchInput || !list || !dataElement) return;
+
+    const json = dataElement.textContent;
+    conversationsData = JSON.parse(json);
+    conversationList = createVirtualList(list, conversationsData);
+    searchClient = createSearchClient(json, conversationsData, updateConversationsList);
+
     searchInput.addEventListener('input', handleSearch);
     searchInput.addEventListener('keydown', function(e) {
         if (e.key === 'Escape') {
             clearSearch();
         }
     });
-    
+
     if (clearButton) {
-        clearButton.style.display = 'none';
+        clearButton.style.display = searchInput.value ? 'flex' : 'none';
         clearButton.addEventListener('click', clearSearch);
     }
+
+    // The page shows the first rows until the full list is ready; this
+    // also applies search and filter values the browser restored
+    applyFilters();
 }
 
 function handleSearch() {
     const searchInput = document.getElementById('search-input');
     const clearButton = document.getElementById('clear-search');
-    const query = searchInput.value.toLowerCase().trim();
-    
+
     // Show/hide clear button
     if (clearButton) {
-        clearButton.style.display = query ? 'flex' : 'none';
-    }
-    
-    // Filter conversations
-    if (query) {
-        filteredConversations = conversationsData.filter(conv => {
-            return conv.title.toLowerCase().includes(query) ||
-                   conv.preview?.toLowerCase().includes(query) ||
-                   conv.source.toLowerCase().includes(query);
-        });
-    } else {
-        filteredConversations = [...conversationsData];
+        clearButton.style.display = searchInput.value.trim() ? 'flex' : 'none';
     }
-    
-    // Apply other filters
-    applyFilters();
-    updateConversationsList();
-}
 
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(applyFilters, SEARCH_DEBOUNCE_MS);
+}
 
 function clearSearch() {
     const searchInput = document.getElementById('search-input');
     const clearButton = document.getElementById('clear-search');
-    
+
     searchInput.value = '';
     if (clearButton) {
         clearButton.style.display = 'none';
     }
-    
-    filteredConversations = [...conversationsData];
+
     applyFilters();
-    updateConversationsList();
     searchInput.focus();
 }
 
@@ -100,82 +324,38 @@ function clearSearch() {
 function initializeFilters() {
     const sourceFilter = document.getElementById('source-filter');
     const sortFilter = document.getElementById('sort-filter');
-    
+
     if (sourceFilter) {
         sourceFilter.addEventListener('change', applyFilters);
     }
-    
+
     if (sortFilter) {
         sortFilter.addEventListener('change', applyFilters);
     }
 }
 
 function applyFilters() {
+    if (!searchClient) return;
+
+    const searchInput = document.getElementById('search-input');
     const sourceFilter = document.getElementById('source-filter');
     const sortFilter = document.getElementById('sort-filter');
-    
-    let filtered = [...filteredConversations];
-    
-    // Apply source filter
-    if (sourceFilter && sourceFilter.value) {
-        filtered = filtered.filter(conv => conv.source === sourceFilter.value);
-    }
-    
-    // Apply sorting
-    if (sortFilter && sortFilter.value) {
-        const sortBy = sortFilter.value;
-        
-        filtered.sort((a, b) => {
-            switch (sortBy) {
-                case 'date-desc':
-                    return new Date(b.created_at || 0) - new Date(a.created_at || 0);
-                case 'date-asc':
-                    return new Date(a.created_at || 0) - new Date(b.created_at || 0);
-                case 'title-asc':
-                    return a.title.localeCompare(b.title);
-                case 'title-desc':
-                    return b.title.localeCompare(a.title);
-                case 'messages-desc':
-                    return (b.message_count || 0) - (a.message_count || 0);
-                case 'messages-asc':
-                    return (a.message_count || 0) - (b.message_count || 0);
-                default:
-                    return 0;
-            }
-        });
-    }
-    
-    filteredConversations = filtered;
+
+    clearTimeout(searchTimer);
+    searchClient.search({
+        query: searchInput ? searchInput.value : '',
+        source: sourceFilter ? sourceFilter.value : '',
+        sort: sortFilter ? sortFilter.value : 'date-desc'
+    });
 }
 
-function updateConversationsList() {
-    const conversationsList = document.getElementById('conversations-list');
+function updateConversationsList(rows) {
     const noResults = document.getElementById('no-results');
-    
-    if (!conversationsList) return;
-    
-    // Hide all current items
-    const items = conversationsList.querySelectorAll('.conversation-item');
-    items.forEach(item => item.style.display = 'none');
-    
-    if (filteredConversations.length === 0) {
-        if (noResults) {
-            noResults.style.display = 'block';
-        }
-        return;
-    }
-    
+
+    conversationList.setRows(rows);
     if (noResults) {
-        noResults.style.display = 'none';
+        noResults.style.display = rows.length ? 'none' : 'block';
     }
-    
-    // Show matching items
-    filteredConversations.forEach(conv => {
-        const item = conversationsList.querySelector(`li[data-uuid="${conv.uuid}"]`); // Changed to use UUID
-        if (item) {
-            item.style.display = 'block';
-        }
-    });
 }
 
 // Utility functions
@@ -210,12 +390,155 @@ function highlightSearchTerms(text, query) {
     return text.replace(regex, '<mark>$1</mark>');
 }
 
+// Segmented conversation pages
+// Long conversations only render their first segment of messages into the
+// page. Later segments and the raw message text live in small side files
+// next to the page and are loaded on demand as plain <script> tags, which
+// works from file:// as well as from a web server.
+
+const loadedScripts = {};
+const rawTextSegments = {};
+
+function loadScript(src) {
+    if (!loadedScripts[src]) {
+        loadedScripts[src] = new Promise((resolve, reject) => {
+            const script = document.createElement('script');
+            script.src = src;
+            script.async = true;
+            script.onload = resolve;
+            script.onerror = () => {
+                delete loadedScripts[src];
+                reject(new Error(`Failed to load ${src}`));
+            };
+            document.head.appendChild(script);
+        });
+    }
+    return loadedScripts[src];
+}
+
+function getSegmentContainer() {
+    return document.querySelector('.messages-container[data-segment-count]');
+}
+
+function getSegmentUrl(container, fileName) {
+    return `${container.dataset.segmentBase}${fileName}`;
+}
+
+function padSegmentIndex(index) {
+    return String(index).padStart(4, '0');
+}
+
+function receiveSegment(index, html) {
+    const container = getSegmentContainer();
+    if (!container) return;
+
+    const sentinel = document.getElementById('segment-sentinel');
+    if (sentinel) {
+        sentinel.insertAdjacentHTML('beforebegin', html);
+    } else {
+        container.insertAdjacentHTML('beforeend', html);
+    }
+}
+
+function receiveRawText(index, texts) {
+    rawTextSegments[index] = texts;
+}
+
+function initializeSegmentLoader() {
+    const container = getSegmentContainer();
+    const sentinel = document.getElementById('segment-sentinel');
+    if (!container || !sentinel) return;
+
+    const segmentCount = parseInt(container.dataset.segmentCount, 10) || 1;
+    let nextSegment = 1;
+    let loading = false;
+    let observer = null;
+
+    function isSentinelNearViewport() {
+        return sentinel.getBoundingClientRect().top < window.innerHeight * 2;
+    }
+
+    function finish() {
+        if (observer) observer.disconnect();
+        sentinel.remove();
+    }
+
+    function loadNextSegment() {
+        if (loading) return;
+        if (nextSegment >= segmentCount) {
+            finish();
+            return;
+        }
+
+        loading = true;
+        const fileName = `segment-${padSegmentIndex(nextSegment)}.js`;
+        loadScript(getSegmentUrl(container, fileName))
+            .then(() => {
+                nextSegment += 1;
+                loading = false;
+                // Keep going while the new messages still leave the sentinel in view
+                if (nextSegment >= segmentCount) {
+                    finish();
+                } else if (!observer || isSentinelNearViewport()) {
+                    loadNextSegment();
+                }
+            })
+            .catch(err => {
+                loading = false;
+                console.error('Failed to load messages:', err);
+            });
+    }
+
+    if ('IntersectionObserver' in window) {
+        observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadNextSegment();
+            }
+        }, { rootMargin: '1000px 0px' });
+        observer.observe(sentinel);
+    } else {
+        // Older engines (e.g. wkhtmltopdf) get every segment up front
+        loadNextSegment();
+    }
+}
+
+function loadRawText(messageElem) {
+    const container = getSegmentContainer();
+    if (!container || !messageElem || messageElem.dataset.index === undefined) {
+        return Promise.resolve(null);
+    }
+
+    const messageIndex = parseInt(messageElem.dataset.index, 10);
+    const segmentSize = parseInt(container.dataset.segmentSize, 10) || 1;
+    const segment = Math.floor(messageIndex / segmentSize);
+    const fileName = `raw-${padSegmentIndex(segment)}.js`;
+
+    return loadScript(getSegmentUrl(container, fileName)).then(() => {
+        const texts = rawTextSegments[segment];
+        return texts ? texts[messageIndex - segment * segmentSize] : null;
+    });
+}
+
 // Copy functionality for conversation pages
 
 function copyMessage(button) {
     const messageTextElem = button.parentElement.querySelector('.message-text');
-    const markdown = messageTextElem.dataset.markdown || messageTextElem.innerText;
-    navigator.clipboard.writeText(markdown)
+    const text = loadRawText(button.closest('.message'))
+        .catch(() => null)
+        .then(raw => raw ?? messageTextElem.innerText);
+
+    // Start the write during the click and hand it the pending text: browsers
+    // with strict user-activation rules (Safari) reject writes started after
+    // the raw text script has loaded
+    let copied;
+    if (window.ClipboardItem && navigator.clipboard.write) {
+        const blob = text.then(value => new Blob([value], { type: 'text/plain' }));
+        copied = navigator.clipboard.write([new ClipboardItem({ 'text/plain': blob })]);
+    } else {
+        copied = text.then(value => navigator.clipboard.writeText(value));
+    }
+
+    copied
         .then(() => {
             showCopyFeedback(button);
         })
@@ -328,6 +651,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeStyleSelector();
     initializeSearch();
     initializeFilters();
+    initializeSegmentLoader();
     handleMobileSearch();
     
     // Add loading state management
@@ -347,4 +671,6 @@ document.addEventListener('visibilitychange', function() {
 window.initializeTheme = initializeTheme;
 window.initializeSearch = initializeSearch;
 window.initializeFilters = initializeFilters;
-window.copyMessage = copyMessage;
\ No newline at end of file
+window.copyMessage = copyMessage;
+window.receiveSegment = receiveSegment;
+window.receiveRawText = receiveRawText;
\ No newline at end of file
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+PDF export throughput benchmark.
+
+Renders the same synthetic conversations with the original fixed-width
+``drawString`` exporter and with ``exporters.pdf``, one file per
+conversation and as a single bookmarked document, and reports pages per
+second and bytes per page for each.
+
+Usage:
+    python scripts/benchmarks/pdf_benchmark.py [--conversations 50] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from parsers.base_parser import Conversation, Message  # noqa: E402
+from exporters.pdf import PdfWriter, write_pdf  # noqa: E402
+
+WORDS = (
+    'the of and to in is that for it with as was on be by this are from or an at which but not have '
+    'function return value error import class module request response cache layout render message '
+    'conversation export archive python model token stream buffer parser'
+).split()
+
+
+def synthetic_conversations(count: int, messages: int, seed: int = 1) -> List[Conversation]:
+    """
+    Build conversations with a mix of prose, code blocks and long tokens.
+
+    Args:
+        count: Number of conversations
+        messages: Messages per conversation
+        seed: Random seed, so runs are comparable
+
+    Returns:
+        List of Conversation objects
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    conversations = []
+    for c in range(count):
+        msgs = []
+        for m in range(messages):
+            paragraphs = []
+            for _ in range(rng.randint(1, 6)):
+                kind = rng.random()
+                if kind < 0.15:
+                    paragraphs.append('\n'.join(
+                        '    ' + ' '.join(rng.choices(WORDS, k=rng.randint(2, 8))) for _ in range(rng.randint(3, 12))
+                    ))
+                elif kind < 0.2:
+                    paragraphs.append('https://example.com/' + ''.join(rng.choices('abcdef0123456789', k=rng.randint(80, 300))))
+                else:
+                    paragraphs.append(' '.join(rng.choices(WORDS, k=rng.randint(20, 150))))
+            msgs.append(Message(
+                role='user' if m % 2 == 0 else 'assistant',
+                content='\n\n'.join(paragraphs),
+                timestamp=start + timedelta(minutes=c * messages + m),
+            ))
+        conversations.append(Conversation(
+            id=f"bench-{c}",
+            title=f"Benchmark conversation {c}",
+            source='benchmark',
+            created_at=start,
+            updated_at=start,
+            messages=msgs,
+        ))
+    return conversations
+
+
+def legacy_export_pdf(conv: Conversation, out_path: str) -> int:
+    """The original exporter: 90-character chunks, one drawString each."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(out_path, pagesize=letter)
+    width, height = letter
+    y = height - 40
+    c.setFont('Helvetica-Bold', 14)
+    c.drawString(40, y, conv.title)
+    y -= 30
+    c.setFont('Helvetica', 10)
+    for msg in conv.messages:
+        line = f"{msg.role.capitalize()} "
+        if msg.timestamp:
+            line += msg.timestamp.strftime('%Y-%m-%d %H:%M:%S') + ': '
+        line += msg.content
+        for chunk in [line[i:i+90] for i in range(0, len(line), 90)]:
+            if y < 40:
+                c.showPage()
+                y = height - 40
+                c.setFont('Helvetica', 10)
+            c.drawString(40, y, chunk)
+            y -= 14
+    pages = c.getPageNumber()
+    c.save()
+    return pages
+
+
+def engine_export_pdf(conv: Conversation, out_path: str) -> int:
+    writer = PdfWriter(out_path)
+    writer.add_conversation(conv)
+    return writer.close()
+
+
+def run_per_file(export: Callable[[Conversation, str], int], conversations: List[Conversation], out_dir: str) -> Dict[str, float]:
+    """Export each conversation to its own file."""
+    pages = size = 0
+    start = time.perf_counter()
+    for i, conv in enumerate(conversations):
+        out_path = os.path.join(out_dir, f"{i}.pdf")
+        pages += export(conv, out_path)
+        size += os.path.getsize(out_path)
+    return _stats(time.perf_counter() - start, pages, size)
+
+
+def run_batch(conversations: List[Conversation], out_dir: str) -> Dict[str, float]:
+    """Export all conversations to one bookmarked document."""
+    out_path = os.path.join(out_dir, 'batch.pdf')
+    start = time.perf_counter()
+    pages = write_pdf(conversations, out_path)
+    return _stats(time.perf_counter() - start, pages, os.path.getsize(out_path))
+
+
+def _stats(seconds: float, pages: int, size: int) -> Dict[str, float]:
+    return {
+        'seconds': round(seconds, 3),
+        'pages': pages,
+        'pages_per_second': round(pages / seconds, 1) if seconds else 0.0,
+        'bytes_per_page': round(size / pages) if pages else 0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure PDF export throughput.')
+    parser.add_argument('--conversations', type=int, default=50, help='Synthetic conversations to render')
+    parser.add_argument('--messages', type=int, default=40, help='Messages per conversation')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    conversations = synthetic_conversations(args.conversations, args.messages)
+    runs = {
+        'legacy': lambda out_dir: run_per_file(legacy_export_pdf, conversations, out_dir),
+        'engine': lambda out_dir: run_per_file(engine_export_pdf, conversations, out_dir),
+        'engine_batch': lambda out_dir: run_batch(conversations, out_dir),
+    }
+
+    results = {}
+    for name, run in runs.items():
+        with tempfile.TemporaryDirectory() as out_dir:
+            results[name] = stats = run(out_dir)
+        print(f"{name:14s} {stats['pages']:6d} pages in {stats['seconds']:7.2f} s  "
+              f"{stats['pages_per_second']:8.1f} pages/s  {stats['bytes_per_page']:6d} bytes/page")
+
+    # Legacy pages are 90-character strips that ignore word boundaries and
+    # newlines, so page counts differ; pages/s is per page actually produced
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
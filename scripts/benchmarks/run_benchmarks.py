@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+End-to-end benchmark suite.
+
+Generates a synthetic archive (see ``synthetic_archive.py``) in a scratch
+directory, then times each stage of ``ChatArchiveConverter.convert``, the
+two delta scripts (an initial run and an incremental run after the archive
+grows) and the exporters. Each stage records wall time and, unless
+``--no-tracemalloc`` is given, its peak Python heap. Results are written as
+JSON so runs can be compared between releases with ``--baseline``.
+
+All paths are redirected through the ``CHAT_*`` environment variables, so
+nothing outside the scratch directory is touched.
+
+Usage:
+    python scripts/benchmarks/run_benchmarks.py [--conversations 200] [--json results.json]
+    python scripts/benchmarks/run_benchmarks.py --json new.json --baseline old.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+import subprocess
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from benchmarks.synthetic_archive import generate_archive  # noqa: E402
+
+RESULTS_SCHEMA = 1
+
+
+class StageRunner:
+    """Runs benchmark stages and collects their measurements."""
+
+    def __init__(self, trace_memory: bool = True, verbose: bool = False):
+        self.trace_memory = trace_memory
+        self.verbose = verbose
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def run(self, name: str, func: Callable[[], Optional[Dict[str, Any]]]) -> None:
+        """
+        Time one stage and record its peak Python heap.
+
+        Args:
+            name: Stage name used as the JSON key
+            func: Stage body; may return extra values (counts, sizes) to record
+        """
+        output = io.StringIO()
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(sys.stdout if self.verbose else output):
+                extra = func() or {}
+            error = None
+        except Exception as e:
+            extra, error = {}, f"{type(e).__name__}: {e}"
+        seconds = time.perf_counter() - start
+        result: Dict[str, Any] = {'seconds': round(seconds, 4)}
+        if self.trace_memory:
+            result['peak_python_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+            tracemalloc.stop()
+        result.update(extra)
+        if error:
+            result['error'] = error
+        self.stages[name] = result
+
+        memory = f"  peak {result['peak_python_mb']:8.1f} MB" if 'peak_python_mb' in result else ''
+        status = f"  FAILED: {error}" if error else ''
+        print(f"{name:32s} {seconds:9.3f} s{memory}{status}")
+
+
+def _run_script_main(module_name: str, argv: List[str]) -> None:
+    """Import a CLI script fresh and run its main() with the given arguments."""
+    sys.modules.pop(module_name, None)
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / f"{module_name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    saved_argv = sys.argv
+    sys.argv = [module_name] + argv
+    try:
+        module.main()
+    finally:
+        sys.argv = saved_argv
+
+
+def _tree_size(path: str) -> Dict[str, int]:
+    files = size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            files += 1
+            size += os.path.getsize(os.path.join(root, name))
+    return {'files': files, 'bytes': size}
+
+
+def converter_stages(runner: StageRunner, raw_dir: str) -> None:
+    """The stages of ChatArchiveConverter.convert, cold and warm caches."""
+    from convert_to_html import ChatArchiveConverter
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        converter = ChatArchiveConverter()
+    state: Dict[str, Any] = {}
+
+    def parse() -> Dict[str, Any]:
+        state['inputs'] = converter.find_input_files()
+        state['conversations'] = converter.parse_conversations(state['inputs'])
+        return {
+            'conversations': sum(len(c) for c in state['conversations'].values()),
+            'messages': sum(len(conv.messages) for c in state['conversations'].values() for conv in c),
+        }
+
+    def generate_html() -> Dict[str, Any]:
+        state['output_dir'] = converter.create_output_directory()
+        state['metadata'] = converter.generate_html_files(state['conversations'], state['output_dir'])
+        return {'pages': len(state['metadata'])}
+
+    def related() -> Dict[str, Any]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            converter.find_related(state['conversations'])
+        return {name: value for name, value in converter.report.counters.items() if name.startswith('related_')}
+
+    shutil.rmtree(os.path.join(converter.cache_dir, 'corpus'), ignore_errors=True)
+    runner.run('convert.parse_cold', parse)
+    runner.run('convert.parse_cached', parse)
+    if importlib.util.find_spec('numpy'):
+        shutil.rmtree(os.path.join(converter.cache_dir, 'related'), ignore_errors=True)
+        runner.run('convert.related', related)
+    runner.run('convert.generate_html', generate_html)
+    runner.run('convert.generate_index', lambda: {'ok': converter.generate_main_index(state['metadata'], state['output_dir'])})
+    runner.run('convert.setup_assets', lambda: {'ok': converter.setup_assets(state['output_dir'])})
+    runner.run('convert.create_zip', lambda: {'bytes': os.path.getsize(converter.create_zip_package(state['output_dir']))})
+    runner.run('convert.precompress', lambda: converter.precompress_output(state['output_dir']))
+    runner.stages['convert.generate_html'].update(_tree_size(state['output_dir']))
+
+
+def delta_stages(runner: StageRunner, raw_dir: str, grown_dir: str) -> None:
+    """Initial and incremental runs of both delta scripts."""
+    inputs = {
+        'openai': ('process_openai_delta', 'openai_conversations.json'),
+        'anthropic': ('process_anthropic_delta', 'claude_conversations.json'),
+    }
+    for source, (module_name, file_name) in inputs.items():
+        runner.run(f"delta.{source}_initial",
+                   lambda: _run_script_main(module_name, ['--input', os.path.join(raw_dir, file_name)]))
+        runner.run(f"delta.{source}_incremental",
+                   lambda: _run_script_main(module_name, ['--input', os.path.join(grown_dir, file_name)]))
+
+
+def export_stages(runner: StageRunner, work_dir: str, workers: int) -> None:
+    """Per-conversation, workbook and single-file exports."""
+    import export_conversations as ec
+
+    convs = ec.load_conversations()
+    base_names = ec.unique_base_names([(conv.title, conv.id) for conv in convs])
+    entries = [
+        ({'conversation': conv}, base_name, ec.conversation_digest(conv))
+        for conv, base_name in zip(convs, base_names)
+    ]
+    out_dir = os.path.join(work_dir, 'exports')
+    os.makedirs(out_dir, exist_ok=True)
+
+    runner.run('export.txt_md_csv', lambda: ec.export_conversations(entries, ['txt', 'md', 'csv'], out_dir, workers, True))
+    runner.run('export.up_to_date', lambda: ec.export_conversations(entries, ['txt', 'md', 'csv'], out_dir, workers, False))
+    runner.run('export.bulk_jsonl_gz', lambda: {
+        'conversations': ec.export_bulk(ec.iter_conversations(''), os.path.join(work_dir, 'corpus.jsonl.gz'))
+    })
+    if importlib.util.find_spec('openpyxl'):
+        runner.run('export.workbook', lambda: {
+            'rows': ec.write_workbook(ec.iter_conversations(''), os.path.join(work_dir, 'archive.xlsx'))
+        })
+    if importlib.util.find_spec('reportlab'):
+        runner.run('export.pdf_batch', lambda: {
+            'conversations': ec.export_bulk(ec.iter_conversations(''), os.path.join(work_dir, 'archive.pdf'))
+        })
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe the machine and revision the results were measured on."""
+    version_file = PROJECT_ROOT / 'VERSION'
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        'version': version_file.read_text().strip() if version_file.exists() else None,
+        'git_revision': revision,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process (Unix only)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1e6 if sys.platform == 'darwin' else 1e3), 1)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_seconds: float) -> List[str]:
+    """
+    Print per-stage changes against a baseline run.
+
+    Returns:
+        Names of stages that got slower by more than ``threshold`` (a ratio);
+        stages faster than ``min_seconds`` in both runs are too noisy to flag
+    """
+    regressions = []
+    print(f"\n{'stage':32s} {'baseline':>10s} {'current':>10s} {'change':>8s}")
+    for name, stage in results['stages'].items():
+        before = baseline.get('stages', {}).get(name)
+        if not before or 'error' in stage or 'error' in before or not before['seconds']:
+            continue
+        ratio = stage['seconds'] / before['seconds']
+        regressed = ratio > threshold and max(stage['seconds'], before['seconds']) >= min_seconds
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{name:32s} {before['seconds']:10.3f} {stage['seconds']:10.3f} {ratio - 1:+8.1%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the conversion pipeline on a synthetic archive.')
+    parser.add_argument('--conversations', type=int, default=200, help='Conversations per source')
+    parser.add_argument('--messages', type=int, default=40, help='Messages per conversation')
+    parser.add_argument('--branching', type=float, default=0.1, help='OpenAI side-branch probability per message')
+    parser.add_argument('--words', type=int, default=120, help='Mean words per message')
+    parser.add_argument('--growth', type=float, default=0.1, help='Archive growth before the incremental delta runs')
+    parser.add_argument('--seed', type=int, default=0, help='Archive seed')
+    parser.add_argument('--workers', type=int, default=1, help='CHAT_WORKERS for the run')
+    parser.add_argument('--stages', default='convert,delta,export', help='Comma separated stage groups to run')
+    parser.add_argument('--work-dir', help='Scratch directory (default: a temporary directory, removed afterwards)')
+    parser.add_argument('--no-tracemalloc', action='store_true', help='Time only; tracemalloc slows Python code down')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Slow-down ratio reported as a regression (default 1.2)')
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help='Ignore regressions in stages shorter than this (default 0.05)')
+    parser.add_argument('--verbose', action='store_true', help='Show the output of the stages')
+    args = parser.parse_args()
+
+    groups = {g.strip() for g in args.stages.split(',') if g.strip()}
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='chat-bench-')
+    raw_dir = os.path.join(work_dir, 'raw')
+    grown_dir = os.path.join(work_dir, 'raw-grown')
+    os.environ.update({
+        'CHAT_DATA_DIR': os.path.join(work_dir, 'data'),
+        'CHAT_RAW_DIR': raw_dir,
+        'CHAT_OUTPUT_DIR': os.path.join(work_dir, 'html'),
+        'CHAT_CACHE_DIR': os.path.join(work_dir, 'cache'),
+        'CHAT_WORKERS': str(args.workers),
+    })
+
+    params = {
+        'conversations': args.conversations, 'messages': args.messages, 'branching': args.branching,
+        'words': args.words, 'growth': args.growth, 'seed': args.seed, 'workers': args.workers,
+        'tracemalloc': not args.no_tracemalloc,
+    }
+    runner = StageRunner(trace_memory=not args.no_tracemalloc, verbose=args.verbose)
+    try:
+        runner.run('generate_archive', lambda: {
+            'bytes': sum(os.path.getsize(p) for p in generate_archive(
+                raw_dir, args.conversations, args.messages, args.branching, args.words, args.seed
+            ).values())
+        })
+        if 'convert' in groups:
+            converter_stages(runner, raw_dir)
+        if 'delta' in groups:
+            generate_archive(grown_dir, int(args.conversations * (1 + args.growth)), args.messages,
+                             args.branching, args.words, args.seed)
+            delta_stages(runner, raw_dir, grown_dir)
+        if 'export' in groups:
+            export_stages(runner, work_dir, args.workers)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        'schema': RESULTS_SCHEMA,
+        'environment': environment_info(),
+        'params': params,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': runner.stages,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('params') != params:
+            print("\nWarning: baseline was measured with different parameters")
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than {args.threshold:.2f}x baseline")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Cold-start benchmark for the command line tools.
+
+Measures the wall-clock time of ``--help`` invocations, which load every
+module a CLI imports at startup but do no conversion work. The GNOME front
+end spawns a fresh process per action, so this is the latency users see
+before any work starts.
+
+Usage:
+    python scripts/benchmarks/startup_benchmark.py [--runs 10] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
+
+
+def find_binary(dist_dir: Path) -> Optional[Path]:
+    """
+    Find the most recently built PyInstaller CLI binary.
+
+    Args:
+        dist_dir: Directory where scripts/build.py writes its output
+
+    Returns:
+        Path to the binary, or None if no build exists
+    """
+    candidates = [
+        path for path in dist_dir.glob('chat-archive-converter-v*')
+        if path.is_file() and os.access(path, os.X_OK)
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda path: path.stat().st_mtime)
+
+
+def time_command(command: List[str], runs: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    Time repeated runs of a command.
+
+    Args:
+        command: Command line to run
+        runs: Number of timed runs
+        warmup: Untimed runs first, so the OS file cache is warm
+
+    Returns:
+        Dictionary of min/median/mean/max timings in milliseconds
+    """
+    timings = []
+    for i in range(warmup + runs):
+        start = time.perf_counter()
+        subprocess.run(
+            command,
+            cwd=PROJECT_ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        if i >= warmup:
+            timings.append(elapsed)
+
+    return {
+        'min_ms': round(min(timings), 1),
+        'median_ms': round(statistics.median(timings), 1),
+        'mean_ms': round(statistics.mean(timings), 1),
+        'max_ms': round(max(timings), 1),
+        'runs': runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure CLI cold-start time.')
+    parser.add_argument('--runs', type=int, default=10, help='Timed runs per command')
+    parser.add_argument('--dist-dir', default=str(PROJECT_ROOT / 'dist'), help='PyInstaller output directory')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    commands = {
+        'convert_to_html': [sys.executable, str(SCRIPTS_DIR / 'convert_to_html.py'), '--help'],
+        'export_conversations': [sys.executable, str(SCRIPTS_DIR / 'export_conversations.py'), '--help'],
+        # Interpreter startup alone, as a floor for the numbers above
+        'python_baseline': [sys.executable, '-c', 'pass'],
+    }
+
+    binary = find_binary(Path(args.dist_dir))
+    if binary:
+        commands['pyinstaller_binary'] = [str(binary), '--help']
+    else:
+        print(f"No CLI binary found in {args.dist_dir}; run scripts/build.py to include it")
+
+    results = {}
+    for name, command in commands.items():
+        try:
+            results[name] = time_command(command, args.runs)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        stats = results[name]
+        print(f"{name:22s} median {stats['median_ms']:8.1f} ms  "
+              f"(min {stats['min_ms']:.1f}, max {stats['max_ms']:.1f})")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Deterministic synthetic chat exports for benchmarks.
+
+Writes an OpenAI-style export (``mapping`` trees, with optional edit and
+regenerate branches) and an Anthropic-style export (``chat_messages``
+lists). Conversation ``i`` depends only on the seed, the source and ``i``,
+so a larger archive generated with the same seed extends a smaller one;
+the delta benchmarks rely on this.
+
+Usage:
+    python scripts/benchmarks/synthetic_archive.py OUTPUT_DIR [--conversations 500] [--messages 40]
+"""
+import os
+import json
+import uuid
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+OPENAI_FILENAME = 'openai_conversations.json'
+ANTHROPIC_FILENAME = 'claude_conversations.json'
+
+SOURCES = ('openai', 'anthropic')
+
+_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+_WORDS = (
+    'the of and to in is that for it with as was on be by this are from or an at which but not have '
+    'archive conversation message export render template stream cache parser index search asset '
+    'function return value error import class module request response token model prompt layout '
+    'python javascript json html markdown unicode buffer segment worker process memory benchmark'
+).split()
+
+_UNICODE_WORDS = ['naïve', 'café', 'Größe', 'déjà', 'Ελληνικά', 'русский', '中文', '日本語', '✓', '→']
+
+
+class TextFactory:
+    """Generates Markdown-flavoured message text of a target length."""
+
+    def __init__(self, rng: random.Random, words: int):
+        self.rng = rng
+        self.words = words
+
+    def message(self) -> str:
+        """One message: prose paragraphs with occasional code, lists and links."""
+        rng = self.rng
+        target = max(1, int(rng.expovariate(1 / self.words)))
+        blocks: List[str] = []
+        written = 0
+        while written < target:
+            kind = rng.random()
+            if kind < 0.12:
+                lines = [f"    {self._sentence(rng.randint(2, 6)).rstrip('.')}" for _ in range(rng.randint(2, 10))]
+                blocks.append('```python\n' + '\n'.join(lines) + '\n```')
+                written += 5 * len(lines)
+            elif kind < 0.22:
+                items = [f"- {self._sentence(rng.randint(3, 9))}" for _ in range(rng.randint(2, 6))]
+                blocks.append('\n'.join(items))
+                written += 6 * len(items)
+            else:
+                count = min(target - written, rng.randint(15, 90))
+                paragraph = self._sentence(count)
+                if rng.random() < 0.1:
+                    paragraph += f" See [the docs](https://example.com/{rng.choice(_WORDS)})."
+                blocks.append(paragraph)
+                written += count
+        return '\n\n'.join(blocks)
+
+    def title(self) -> str:
+        return self._sentence(self.rng.randint(2, 7)).rstrip('.')
+
+    def _sentence(self, count: int) -> str:
+        rng = self.rng
+        words = [
+            rng.choice(_UNICODE_WORDS) if rng.random() < 0.02 else rng.choice(_WORDS)
+            for _ in range(max(1, count))
+        ]
+        words[0] = words[0].capitalize()
+        return ' '.join(words) + '.'
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _conversation_rng(seed: int, source: str, index: int) -> random.Random:
+    return random.Random(f"{seed}:{source}:{index}")
+
+
+def openai_conversation(index: int, messages: int, branching: float, words: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build one OpenAI export conversation.
+
+    The mapping is a tree rooted at an empty system node. Along the main
+    thread, each message has a ``branching`` chance of getting an
+    abandoned sibling (an edited prompt or regenerated answer) with a
+    short continuation of its own; ``current_node`` is the main leaf.
+
+    Args:
+        index: Conversation number
+        messages: Messages on the main thread
+        branching: Probability of a side branch per message
+        words: Mean words per message
+        seed: Archive seed
+
+    Returns:
+        Conversation dictionary as found in ``conversations.json``
+    """
+    rng = _conversation_rng(seed, 'openai', index)
+    text = TextFactory(rng, words)
+    created = _START + timedelta(hours=index * 7, seconds=rng.randint(0, 3600))
+    clock = created.timestamp()
+
+    root_id = _uuid(rng)
+    mapping: Dict[str, Any] = {root_id: {'id': root_id, 'message': None, 'parent': None, 'children': []}}
+
+    def add(parent_id: str, role: str, timestamp: float) -> str:
+        node_id = _uuid(rng)
+        mapping[node_id] = {
+            'id': node_id,
+            'message': {
+                'id': node_id,
+                'author': {'role': role, 'name': None, 'metadata': {}},
+                'create_time': timestamp,
+                'update_time': None,
+                'content': {'content_type': 'text', 'parts': [text.message()]},
+                'status': 'finished_successfully',
+                'end_turn': role == 'assistant',
+                'weight': 1.0,
+                'metadata': {},
+                'recipient': 'all',
+            },
+            'parent': parent_id,
+            'children': [],
+        }
+        mapping[parent_id]['children'].append(node_id)
+        return node_id
+
+    current = root_id
+    for position in range(messages):
+        role = 'user' if position % 2 == 0 else 'assistant'
+        clock += rng.randint(5, 600)
+        if rng.random() < branching:
+            side = add(current, role, clock)
+            for depth in range(rng.randint(0, 2)):
+                side = add(side, 'assistant' if (position + depth) % 2 == 0 else 'user', clock + depth + 1)
+        current = add(current, role, clock + 3)
+
+    conv_id = _uuid(rng)
+    return {
+        'title': text.title(),
+        'create_time': created.timestamp(),
+        'update_time': clock,
+        'mapping': mapping,
+        'moderation_results': [],
+        'current_node': current,
+        'conversation_id': conv_id,
+        'id': conv_id,
+    }
+
+
+def anthropic_conversation(index: int, messages: int, words: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build one Anthropic (Claude) export conversation.
+
+    Args:
+        index: Conversation number
+        messages: Messages in the conversation
+        words: Mean words per message
+        seed: Archive seed
+
+    Returns:
+        Conversation dictionary as found in ``conversations.json``
+    """
+    rng = _conversation_rng(seed, 'anthropic', index)
+    text = TextFactory(rng, words)
+    created = _START + timedelta(hours=index * 5, seconds=rng.randint(0, 3600))
+    clock = created
+    chat_messages = []
+    for position in range(messages):
+        clock += timedelta(seconds=rng.randint(5, 600))
+        body = text.message()
+        stamp = clock.isoformat().replace('+00:00', 'Z')
+        chat_messages.append({
+            'uuid': _uuid(rng),
+            'text': body,
+            'content': [{'type': 'text', 'text': body}],
+            'sender': 'human' if position % 2 == 0 else 'assistant',
+            'index': position,
+            'created_at': stamp,
+            'updated_at': stamp,
+            'attachments': [],
+            'files': [],
+        })
+    return {
+        'uuid': _uuid(rng),
+        'name': text.title(),
+        'created_at': created.isoformat().replace('+00:00', 'Z'),
+        'updated_at': clock.isoformat().replace('+00:00', 'Z'),
+        'account': {'uuid': '00000000-0000-4000-8000-000000000000'},
+        'chat_messages': chat_messages,
+    }
+
+
+def iter_conversations(
+    source: str,
+    conversations: int,
+    messages: int,
+    branching: float = 0.1,
+    words: int = 120,
+    seed: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """Yield the conversations of one synthetic export."""
+    for index in range(conversations):
+        if source == 'openai':
+            yield openai_conversation(index, messages, branching, words, seed)
+        elif source == 'anthropic':
+            yield anthropic_conversation(index, messages, words, seed)
+        else:
+            raise ValueError(f"Unknown source '{source}'")
+
+
+def write_export(path: str, conversations: Iterable[Dict[str, Any]]) -> int:
+    """
+    Write conversations as a JSON array, one at a time.
+
+    Returns:
+        Number of conversations written
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for conv in conversations:
+            if count:
+                f.write(', ')
+            json.dump(conv, f, ensure_ascii=False)
+            count += 1
+        f.write(']')
+    return count
+
+
+def generate_archive(
+    out_dir: str,
+    conversations: int = 500,
+    messages: int = 40,
+    branching: float = 0.1,
+    words: int = 120,
+    seed: int = 0,
+    sources: Optional[Iterable[str]] = None
+) -> Dict[str, str]:
+    """
+    Write synthetic exports for the given sources.
+
+    Args:
+        out_dir: Directory for the export files (the converters' raw data dir)
+        conversations: Conversations per source
+        messages: Messages per conversation (main thread for OpenAI)
+        branching: OpenAI side-branch probability per message
+        words: Mean words per message
+        seed: Archive seed
+        sources: Subset of ``SOURCES`` (default: both)
+
+    Returns:
+        Source name -> path of the written file
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    for source in sources or SOURCES:
+        path = os.path.join(out_dir, OPENAI_FILENAME if source == 'openai' else ANTHROPIC_FILENAME)
+        write_export(path, iter_conversations(source, conversations, messages, branching, words, seed))
+        paths[source] = path
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generate deterministic synthetic chat exports.')
+    parser.add_argument('output_dir', help='Directory for the export files')
+    parser.add_argument('--conversations', type=int, default=500, help='Conversations per source')
+    parser.add_argument('--messages', type=int, default=40, help='Messages per conversation')
+    parser.add_argument('--branching', type=float, default=0.1, help='OpenAI side-branch probability per message')
+    parser.add_argument('--words', type=int, default=120, help='Mean words per message')
+    parser.add_argument('--seed', type=int, default=0, help='Archive seed')
+    parser.add_argument('--sources', default=','.join(SOURCES), help='Comma separated sources (openai,anthropic)')
+    args = parser.parse_args()
+
+    sources = [s.strip() for s in args.sources.split(',') if s.strip()]
+    unknown = set(sources) - set(SOURCES)
+    if unknown:
+        parser.error(f"Unknown sources: {', '.join(sorted(unknown))}")
+
+    paths = generate_archive(
+        args.output_dir, args.conversations, args.messages, args.branching, args.words, args.seed, sources
+    )
+    for source, path in paths.items():
+        print(f"{source:10s} {os.path.getsize(path) / 1e6:8.1f} MB  {path}")
+
+
+if __name__ == '__main__':
+    main()
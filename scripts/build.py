@@ -57,6 +57,20 @@ def install_dependencies():
         run_command([sys.executable, "-m", "pip", "install", "pyinstaller"])
 
 
+def precompile_templates():
+    """Precompile Jinja2 templates so packaged builds skip template compilation."""
+    print("\n=== Precompiling Templates ===")
+
+    scripts_dir = Path(__file__).parent
+    sys.path.insert(0, str(scripts_dir))
+    from generators.template_env import COMPILED_TEMPLATES_DIRNAME, precompile_templates as compile_all
+
+    target_dir = Path("build") / COMPILED_TEMPLATES_DIRNAME
+    count = compile_all(str(scripts_dir / "templates"), str(target_dir))
+    print(f"✅ Precompiled {count} templates into {target_dir}")
+    return target_dir
+
+
 def build_cli_binary():
     """Build standalone CLI binary with PyInstaller."""
     print("\n=== Building CLI Binary ===")
@@ -64,16 +78,22 @@ def build_cli_binary():
     version_str, build_num = get_full_version()
     print(f"Version: {version_str}")
 
+    compiled_templates_dir = precompile_templates()
+
     # Run PyInstaller with hidden imports
     pyinstaller_cmd = [
         "pyinstaller",
         "--onefile",
         "--name", f"chat-archive-converter-v{get_version()}-build-{build_num}",
         "--add-data", f"VERSION:.",
+        "--add-data", f"{compiled_templates_dir}:{compiled_templates_dir.name}",
         "--hidden-import", "jinja2",
         "--hidden-import", "markdown",
         "--hidden-import", "PIL",
         "--hidden-import", "pdfkit",
+        # Imported lazily, so PyInstaller's analysis cannot see them
+        "--hidden-import", "imgkit",
+        "--hidden-import", "generators.gif_generator",
         "--hidden-import", "docx",
         "--hidden-import", "openpyxl",
         "--hidden-import", "reportlab",
@@ -32,7 +32,11 @@ a = Analysis(
         (str(version_file), "."),
         (str(project_root / "scripts" / "templates"), "templates"),
         (str(project_root / "scripts" / "assets"), "assets"),
-    ],
+    ] + (
+        # Precompiled templates written by scripts/build.py, if present
+        [(str(project_root / "build" / "compiled_templates"), "compiled_templates")]
+        if (project_root / "build" / "compiled_templates").is_dir() else []
+    ),
     hiddenimports=[
         "jinja2",
         "jinja2.Environment",
@@ -40,6 +44,12 @@ a = Analysis(
         "PIL",
         "PIL.Image",
         "pdfkit",
+        "imgkit",
+        "generators.gif_generator",
+        "corpus.related",
+        "corpus.dedup",
+        "corpus.merge",
+        "numpy",
         "docx",
         "openpyxl",
         "reportlab",
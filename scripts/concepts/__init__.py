@@ -0,0 +1,2 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""Concept and relation extraction with a local LLM."""
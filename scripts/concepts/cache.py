@@ -0,0 +1,148 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Content-addressed cache of concept extraction results.
+
+Results are stored in SQLite keyed by model name, prompt version and the
+SHA-256 digest of the text sent to the model, so re-running extraction over
+an archive only calls the model for messages it has not seen. Lifetime hit
+and miss counters are kept alongside for ``--cache-stats``.
+"""
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILENAME = 'concepts.sqlite3'
+
+# Uncommitted results are written out after this many puts
+COMMIT_INTERVAL = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    model TEXT NOT NULL,
+    prompt_version INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (model, prompt_version, digest)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def text_digest(text: str) -> str:
+    """SHA-256 hex digest of the UTF-8 text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ConceptCache:
+    """SQLite store of extraction results for one prompt version."""
+
+    def __init__(self, path: str, prompt_version: int):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Database file, usually ``<cache_dir>/concepts.sqlite3``
+            prompt_version: Version of the prompt templates; results of
+                other versions are never returned
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.prompt_version = prompt_version
+        self.hits = 0
+        self.misses = 0
+        self._uncommitted = 0
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> 'ConceptCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get(self, model: str, text: str, count: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Look up the result for a text.
+
+        Args:
+            model: Model name
+            text: Text sent to the model
+            count: Include the lookup in the hit/miss counters (off for
+                readers such as the graph export that never call the model)
+
+        Returns:
+            Cached result dictionary, or None on a miss
+        """
+        row = self._conn.execute(
+            'SELECT result FROM results WHERE model = ? AND prompt_version = ? AND digest = ?',
+            (model, self.prompt_version, text_digest(text))
+        ).fetchone()
+        if count:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, model: str, text: str, result: Dict[str, Any]) -> None:
+        """Store the result for a text."""
+        self._conn.execute(
+            'INSERT OR REPLACE INTO results (model, prompt_version, digest, result) VALUES (?, ?, ?, ?)',
+            (model, self.prompt_version, text_digest(text), json.dumps(result, ensure_ascii=False))
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_INTERVAL:
+            self.commit()
+
+    def commit(self) -> None:
+        """Write out pending results and this session's hit/miss counts."""
+        for name, value in (('hits', self.hits), ('misses', self.misses)):
+            self._conn.execute(
+                'INSERT INTO counters (name, value) VALUES (?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+                (name, value)
+            )
+        self._conn.commit()
+        self.hits = self.misses = self._uncommitted = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarize the cache contents and lifetime hit rate.
+
+        Returns:
+            Dictionary with entry counts per (model, prompt version), lifetime
+            hits/misses/hit rate and the database size
+        """
+        self.commit()
+        counters = dict(self._conn.execute('SELECT name, value FROM counters'))
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        entries = [
+            {'model': model, 'prompt_version': version, 'entries': count}
+            for model, version, count in self._conn.execute(
+                'SELECT model, prompt_version, COUNT(*) FROM results GROUP BY model, prompt_version ORDER BY model'
+            )
+        ]
+        return {
+            'path': self.path,
+            'size_bytes': os.path.getsize(self.path),
+            'entries': entries,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+    def close(self) -> None:
+        """Commit and close the database."""
+        if self._conn is not None:
+            self.commit()
+            self._conn.close()
+            self._conn = None
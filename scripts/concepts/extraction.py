@@ -0,0 +1,365 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Archive-wide concept extraction against an Ollama-compatible server.
+
+Messages are grouped into batches so one prompt covers several of them, and
+a bounded number of batches are in flight at once. Requests go to the
+server's ``/api/chat`` endpoint over plain HTTP, so any server implementing
+that endpoint (including a local stand-in for tests) can be used.
+"""
+import os
+import re
+import json
+import asyncio
+import logging
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from parsers.base_parser import Conversation
+from concepts.cache import ConceptCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = 'http://127.0.0.1:11434'
+
+PROMPT_TEMPLATE = (
+    "You are an information extraction agent. "
+    "Given the following text, identify the main concepts as a list of strings "
+    "and any directed relationships between them as triples [source, relation, target]. "
+    "Respond in JSON with keys 'concepts' and 'relations'.\nText:\n{text}"
+)
+
+BATCH_PROMPT_TEMPLATE = (
+    "You are an information extraction agent. "
+    "For each numbered text below, identify the main concepts as a list of strings "
+    "and any directed relationships between them as triples [source, relation, target]. "
+    "Respond in JSON with a key 'results' holding one object per text, "
+    "with keys 'id', 'concepts' and 'relations'.\n\n{texts}"
+)
+
+# Bump when either prompt changes, so cached results are not reused
+PROMPT_VERSION = 1
+
+# Longer messages are truncated before prompting (and before cache lookups)
+MAX_TEXT_CHARS = 8000
+
+MAX_RETRIES = 2
+RETRY_DELAY_SECONDS = 1.0
+
+# Failures of a single request (HTTP, network, malformed response body)
+REQUEST_ERRORS = (urllib.error.URLError, OSError, KeyError, ValueError)
+
+# Raw export names searched for in the data directory, per source
+ARCHIVE_INPUTS = {
+    'anthropic': ['claude_conversations.json', 'anthropic_conversations.json', 'example_claude_conversations.json'],
+    'openai': ['openai_conversations.json', 'chatgpt_conversations.json', 'example_openai_conversations.json'],
+}
+
+# Reasoning models prefix their answer with their chain of thought
+_THINK_RE = re.compile(r'<think>.*?</think>', re.DOTALL)
+
+
+class ExtractionItem(NamedTuple):
+    """One message to extract concepts from."""
+    conversation_id: str
+    source: str
+    message_index: int
+    role: str
+    text: str
+
+
+def normalize_host(host: str) -> str:
+    """Accept ``OLLAMA_HOST`` style values such as ``0.0.0.0:11434``."""
+    host = host.strip().rstrip('/')
+    if '://' not in host:
+        host = f"http://{host}"
+    return host
+
+
+def parse_reply(raw: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract the JSON object from a model reply.
+
+    Args:
+        raw: Reply text, possibly wrapped in reasoning or a code fence
+
+    Returns:
+        Parsed object, or None if the reply holds no JSON object
+    """
+    raw = _THINK_RE.sub('', raw).strip()
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        start, end = raw.find('{'), raw.rfind('}')
+        if start < 0 or end <= start:
+            return None
+        try:
+            data = json.loads(raw[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+    return data if isinstance(data, dict) else None
+
+
+def clean_result(data: Dict[str, Any]) -> Dict[str, list]:
+    """Keep only well-formed concepts and relation triples of a reply."""
+    concepts = [str(c) for c in data.get('concepts') or [] if isinstance(c, (str, int, float))]
+    relations = [
+        [str(part) for part in r] for r in data.get('relations') or []
+        if isinstance(r, (list, tuple)) and len(r) == 3
+    ]
+    return {'concepts': concepts, 'relations': relations}
+
+
+def iter_archive(raw_dir: str) -> Iterator[Conversation]:
+    """Yield the parsed conversations of every export found in raw_dir."""
+    from config import get_config
+    from corpus.cache import CorpusCache
+    from parsers.anthropic_parser import AnthropicParser
+    from parsers.openai_parser import OpenAIParser
+
+    config = get_config()
+    cache = CorpusCache(config.cache_dir, enabled=config.corpus_cache)
+    parsers = {'anthropic': AnthropicParser(), 'openai': OpenAIParser()}
+    for source, names in ARCHIVE_INPUTS.items():
+        for name in names:
+            path = os.path.join(raw_dir, name)
+            if os.path.exists(path):
+                yield from cache.load(parsers[source], path, config.max_file_size_mb)
+                break
+
+
+def iter_items(
+    conversations: Iterable[Conversation],
+    max_chars: int = MAX_TEXT_CHARS
+) -> Iterator[ExtractionItem]:
+    """
+    Turn conversations into extraction items, one per non-empty message.
+
+    Args:
+        conversations: Parsed conversations
+        max_chars: Longer messages are truncated to keep prompts bounded
+
+    Yields:
+        ExtractionItem per message
+    """
+    for conv in conversations:
+        for index, msg in enumerate(conv.messages):
+            text = msg.content.strip()
+            if text:
+                yield ExtractionItem(conv.id, conv.source, index, msg.role, text[:max_chars])
+
+
+def make_batches(
+    items: Iterable[ExtractionItem],
+    batch_size: int = 8,
+    batch_chars: int = 6000
+) -> Iterator[List[ExtractionItem]]:
+    """
+    Group items into prompt-sized batches.
+
+    A batch ends when it holds ``batch_size`` items or adding the next item
+    would exceed ``batch_chars``; an item longer than that goes alone.
+    """
+    batch: List[ExtractionItem] = []
+    chars = 0
+    for item in items:
+        if batch and (len(batch) >= batch_size or chars + len(item.text) > batch_chars):
+            yield batch
+            batch, chars = [], 0
+        batch.append(item)
+        chars += len(item.text)
+    if batch:
+        yield batch
+
+
+class OllamaHttpClient:
+    """Minimal asynchronous client for the Ollama ``/api/chat`` endpoint."""
+
+    def __init__(self, host: str = DEFAULT_HOST, timeout: float = 300.0):
+        """
+        Initialize the client.
+
+        Args:
+            host: Server base URL
+            timeout: Seconds to wait for one reply
+        """
+        self.url = f"{normalize_host(host)}/api/chat"
+        self.timeout = timeout
+        self.requests = 0
+
+    async def chat(self, model: str, prompt: str) -> str:
+        """
+        Send one prompt and return the reply text.
+
+        Connection errors and 5xx responses are retried; the blocking
+        request runs in a worker thread so other batches proceed meanwhile.
+        """
+        payload = json.dumps({
+            'model': model,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'stream': False,
+            'format': 'json',
+        }).encode('utf-8')
+
+        attempt = 0
+        while True:
+            self.requests += 1
+            try:
+                return await asyncio.to_thread(self._post, payload)
+            except urllib.error.HTTPError as e:
+                if e.code < 500 or attempt >= MAX_RETRIES:
+                    raise
+            except OSError:
+                if attempt >= MAX_RETRIES:
+                    raise
+            attempt += 1
+            await asyncio.sleep(RETRY_DELAY_SECONDS * attempt)
+
+    def _post(self, payload: bytes) -> str:
+        request = urllib.request.Request(self.url, data=payload, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = json.loads(response.read().decode('utf-8'))
+        return body['message']['content']
+
+
+def _record(item: ExtractionItem, result: Optional[Dict[str, list]], error: Optional[str] = None) -> Dict[str, Any]:
+    record = {
+        'conversation_id': item.conversation_id,
+        'source': item.source,
+        'message_index': item.message_index,
+        'role': item.role,
+        'concepts': result['concepts'] if result else [],
+        'relations': result['relations'] if result else [],
+    }
+    if error:
+        record['error'] = error
+    return record
+
+
+async def extract_batch(client: OllamaHttpClient, model: str, batch: List[ExtractionItem]) -> List[Dict[str, Any]]:
+    """
+    Extract concepts for one batch.
+
+    Items the batched reply does not cover (models sometimes drop or merge
+    entries) are retried with the single-text prompt, as are all items if
+    the batched request fails (e.g. because the prompt is too long). Only
+    items whose own request fails get an ``error``.
+
+    Returns:
+        One JSONL record per item
+    """
+    results: Dict[int, Dict[str, list]] = {}
+    if len(batch) > 1:
+        texts = '\n\n'.join(f"Text {i}:\n{item.text}" for i, item in enumerate(batch, 1))
+        try:
+            reply = parse_reply(await client.chat(model, BATCH_PROMPT_TEMPLATE.format(texts=texts))) or {}
+        except REQUEST_ERRORS as e:
+            logger.warning("Batch of %d messages failed, retrying one by one: %s", len(batch), e)
+            reply = {}
+        for entry in reply.get('results') or []:
+            if isinstance(entry, dict) and isinstance(entry.get('id'), (int, str)) and str(entry['id']).isdigit():
+                results[int(entry['id']) - 1] = clean_result(entry)
+
+    records = []
+    for i, item in enumerate(batch):
+        if i not in results:
+            try:
+                reply = parse_reply(await client.chat(model, PROMPT_TEMPLATE.format(text=item.text)))
+            except REQUEST_ERRORS as e:
+                records.append(_record(item, None, str(e)))
+                continue
+            if reply is None:
+                records.append(_record(item, None, 'unparseable reply'))
+                continue
+            results[i] = clean_result(reply)
+        records.append(_record(item, results[i]))
+    return records
+
+
+async def extract_archive(
+    items: Iterable[ExtractionItem],
+    out: TextIO,
+    client: OllamaHttpClient,
+    model: str,
+    concurrency: int = 4,
+    batch_size: int = 8,
+    batch_chars: int = 6000,
+    cache: Optional[ConceptCache] = None
+) -> Dict[str, int]:
+    """
+    Extract concepts for every item and write one JSON line per message.
+
+    Batches are created lazily and at most ``concurrency`` are in flight, so
+    memory does not grow with the archive. Lines are written in completion
+    order; each carries its conversation ID and message index. With a cache,
+    messages whose text was extracted before are written without a request.
+
+    Args:
+        items: Messages to process
+        out: Text stream receiving the JSONL records
+        client: Server client
+        model: Model name
+        concurrency: Maximum concurrent requests
+        batch_size: Maximum messages per prompt
+        batch_chars: Maximum characters of message text per prompt
+        cache: Result cache to read from and add to
+
+    Returns:
+        Counts of messages, cached messages, batches, requests and failed
+        messages
+    """
+    stats = {'messages': 0, 'cached': 0, 'batches': 0, 'requests': 0, 'failed': 0}
+    pending = set()
+    # The default executor has min(32, cpus + 4) threads, which would cap
+    # concurrency on small machines
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='concepts')
+    asyncio.get_running_loop().set_default_executor(executor)
+
+    def write(record: Dict[str, Any]) -> None:
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write('\n')
+        stats['messages'] += 1
+        stats['failed'] += 'error' in record
+
+    def write_batch(batch: List[ExtractionItem], records: List[Dict[str, Any]]) -> None:
+        for item, record in zip(batch, records):
+            write(record)
+            if cache is not None and 'error' not in record:
+                cache.put(model, item.text, {'concepts': record['concepts'], 'relations': record['relations']})
+
+    def uncached(items: Iterable[ExtractionItem]) -> Iterator[ExtractionItem]:
+        for item in items:
+            result = cache.get(model, item.text) if cache is not None else None
+            if result is None:
+                yield item
+            else:
+                write(_record(item, result))
+                stats['cached'] += 1
+
+    async def run(batch: List[ExtractionItem]) -> Tuple[List[ExtractionItem], List[Dict[str, Any]]]:
+        try:
+            return batch, await extract_batch(client, model, batch)
+        except REQUEST_ERRORS as e:
+            logger.warning("Batch of %d messages failed: %s", len(batch), e)
+            return batch, [_record(item, None, str(e)) for item in batch]
+
+    async def drain(limit: int) -> None:
+        nonlocal pending
+        while len(pending) > limit:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                write_batch(*task.result())
+
+    try:
+        for batch in make_batches(uncached(items), batch_size, batch_chars):
+            await drain(concurrency - 1)
+            pending.add(asyncio.create_task(run(batch)))
+            stats['batches'] += 1
+        await drain(0)
+    finally:
+        executor.shutdown(wait=False)
+
+    stats['requests'] = client.requests
+    return stats
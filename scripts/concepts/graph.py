@@ -0,0 +1,221 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+hKG graph export as bulk-load files.
+
+Builds the graph ``src/hkgImporter.ts`` creates one ``MERGE`` at a time:
+
+    (:ChatMessage {uuid, text, timestamp})-[:MENTIONS]->(:Concept {name})
+    (:Concept)-[:RELATES {type}]->(:Concept)
+    (:Meta {id: 1, lastImportedTs})
+
+Nodes and relationships are deduplicated locally and written twice:
+
+* ``csv/`` holds files for ``neo4j-admin database import``
+* ``batches/`` holds JSON files of rows, each loaded by a single
+  ``UNWIND $rows`` statement; ``manifest.json`` lists them in load order
+
+``load_batches`` replays the batch files through any object with the
+``driver.session().run(query, parameters).consume()`` interface of the
+Neo4j driver.
+"""
+import os
+import csv
+import json
+import shutil
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MANIFEST_FILENAME = 'manifest.json'
+
+SETUP_STATEMENTS = [
+    'CREATE CONSTRAINT chat_message_uuid IF NOT EXISTS FOR (c:ChatMessage) REQUIRE c.uuid IS UNIQUE',
+    'CREATE CONSTRAINT concept_name IF NOT EXISTS FOR (k:Concept) REQUIRE k.name IS UNIQUE',
+]
+
+# Batch kinds in load order: relationships MATCH nodes created by earlier kinds
+STATEMENTS = {
+    'chat_messages': (
+        'UNWIND $rows AS row '
+        'MERGE (c:ChatMessage {uuid: row.uuid}) SET c.text = row.text, c.timestamp = row.timestamp'
+    ),
+    'concepts': 'UNWIND $rows AS row MERGE (:Concept {name: row.name})',
+    'mentions': (
+        'UNWIND $rows AS row '
+        'MATCH (c:ChatMessage {uuid: row.uuid}) MATCH (k:Concept {name: row.name}) '
+        'MERGE (c)-[:MENTIONS]->(k)'
+    ),
+    'relates': (
+        'UNWIND $rows AS row '
+        'MATCH (a:Concept {name: row.source}) MATCH (b:Concept {name: row.target}) '
+        'MERGE (a)-[:RELATES {type: row.type}]->(b)'
+    ),
+}
+
+META_STATEMENT = (
+    'MERGE (m:Meta {id: 1}) '
+    'SET m.lastImportedTs = CASE WHEN coalesce(m.lastImportedTs, 0) < $ts THEN $ts ELSE m.lastImportedTs END'
+)
+
+CSV_FILES = {
+    'chat_messages': ('nodes_chat_message.csv', ['uuid:ID(ChatMessage)', 'text', 'timestamp:long', ':LABEL']),
+    'concepts': ('nodes_concept.csv', ['name:ID(Concept)', ':LABEL']),
+    'mentions': ('rels_mentions.csv', [':START_ID(ChatMessage)', ':END_ID(Concept)', ':TYPE']),
+    'relates': ('rels_relates.csv', [':START_ID(Concept)', ':END_ID(Concept)', 'type', ':TYPE']),
+}
+
+
+class GraphBatchWriter:
+    """Streams deduplicated hKG nodes and relationships to bulk-load files."""
+
+    def __init__(self, out_dir: str, batch_size: int = 1000):
+        """
+        Start a graph export, replacing any previous one in out_dir.
+
+        Args:
+            out_dir: Output directory
+            batch_size: Rows per UNWIND batch file
+        """
+        self.out_dir = out_dir
+        self.batch_dir = os.path.join(out_dir, 'batches')
+        self.batch_size = batch_size
+        for sub in ('batches', 'csv'):
+            shutil.rmtree(os.path.join(out_dir, sub), ignore_errors=True)
+            os.makedirs(os.path.join(out_dir, sub))
+
+        self._seen: Dict[str, set] = {kind: set() for kind in STATEMENTS}
+        self._pending: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind in STATEMENTS}
+        self._files: Dict[str, List[str]] = {kind: [] for kind in STATEMENTS}
+        self._csv_handles = {}
+        self._csv_writers = {}
+        for kind, (name, header) in CSV_FILES.items():
+            handle = open(os.path.join(out_dir, 'csv', name), 'w', newline='', encoding='utf-8')
+            self._csv_handles[kind] = handle
+            self._csv_writers[kind] = csv.writer(handle)
+            self._csv_writers[kind].writerow(header)
+        self.counts = {kind: 0 for kind in STATEMENTS}
+        self.newest_timestamp = 0
+
+    def add_message(
+        self,
+        uuid: str,
+        text: str,
+        timestamp: int,
+        concepts: Iterable[str] = (),
+        relations: Iterable[Tuple[str, str, str]] = ()
+    ) -> None:
+        """
+        Add a chat message with its extracted concepts and relations.
+
+        Args:
+            uuid: Message UUID (the node key)
+            text: Message text
+            timestamp: Milliseconds since the epoch
+            concepts: Concept names the message mentions
+            relations: (source, relation, target) concept triples
+        """
+        if self._add('chat_messages', uuid, {'uuid': uuid, 'text': text, 'timestamp': timestamp},
+                     [uuid, text, timestamp, 'ChatMessage']):
+            self.newest_timestamp = max(self.newest_timestamp, timestamp)
+
+        for name in concepts:
+            name = name.strip()
+            if name:
+                self._add_concept(name)
+                self._add('mentions', (uuid, name), {'uuid': uuid, 'name': name}, [uuid, name, 'MENTIONS'])
+
+        for source, rel_type, target in relations:
+            source, rel_type, target = source.strip(), rel_type.strip(), target.strip()
+            if source and rel_type and target:
+                self._add_concept(source)
+                self._add_concept(target)
+                self._add('relates', (source, rel_type, target),
+                          {'source': source, 'type': rel_type, 'target': target},
+                          [source, target, rel_type, 'RELATES'])
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Flush the remaining batches and write the manifest.
+
+        Returns:
+            The manifest: setup statements, batch files in load order, the
+            Meta update and per-kind row counts
+        """
+        for kind in STATEMENTS:
+            self._flush(kind)
+        for handle in self._csv_handles.values():
+            handle.close()
+
+        manifest = {
+            'setup': SETUP_STATEMENTS,
+            'batches': [
+                {'kind': kind, 'statement': STATEMENTS[kind], 'file': file_name}
+                for kind in STATEMENTS for file_name in self._files[kind]
+            ],
+            'meta': {'statement': META_STATEMENT, 'ts': self.newest_timestamp},
+            'counts': self.counts,
+        }
+        with open(os.path.join(self.out_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    def _add_concept(self, name: str) -> None:
+        self._add('concepts', name, {'name': name}, [name, 'Concept'])
+
+    def _add(self, kind: str, key: Any, row: Dict[str, Any], csv_row: list) -> bool:
+        """Queue a row unless its key was seen; returns True if it was new."""
+        if key in self._seen[kind]:
+            return False
+        self._seen[kind].add(key)
+        self._csv_writers[kind].writerow(csv_row)
+        self._pending[kind].append(row)
+        self.counts[kind] += 1
+        if len(self._pending[kind]) >= self.batch_size:
+            self._flush(kind)
+        return True
+
+    def _flush(self, kind: str) -> None:
+        rows = self._pending[kind]
+        if not rows:
+            return
+        file_name = f"{kind}-{len(self._files[kind]) + 1:05d}.json"
+        with open(os.path.join(self.batch_dir, file_name), 'w', encoding='utf-8') as f:
+            json.dump({'rows': rows}, f, ensure_ascii=False)
+        self._files[kind].append(file_name)
+        self._pending[kind] = []
+
+
+def load_batches(driver, out_dir: str, database: Optional[str] = None) -> Dict[str, int]:
+    """
+    Load an exported graph with one UNWIND statement per batch file.
+
+    Args:
+        driver: Neo4j driver (or any object whose ``session()`` returns a
+            context manager with ``run(query, parameters)``, returning an
+            object with ``consume()``)
+        out_dir: Directory written by ``GraphBatchWriter``
+        database: Database name, or None for the server default
+
+    Returns:
+        Rows sent per batch kind, plus the number of statements run
+    """
+    with open(os.path.join(out_dir, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    session_args = {'database': database} if database else {}
+    sent = {kind: 0 for kind in STATEMENTS}
+    statements = 0
+    with driver.session(**session_args) as session:
+        for statement in manifest['setup']:
+            session.run(statement, {}).consume()
+            statements += 1
+        for batch in manifest['batches']:
+            with open(os.path.join(out_dir, 'batches', batch['file']), 'r', encoding='utf-8') as f:
+                rows = json.load(f)['rows']
+            session.run(batch['statement'], {'rows': rows}).consume()
+            sent[batch['kind']] += len(rows)
+            statements += 1
+        if manifest['meta']['ts']:
+            session.run(manifest['meta']['statement'], {'ts': manifest['meta']['ts']}).consume()
+            statements += 1
+
+    sent['statements'] = statements
+    return sent
@@ -11,6 +11,17 @@ from dataclasses import dataclass
 from typing import Optional
 
 
+def default_cache_dir() -> Path:
+    """
+    Get the default on-disk cache directory.
+
+    Returns:
+        ``$XDG_CACHE_HOME/ai-chat-reader`` (or ``~/.cache/ai-chat-reader``)
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "ai-chat-reader"
+
+
 @dataclass
 class Config:
     """Application configuration with environment variable support."""
@@ -38,6 +49,14 @@ class Config:
     log_level: str = "INFO"
     log_file: Optional[Path] = None
 
+    # Performance options
+    cache_dir: Optional[Path] = None
+    corpus_cache: bool = True
+    workers: int = 1
+    memory_budget_mb: int = 1024
+    stream_threshold_messages: int = 200
+    segment_size: int = 250
+
     @classmethod
     def from_env(cls, project_root: Optional[Path] = None) -> "Config":
         """
@@ -49,6 +68,14 @@ class Config:
             CHAT_OUTPUT_DIR: HTML output directory (default: CHAT_DATA_DIR/html)
             CHAT_LOG_LEVEL: Logging level (default: INFO)
             CHAT_LOG_FILE: Log file path (optional)
+            CHAT_MAX_FILE_SIZE_MB: Inputs larger than this are parsed as a stream (default: 100)
+            CHAT_MINIFY_HTML: Minify generated HTML (default: false)
+            CHAT_CACHE_DIR: Template, compression and corpus caches (default: ~/.cache/ai-chat-reader)
+            CHAT_CORPUS_CACHE: Reuse parsed conversations until an export changes (default: true)
+            CHAT_WORKERS: Worker processes for rendering and compression, 0 = all cores (default: 1)
+            CHAT_MEMORY_BUDGET_MB: Memory budget for work queued to workers and for similarity blocks (default: 1024)
+            CHAT_STREAM_THRESHOLD: Message count above which pages are streamed to disk (default: 200)
+            CHAT_SEGMENT_SIZE: Messages per conversation page segment, 0 = no segments (default: 250)
 
         Args:
             project_root: Project root directory. Defaults to current working directory.
@@ -70,6 +97,11 @@ class Config:
         log_file_str = os.environ.get("CHAT_LOG_FILE")
         log_file = Path(log_file_str) if log_file_str else None
 
+        # Worker count of 0 means one per CPU core
+        workers = int(os.environ.get("CHAT_WORKERS", "1"))
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+
         return cls(
             project_root=project_root,
             data_dir=data_dir,
@@ -86,6 +118,12 @@ class Config:
             minify_html=os.environ.get("CHAT_MINIFY_HTML", "false").lower() == "true",
             log_level=os.environ.get("CHAT_LOG_LEVEL", "INFO").upper(),
             log_file=log_file,
+            cache_dir=Path(os.environ.get("CHAT_CACHE_DIR", default_cache_dir())),
+            corpus_cache=os.environ.get("CHAT_CORPUS_CACHE", "true").lower() == "true",
+            workers=workers,
+            memory_budget_mb=int(os.environ.get("CHAT_MEMORY_BUDGET_MB", "1024")),
+            stream_threshold_messages=int(os.environ.get("CHAT_STREAM_THRESHOLD", "200")),
+            segment_size=int(os.environ.get("CHAT_SEGMENT_SIZE", "250")),
         )
 
     def ensure_directories(self) -> None:
@@ -93,6 +131,8 @@ class Config:
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.raw_data_dir.mkdir(parents=True, exist_ok=True)
         self.html_output_dir.mkdir(parents=True, exist_ok=True)
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
 
 
 # Global configuration instance
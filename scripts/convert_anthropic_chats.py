@@ -1,8 +1,9 @@
 # Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
-import json
 import os
 from datetime import datetime
 
+from parsers.base_parser import iter_json_array
+
 # Define paths with proper expansion of '~'
 input_file = os.path.expanduser("./data/raw/claude_conversations.json")
 output_folder = os.path.expanduser("./data/processed/")
@@ -12,58 +13,64 @@ output_file = os.path.join(output_folder, "formatted_claude_conversations.md")
 if not os.path.exists(output_folder):
     os.makedirs(output_folder)
 
-# Load the JSON file
-with open(input_file, 'r', encoding='utf-8') as f:
-    data = json.load(f)
+# Stream conversations from the JSON file so memory stays bounded. The
+# Markdown goes to a temporary file that replaces the output only once
+# every conversation was written, so a missing or malformed export never
+# truncates the previous output.
+temp_file = output_file + '.tmp'
+try:
+    with open(temp_file, 'w', encoding='utf-8') as out:
+        for conversation in iter_json_array(input_file):
+            # Format one conversation at a time and write it out immediately
+            formatted_output = []
+
+            # Extract title and format as heading
+            title = conversation.get('name', 'Untitled Conversation')
+            formatted_output.append(f"# {title}\n")
+
+            # Extract creation date
+            created_at = conversation.get('created_at', '')
+            if created_at:
+                try:
+                    # Convert ISO format date string to datetime object and format it
+                    date_obj = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+                    date_str = date_obj.strftime('%Y-%m-%d %H:%M:%S')
+                    formatted_output.append(f"**Date:** {date_str}\n")
+                except (ValueError, TypeError):
+                    pass  # Skip if date conversion fails
+
+            # Process messages in the conversation
+            messages = conversation.get('chat_messages', [])
+
+            if messages:
+                for message in messages:
+                    # Get sender role (human/assistant)
+                    sender = message.get('sender', 'unknown')
+                    if sender == 'human':
+                        role_display = 'User'
+                    elif sender == 'assistant':
+                        role_display = 'Claude'
+                    else:
+                        role_display = sender.capitalize()
+
+                    # Get message text
+                    text = message.get('text', '').strip()
+
+                    # Skip empty messages
+                    if not text:
+                        continue
 
-# Prepare a list to hold all formatted conversations
-formatted_output = []
+                    # Format and add message to output
+                    formatted_output.append(f"**{role_display}:** {text}\n\n")
 
-for conversation in data:
-    # Extract title and format as heading
-    title = conversation.get('name', 'Untitled Conversation')
-    formatted_output.append(f"# {title}\n")
-    
-    # Extract creation date
-    created_at = conversation.get('created_at', '')
-    if created_at:
-        try:
-            # Convert ISO format date string to datetime object and format it
-            date_obj = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-            date_str = date_obj.strftime('%Y-%m-%d %H:%M:%S')
-            formatted_output.append(f"**Date:** {date_str}\n")
-        except (ValueError, TypeError):
-            pass  # Skip if date conversion fails
-    
-    # Process messages in the conversation
-    messages = conversation.get('chat_messages', [])
-    
-    if messages:
-        for message in messages:
-            # Get sender role (human/assistant)
-            sender = message.get('sender', 'unknown')
-            if sender == 'human':
-                role_display = 'User'
-            elif sender == 'assistant':
-                role_display = 'Claude'
-            else:
-                role_display = sender.capitalize()
-            
-            # Get message text
-            text = message.get('text', '').strip()
-            
-            # Skip empty messages
-            if not text:
-                continue
-                
-            # Format and add message to output
-            formatted_output.append(f"**{role_display}:** {text}\n\n")
-    
-    # Add a separator between conversations
-    formatted_output.append("\n---\n\n")
+            # Add a separator between conversations
+            formatted_output.append("\n---\n\n")
 
-# Write the formatted conversations to the output file
-with open(output_file, 'w', encoding='utf-8') as f:
-    f.write("".join(formatted_output))
+            out.write("".join(formatted_output))
+    os.replace(temp_file, output_file)
+except BaseException:
+    if os.path.exists(temp_file):
+        os.remove(temp_file)
+    raise
 
 print(f"✅ Successfully converted Claude conversations to Markdown: {output_file}")
\ No newline at end of file
@@ -8,9 +8,12 @@ light/dark mode support, and navigation features.
 """
 import os
 import sys
-import zipfile
+import logging
+import functools
+import contextlib
+import importlib.util
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 import argparse # Added for command-line arguments
 from pathlib import Path # Added for Path operations, useful for filenames
 
@@ -18,52 +21,128 @@ from pathlib import Path # Added for Path operations, useful for filenames
 script_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, script_dir)
 
+from config import Config, default_cache_dir
+from corpus.cache import CorpusCache
 from parsers.anthropic_parser import AnthropicParser
 from parsers.openai_parser import OpenAIParser
 from parsers.base_parser import Conversation
 from generators.html_generator import HTMLGenerator
 from generators.index_generator import IndexGenerator
 from generators.asset_manager import AssetManager
-from generators.gif_generator import AnimatedGifGenerator # Added for GIF generation
-import pdfkit # Added for PDF generation
-import imgkit # Added for PNG/SVG generation
+from generators.precompressor import Precompressor
+from generators.template_env import COMPILED_TEMPLATES_DIRNAME
+from instrumentation import RunReport
+from profiling import Profiler, add_profile_arguments
+
+logger = logging.getLogger(__name__)
+
+# Optional export backends, imported only when their format is requested
+# (pdfkit, imgkit and PIL otherwise load on every start-up)
+EXPORT_BACKENDS = {
+    'pdf': ['pdfkit'],
+    'png': ['imgkit'],
+    'svg': ['imgkit'],
+    'gif': ['imgkit', 'PIL'],
+    'related': ['numpy'],
+}
+
+# Stages of a conversion, as named in run reports and by --profile-stages
+STAGES = ('parse', 'dedup', 'related', 'render', 'index', 'assets', 'pdf', 'png', 'svg', 'zip', 'precompress', 'gif')
 
 
 class ChatArchiveConverter:
     """Main converter class that orchestrates the conversion process."""
     
-    def __init__(self):
-        """Initialize the converter with default paths."""
+    def __init__(self, config: Optional[Config] = None):
+        """
+        Initialize the converter with default paths.
+        
+        Args:
+            config: Configuration to use (default: from environment variables)
+        """
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
         self.project_root = os.path.dirname(self.script_dir)
+        self.config = config or Config.from_env(Path(self.project_root))
         
         # Input paths
-        self.data_dir = os.path.join(self.project_root, 'data')
-        self.raw_data_dir = os.path.join(self.data_dir, 'raw')
+        self.data_dir = str(self.config.data_dir)
+        self.raw_data_dir = str(self.config.raw_data_dir)
         
         # Output paths
-        self.html_output_dir = os.path.join(self.data_dir, 'html')
+        self.html_output_dir = str(self.config.html_output_dir)
+        self.cache_dir = str(self.config.cache_dir or default_cache_dir())
         
         # Template and asset paths
         self.templates_dir = os.path.join(self.script_dir, 'templates')
-        print(f"[DEBUG] Absolute path for self.script_dir: {os.path.abspath(self.script_dir)}")
-        print(f"[DEBUG] Calculated self.templates_dir: {self.templates_dir}")
-        print(f"[DEBUG] Absolute path for self.templates_dir: {os.path.abspath(self.templates_dir)}")
-        try:
-            print(f"[DEBUG] Contents of self.templates_dir according to os.listdir: {os.listdir(self.templates_dir)}")
-        except FileNotFoundError:
-            print(f"[DEBUG] Error: self.templates_dir ({self.templates_dir}) not found by os.listdir.")
-        except Exception as e_listdir:
-            print(f"[DEBUG] Error listing contents of self.templates_dir ({self.templates_dir}): {e_listdir}")
+        logger.debug("Templates directory: %s", os.path.abspath(self.templates_dir))
+        if not os.path.isdir(self.templates_dir):
+            logger.debug("Templates directory %s does not exist", self.templates_dir)
         self.assets_dir = os.path.join(self.script_dir, 'assets')
+        # Precompiled templates shipped with packaged builds (see scripts/build.py)
+        self.compiled_templates_dir = os.path.join(self.script_dir, COMPILED_TEMPLATES_DIRNAME)
         
         # Initialize components
         self.anthropic_parser = AnthropicParser()
         self.openai_parser = OpenAIParser()
-        self.html_generator = HTMLGenerator(self.templates_dir, self.assets_dir)
-        self.index_generator = IndexGenerator(self.templates_dir)
-        self.asset_manager = AssetManager(self.assets_dir)
-        self.gif_generator = AnimatedGifGenerator(assets_dir=self.assets_dir) # Initialized GIF generator
+        # Built once per run and linked into each export from the shared store
+        self.asset_manager = AssetManager(self.assets_dir, store_dir=os.path.join(self.cache_dir, 'assets'))
+        asset_names = self.asset_manager.asset_names()
+        self.html_generator = HTMLGenerator(
+            self.templates_dir,
+            self.assets_dir,
+            cache_dir=self.cache_dir,
+            compiled_templates_dir=self.compiled_templates_dir,
+            stream_threshold=self.config.stream_threshold_messages,
+            segment_size=self.config.segment_size,
+            minify_html=self.config.minify_html,
+            workers=self.config.workers,
+            memory_budget_mb=self.config.memory_budget_mb,
+            asset_names=asset_names
+        )
+        self.index_generator = IndexGenerator(
+            self.templates_dir,
+            cache_dir=self.cache_dir,
+            compiled_templates_dir=self.compiled_templates_dir,
+            minify_html=self.config.minify_html,
+            asset_names=asset_names
+        )
+        self.precompressor = Precompressor(cache_dir=self.cache_dir, workers=self.config.workers)
+        self.corpus_cache = CorpusCache(self.cache_dir, enabled=self.config.corpus_cache)
+        self.report = RunReport('convert')
+        self.profiler = Profiler()
+        self._gif_generator = None
+
+    @property
+    def gif_generator(self):
+        """GIF generator, created on first use."""
+        if self._gif_generator is None:
+            from generators.gif_generator import AnimatedGifGenerator
+            self._gif_generator = AnimatedGifGenerator(assets_dir=self.assets_dir)
+        return self._gif_generator
+
+    def check_export_backends(self, args) -> bool:
+        """
+        Check that the packages needed by the requested export formats exist.
+
+        Runs before any conversion work so a missing package fails fast,
+        without importing the (slow to load) backends themselves.
+
+        Args:
+            args: Parsed command-line arguments
+
+        Returns:
+            True if every requested format can be produced, False otherwise
+        """
+        missing = set()
+        for fmt, modules in EXPORT_BACKENDS.items():
+            if getattr(args, fmt, False):
+                missing.update(m for m in modules if importlib.util.find_spec(m) is None)
+
+        if missing:
+            print(f"❌ Required packages are missing: {', '.join(sorted(missing))}")
+            print("Install them with: pip install -r requirements.txt")
+            return False
+        return True
     
     def find_input_files(self) -> Dict[str, str]:
         """
@@ -117,19 +196,66 @@ class ChatArchiveConverter:
         # Parse Anthropic conversations
         if 'anthropic' in input_files:
             print(f"Parsing Anthropic conversations from {input_files['anthropic']}...")
-            conversations = self.anthropic_parser.parse_file(input_files['anthropic'])
+            conversations = self.corpus_cache.load(
+                self.anthropic_parser, input_files['anthropic'], self.config.max_file_size_mb
+            )
             all_conversations['anthropic'] = conversations
             print(f"Found {len(conversations)} Anthropic conversations")
         
         # Parse OpenAI conversations
         if 'openai' in input_files:
             print(f"Parsing OpenAI conversations from {input_files['openai']}...")
-            conversations = self.openai_parser.parse_file(input_files['openai'])
+            conversations = self.corpus_cache.load(
+                self.openai_parser, input_files['openai'], self.config.max_file_size_mb
+            )
             all_conversations['openai'] = conversations
             print(f"Found {len(conversations)} OpenAI conversations")
         
         return all_conversations
     
+    def find_export_files(self) -> Dict[str, List[str]]:
+        """
+        Find every export in the raw data directory and its subdirectories.
+        
+        Returns:
+            Dictionary mapping source names to lists of file paths
+        """
+        from corpus.merge import find_exports
+        
+        return find_exports(self.raw_data_dir)
+    
+    def merge_exports(self, export_files: Dict[str, List[str]]) -> Dict[str, List[Conversation]]:
+        """
+        Merge several exports per source, keeping the newest version of each conversation.
+        
+        Args:
+            export_files: Dictionary mapping source names to export paths
+            
+        Returns:
+            Dictionary mapping source names to conversation lists
+        """
+        from corpus.merge import ExportMerger
+        
+        parsers = {'anthropic': self.anthropic_parser, 'openai': self.openai_parser}
+        display_names = {'anthropic': 'Anthropic', 'openai': 'OpenAI'}
+        all_conversations = {}
+        
+        for source, paths in export_files.items():
+            parser = parsers[source]
+            print(f"Merging {len(paths)} {display_names[source]} exports...")
+            merger = ExportMerger(
+                parser,
+                functools.partial(self.corpus_cache.load, parser, max_file_size_mb=self.config.max_file_size_mb)
+            )
+            conversations = list(merger.merge(paths))
+            all_conversations[source] = conversations
+            self.report.count(f'{source}_exports', merger.stats['exports'])
+            self.report.count(f'{source}_versions_replaced', merger.stats['replaced'])
+            print(f"Found {len(conversations)} {display_names[source]} conversations "
+                  f"in {merger.stats['versions']} versions")
+        
+        return all_conversations
+    
     def create_output_directory(self) -> str:
         """
         Create timestamped output directory.
@@ -142,10 +268,93 @@ class ChatArchiveConverter:
         os.makedirs(output_dir, exist_ok=True)
         return output_dir
     
+    def deduplicate(
+        self,
+        conversations_by_source: Dict[str, List[Conversation]],
+        report_path: Optional[str] = None
+    ) -> Dict[str, List[Conversation]]:
+        """
+        Collapse repeated and near-duplicate conversations.
+        
+        Args:
+            conversations_by_source: Dictionary mapping source names to conversation lists
+            report_path: Where to write the report of collapsed conversations
+            
+        Returns:
+            The same mapping with only the most complete version of each conversation
+        """
+        from corpus.dedup import Deduplicator
+        
+        print("Removing duplicate conversations...")
+        deduplicator = Deduplicator()
+        kept = deduplicator.deduplicate(
+            [conv for convs in conversations_by_source.values() for conv in convs]
+        )
+        deduplicated = {source: [] for source in conversations_by_source}
+        for conv in kept:
+            deduplicated[conv.source].append(conv)
+        
+        for name in ('same_id', 'exact', 'near'):
+            self.report.count(f'dedup_{name}', deduplicator.stats[name])
+        removed = deduplicator.stats['conversations'] - deduplicator.stats['kept']
+        print(f"Collapsed {removed} duplicates ({deduplicator.stats['same_id']} repeated IDs, "
+              f"{deduplicator.stats['exact']} exact, {deduplicator.stats['near']} near-duplicates)")
+        if report_path:
+            os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+            deduplicator.write_report(report_path)
+            print(f"Deduplication report written to {report_path}")
+        return deduplicated
+    
+    def find_related(self, conversations_by_source: Dict[str, List[Conversation]]) -> Dict[str, Dict[str, List[Dict[str, str]]]]:
+        """
+        Find the most similar conversations of every conversation.
+        
+        The similarity index is kept in the cache directory, so later runs
+        only compute rows for new and changed conversations.
+        
+        Args:
+            conversations_by_source: Dictionary mapping source names to conversation lists
+            
+        Returns:
+            Related conversations info (filename, title) by source and conversation ID
+        """
+        # Imported here: NumPy is only needed with --related
+        from corpus.related import RelatedIndex, conversation_key
+        
+        print("Finding related conversations...")
+        index = RelatedIndex(
+            os.path.join(self.cache_dir, 'related'),
+            memory_budget_mb=self.config.memory_budget_mb
+        )
+        all_conversations = [conv for convs in conversations_by_source.values() for conv in convs]
+        index.update(all_conversations)
+        
+        pages = {
+            conversation_key(conv): (conv, self.html_generator.page_filename(conv))
+            for conv in all_conversations
+        }
+        related = {}
+        for conv in all_conversations:
+            links = []
+            for key, _ in index.related(conversation_key(conv)):
+                other, filename = pages[key]
+                # Pages of one source share a directory
+                if other.source != conv.source:
+                    filename = f"../../{other.source}/conversations/{filename}"
+                links.append({'filename': filename, 'title': other.title})
+            related.setdefault(conv.source, {})[conv.id] = links
+        
+        for name, value in index.stats.items():
+            self.report.count(f'related_{name}', value)
+        print(f"Related conversations: {index.stats['vectorized']} vectorized, "
+              f"{index.stats['rows_computed']} neighbour rows computed")
+        return related
+    
     def generate_html_files(
         self,
         conversations_by_source: Dict[str, List[Conversation]],
-        output_dir: str
+        output_dir: str,
+        related: Optional[Dict[str, Dict[str, List[Dict[str, str]]]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Generate HTML files for all conversations.
@@ -153,6 +362,7 @@ class ChatArchiveConverter:
         Args:
             conversations_by_source: Dictionary mapping source names to conversation lists
             output_dir: Output directory path
+            related: Related conversations by source and conversation ID (see ``find_related``)
             
         Returns:
             List of all conversation metadata
@@ -172,9 +382,10 @@ class ChatArchiveConverter:
                 conversations=conversations,
                 output_dir=output_dir,
                 source_subdir=source_name,
-                assets_relative_path="../assets",
+                assets_relative_path="../../assets",
                 index_relative_path="../../index.html",
-                source_index_relative_path="../index.html"
+                source_index_relative_path="../index.html",
+                related=(related or {}).get(source_name)
             )
             
             all_conversation_metadata.extend(metadata)
@@ -189,6 +400,11 @@ class ChatArchiveConverter:
                 main_index_path="../index.html"
             )
             
+            for conversation, seconds in self.html_generator.render_times:
+                self.report.observe_conversation(
+                    source_name, conversation.id, conversation.title, len(conversation.messages), seconds
+                )
+            
             print(f"Generated {len(metadata)} HTML files for {source_name}")
         
         return all_conversation_metadata
@@ -222,7 +438,7 @@ class ChatArchiveConverter:
     
     def setup_assets(self, output_dir: str) -> bool:
         """
-        Copy assets and create additional files.
+        Install the built assets and write their cache headers.
         
         Args:
             output_dir: Output directory path
@@ -237,6 +453,15 @@ class ChatArchiveConverter:
             destination_dir=assets_dir,
             site_name="Chat Archive"
         )
+        for method, count in self.asset_manager.install_counts.items():
+            self.report.count(f'assets_{method}', count)
+        
+        # Fingerprinted assets never change under their name
+        try:
+            self.asset_manager.write_cache_headers(output_dir, site_name="Chat Archive")
+        except OSError as e:
+            print(f"Error writing cache headers: {e}")
+            success = False
         
         if success:
             print("Assets setup complete")
@@ -257,6 +482,8 @@ class ChatArchiveConverter:
         """
         print("Creating zip package...")
         
+        import zipfile
+        
         zip_path = f"{output_dir}.zip"
         
         with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
@@ -269,182 +496,324 @@ class ChatArchiveConverter:
         print(f"Created zip package: {zip_path}")
         return zip_path
     
+    def precompress_output(self, output_dir: str) -> Dict[str, int]:
+        """
+        Write .gz/.br siblings for HTML, CSS, JS and JSON files.
+        
+        Args:
+            output_dir: Output directory path
+            
+        Returns:
+            Counts of compressed, reused and unchanged files
+        """
+        print("Precompressing output files...")
+        
+        stats = self.precompressor.compress_tree(output_dir)
+        
+        print(f"Precompressed {stats['compressed']} files "
+              f"({stats['reused']} reused from cache, {stats['unchanged']} unchanged)")
+        return stats
+    
     def convert(self, args) -> bool: # Added args parameter
         """
-        Run the complete conversion process.
+        Run the complete conversion process and write the run report.
         
+        Args:
+            args: Parsed command-line arguments
+            
         Returns:
             True if successful, False otherwise
         """
+        self.report = RunReport(
+            'convert',
+            slow_threshold_ms=getattr(args, 'slow_log_ms', None),
+            trace_memory=getattr(args, 'trace_memory', False)
+        )
+        self.report.info.update({
+            'workers': self.config.workers,
+            'minify_html': self.config.minify_html,
+            'segment_size': self.config.segment_size,
+        })
+        success = False
+        try:
+            success = self._run_conversion(args)
+        finally:
+            self.report.finish(success)
+            self.write_run_report(args)
+        return success
+    
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measure a conversion stage for the run report and the profiler."""
+        with self.report.stage(name), self.profiler.stage(name):
+            yield
+    
+    def write_run_report(self, args) -> None:
+        """
+        Write the run report where the command line asked for it.
+        
+        Args:
+            args: Parsed command-line arguments (``report``, ``prometheus``)
+        """
+        report_path = getattr(args, 'report', None)
+        prometheus_path = getattr(args, 'prometheus', None)
+        if not (report_path or prometheus_path or self.report.slow_log):
+            return
+        
+        print("=" * 50)
+        print("⏱️ Run report:")
+        for line in self.report.summary_lines():
+            print(f"  {line}")
+        try:
+            if report_path:
+                self.report.write_json(report_path)
+                print(f"  Report written to {report_path}")
+            if prometheus_path:
+                self.report.write_prometheus(prometheus_path)
+                print(f"  Metrics written to {prometheus_path}")
+        except OSError as e:
+            print(f"❌ Could not write run report: {e}")
+    
+    def _run_conversion(self, args) -> bool:
+        """Conversion steps of ``convert``, each measured as a report stage."""
         print("🚀 Starting HTML Chat Archive Converter...")
         print("=" * 50)
         
         try:
+            if not self.check_export_backends(args):
+                return False
+            
             # Find input files
-            input_files = self.find_input_files()
+            merge = getattr(args, 'merge_exports', False)
+            input_files = self.find_export_files() if merge else self.find_input_files()
             if not input_files:
                 print("❌ No input files found!")
                 print(f"Please place your JSON files in: {self.raw_data_dir}")
-                print("Expected filenames:")
-                print("  - claude_conversations.json (or anthropic_conversations.json)")
-                print("  - openai_conversations.json (or chatgpt_conversations.json)")
+                if merge:
+                    print("Any Anthropic or OpenAI *.json export in it or its subdirectories is read")
+                else:
+                    print("Expected filenames:")
+                    print("  - claude_conversations.json (or anthropic_conversations.json)")
+                    print("  - openai_conversations.json (or chatgpt_conversations.json)")
                 return False
             
             print(f"📁 Found input files: {list(input_files.keys())}")
             
             # Parse conversations
-            conversations_by_source = self.parse_conversations(input_files)
+            with self.stage('parse'):
+                if merge:
+                    conversations_by_source = self.merge_exports(input_files)
+                else:
+                    conversations_by_source = self.parse_conversations(input_files)
             if not conversations_by_source:
                 print("❌ No conversations found in input files!")
                 return False
             
+            if getattr(args, 'dedup', False):
+                with self.stage('dedup'):
+                    conversations_by_source = self.deduplicate(
+                        conversations_by_source,
+                        args.dedup_report or os.path.join(self.data_dir, 'dedup_report.json')
+                    )
+            
             total_conversations = sum(len(convs) for convs in conversations_by_source.values())
+            self.report.count('conversations', total_conversations)
+            self.report.count('messages', sum(
+                len(conv.messages) for convs in conversations_by_source.values() for conv in convs
+            ))
+            self.report.count('input_bytes', sum(
+                os.path.getsize(path)
+                for paths in input_files.values()
+                for path in (paths if isinstance(paths, list) else [paths])
+            ))
+            self.report.count('corpus_cache_hits', self.corpus_cache.hits)
+            self.report.count('corpus_cache_misses', self.corpus_cache.misses)
             print(f"📊 Total conversations to convert: {total_conversations}")
             
             # Create output directory
             output_dir = self.create_output_directory()
             print(f"📂 Output directory: {output_dir}")
             
+            # Find related conversations if requested
+            related = None
+            if getattr(args, 'related', False):
+                with self.stage('related'):
+                    related = self.find_related(conversations_by_source)
+            
             # Generate HTML files
-            all_metadata = self.generate_html_files(conversations_by_source, output_dir)
+            with self.stage('render'):
+                all_metadata = self.generate_html_files(conversations_by_source, output_dir, related)
+            self.report.count('pages', len(all_metadata))
+            self.report.count('pages_failed', total_conversations - len(all_metadata))
             if not all_metadata:
                 print("❌ Failed to generate HTML files!")
                 return False
             
             # Generate main index
-            if not self.generate_main_index(all_metadata, output_dir):
+            with self.stage('index'):
+                index_ok = self.generate_main_index(all_metadata, output_dir)
+            if not index_ok:
                 print("❌ Failed to generate main index!")
                 return False
             
             # Setup assets
-            if not self.setup_assets(output_dir):
+            with self.stage('assets'):
+                assets_ok = self.setup_assets(output_dir)
+            if not assets_ok:
                 print("❌ Failed to setup assets!")
                 return False
 
             # Generate PDFs if requested
             if args.pdf:
-                print("=" * 50)
-                print("📄 Generating PDFs...")
-                pdf_export_dir = os.path.join(output_dir, 'pdfs')
-                os.makedirs(pdf_export_dir, exist_ok=True)
-
-                for item in all_metadata:
-                    try:
-                        html_file_path = os.path.join(output_dir, item['filename']) # item['filename'] is relative to output_dir
-
-                        # Determine source subdirectory for PDF from the HTML path
-                        # item['filename'] is like 'openai/conversations/file.html' or 'anthropic/conversations/file.html'
-                        path_parts = Path(item['filename']).parts
-                        source_subdir_for_pdf = path_parts[0] # e.g., 'openai' or 'anthropic'
-
-                        pdf_source_dir = os.path.join(pdf_export_dir, source_subdir_for_pdf)
-                        os.makedirs(pdf_source_dir, exist_ok=True)
-
-                        pdf_filename_base = Path(item['filename']).stem
-                        pdf_output_path = os.path.join(pdf_source_dir, f"{pdf_filename_base}.pdf")
-
-                        print(f"  Generating PDF for: {item['title']} ({item['source']}) -> {pdf_output_path}")
-                        pdfkit.from_file(html_file_path, pdf_output_path, options={'quiet': ''})
-                        print(f"    Successfully generated PDF: {pdf_output_path}")
-                    except Exception as e_pdf:
-                        print(f"    Error generating PDF for {item.get('title', 'Unknown Title')}: {e_pdf}")
-                print("PDF generation process complete.")
+                with self.stage('pdf'):
+                    print("=" * 50)
+                    print("📄 Generating PDFs...")
+                    import pdfkit
+                    pdf_export_dir = os.path.join(output_dir, 'pdfs')
+                    os.makedirs(pdf_export_dir, exist_ok=True)
+
+                    for item in all_metadata:
+                        try:
+                            html_file_path = os.path.join(output_dir, item['filename']) # item['filename'] is relative to output_dir
+
+                            # Determine source subdirectory for PDF from the HTML path
+                            # item['filename'] is like 'openai/conversations/file.html' or 'anthropic/conversations/file.html'
+                            path_parts = Path(item['filename']).parts
+                            source_subdir_for_pdf = path_parts[0] # e.g., 'openai' or 'anthropic'
+
+                            pdf_source_dir = os.path.join(pdf_export_dir, source_subdir_for_pdf)
+                            os.makedirs(pdf_source_dir, exist_ok=True)
+
+                            pdf_filename_base = Path(item['filename']).stem
+                            pdf_output_path = os.path.join(pdf_source_dir, f"{pdf_filename_base}.pdf")
+
+                            print(f"  Generating PDF for: {item['title']} ({item['source']}) -> {pdf_output_path}")
+                            pdfkit.from_file(html_file_path, pdf_output_path, options={'quiet': ''})
+                            print(f"    Successfully generated PDF: {pdf_output_path}")
+                            self.report.count('pdf_files')
+                        except Exception as e_pdf:
+                            print(f"    Error generating PDF for {item.get('title', 'Unknown Title')}: {e_pdf}")
+                            self.report.count('pdf_failed')
+                    print("PDF generation process complete.")
 
             # Generate PNGs if requested
             if args.png:
-                print("=" * 50)
-                print("🖼️ Generating PNGs...")
-                png_export_dir = os.path.join(output_dir, 'pngs')
-                os.makedirs(png_export_dir, exist_ok=True)
-
-                for item in all_metadata:
-                    try:
-                        html_file_path = os.path.join(output_dir, item['filename'])
-                        path_parts = Path(item['filename']).parts
-                        source_subdir_for_png = path_parts[0]
-
-                        png_source_dir = os.path.join(png_export_dir, source_subdir_for_png)
-                        os.makedirs(png_source_dir, exist_ok=True)
-
-                        png_filename_base = Path(item['filename']).stem
-                        png_output_path = os.path.join(png_source_dir, f"{png_filename_base}.png")
-
-                        print(f"  Generating PNG for: {item['title']} ({item['source']}) -> {png_output_path}")
-                        imgkit.from_file(html_file_path, png_output_path, options={'format': 'png', 'quiet': ''})
-                        print(f"    Successfully generated PNG: {png_output_path}")
-                    except Exception as e_png:
-                        print(f"    Error generating PNG for {item.get('title', 'Unknown Title')}: {e_png}")
-                print("PNG generation process complete.")
+                with self.stage('png'):
+                    print("=" * 50)
+                    print("🖼️ Generating PNGs...")
+                    import imgkit
+                    png_export_dir = os.path.join(output_dir, 'pngs')
+                    os.makedirs(png_export_dir, exist_ok=True)
+
+                    for item in all_metadata:
+                        try:
+                            html_file_path = os.path.join(output_dir, item['filename'])
+                            path_parts = Path(item['filename']).parts
+                            source_subdir_for_png = path_parts[0]
+
+                            png_source_dir = os.path.join(png_export_dir, source_subdir_for_png)
+                            os.makedirs(png_source_dir, exist_ok=True)
+
+                            png_filename_base = Path(item['filename']).stem
+                            png_output_path = os.path.join(png_source_dir, f"{png_filename_base}.png")
+
+                            print(f"  Generating PNG for: {item['title']} ({item['source']}) -> {png_output_path}")
+                            imgkit.from_file(html_file_path, png_output_path, options={'format': 'png', 'quiet': ''})
+                            print(f"    Successfully generated PNG: {png_output_path}")
+                            self.report.count('png_files')
+                        except Exception as e_png:
+                            print(f"    Error generating PNG for {item.get('title', 'Unknown Title')}: {e_png}")
+                            self.report.count('png_failed')
+                    print("PNG generation process complete.")
 
             # Generate SVGs if requested
             if args.svg:
-                print("=" * 50)
-                print("🖼️ Generating SVGs...")
-                svg_export_dir = os.path.join(output_dir, 'svgs')
-                os.makedirs(svg_export_dir, exist_ok=True)
-
-                for item in all_metadata:
-                    try:
-                        html_file_path = os.path.join(output_dir, item['filename'])
-                        path_parts = Path(item['filename']).parts
-                        source_subdir_for_svg = path_parts[0]
-
-                        svg_source_dir = os.path.join(svg_export_dir, source_subdir_for_svg)
-                        os.makedirs(svg_source_dir, exist_ok=True)
-
-                        svg_filename_base = Path(item['filename']).stem
-                        svg_output_path = os.path.join(svg_source_dir, f"{svg_filename_base}.svg")
-
-                        print(f"  Generating SVG for: {item['title']} ({item['source']}) -> {svg_output_path}")
-                        # For SVG, wkhtmltoimage might produce better results if direct SVG output is supported.
-                        # imgkit options for SVG might be limited or behave like raster-to-vector.
-                        # Using format: 'svg' with imgkit relies on wkhtmltoimage's capabilities.
-                        imgkit.from_file(html_file_path, svg_output_path, options={'format': 'svg', 'quiet': ''})
-                        print(f"    Successfully generated SVG: {svg_output_path}")
-                    except Exception as e_svg:
-                        print(f"    Error generating SVG for {item.get('title', 'Unknown Title')}: {e_svg}")
-                print("SVG generation process complete.")
+                with self.stage('svg'):
+                    print("=" * 50)
+                    print("🖼️ Generating SVGs...")
+                    import imgkit
+                    svg_export_dir = os.path.join(output_dir, 'svgs')
+                    os.makedirs(svg_export_dir, exist_ok=True)
+
+                    for item in all_metadata:
+                        try:
+                            html_file_path = os.path.join(output_dir, item['filename'])
+                            path_parts = Path(item['filename']).parts
+                            source_subdir_for_svg = path_parts[0]
+
+                            svg_source_dir = os.path.join(svg_export_dir, source_subdir_for_svg)
+                            os.makedirs(svg_source_dir, exist_ok=True)
+
+                            svg_filename_base = Path(item['filename']).stem
+                            svg_output_path = os.path.join(svg_source_dir, f"{svg_filename_base}.svg")
+
+                            print(f"  Generating SVG for: {item['title']} ({item['source']}) -> {svg_output_path}")
+                            # For SVG, wkhtmltoimage might produce better results if direct SVG output is supported.
+                            # imgkit options for SVG might be limited or behave like raster-to-vector.
+                            # Using format: 'svg' with imgkit relies on wkhtmltoimage's capabilities.
+                            imgkit.from_file(html_file_path, svg_output_path, options={'format': 'svg', 'quiet': ''})
+                            print(f"    Successfully generated SVG: {svg_output_path}")
+                            self.report.count('svg_files')
+                        except Exception as e_svg:
+                            print(f"    Error generating SVG for {item.get('title', 'Unknown Title')}: {e_svg}")
+                            self.report.count('svg_failed')
+                    print("SVG generation process complete.")
             
             # Create zip package
-            zip_path = self.create_zip_package(output_dir)
+            self.report.count('output_bytes', _tree_bytes(output_dir))
+            with self.stage('zip'):
+                zip_path = self.create_zip_package(output_dir)
+            self.report.count('zip_bytes', os.path.getsize(zip_path))
+
+            # Precompressed variants are for serving the tree, not for the zip
+            if getattr(args, 'precompress', False):
+                print("=" * 50)
+                with self.stage('precompress'):
+                    precompress_stats = self.precompress_output(output_dir)
+                for status, count in precompress_stats.items():
+                    self.report.count(f'precompress_{status}', count)
 
             # Generate GIFs if requested
             if args.gif:
-                print("=" * 50)
-                print("🖼️ Generating GIFs...")
-                # Overall directory for all GIFs from this export run
-                gif_export_run_dir = os.path.join(output_dir, 'gifs')
-                os.makedirs(gif_export_run_dir, exist_ok=True)
-
-                for source_name, conversations in conversations_by_source.items():
-                    if not conversations:
-                        continue
-
-                    # Source-specific subdirectory for GIFs
-                    source_gif_output_dir = os.path.join(gif_export_run_dir, source_name)
-                    os.makedirs(source_gif_output_dir, exist_ok=True)
-
-                    print(f"Generating GIFs for {len(conversations)} {source_name} conversations...")
-                    for conversation in conversations:
-                        # Find corresponding metadata to get the HTML filename base
-                        conv_metadata = next((m for m in all_metadata if m['id'] == conversation.id and m['source'] == source_name), None)
-
-                        if conv_metadata and 'filename' in conv_metadata:
-                            gif_filename_base = Path(conv_metadata['filename']).stem
-                            gif_output_path = os.path.join(source_gif_output_dir, f"{gif_filename_base}.gif")
-
-                            print(f"  Generating GIF for: {conversation.title} -> {gif_output_path}")
-                            try:
-                                success_gif = self.gif_generator.generate_gif(conversation, str(gif_output_path))
-                                if success_gif:
-                                    print(f"    Successfully generated GIF: {gif_output_path}")
-                                else:
-                                    print(f"    Failed to generate GIF for: {conversation.title}")
-                            except Exception as e_gif:
-                                print(f"    Error generating GIF for {conversation.title}: {e_gif}")
-                        else:
-                            print(f"  Skipping GIF for conversation ID {conversation.id} (source: {source_name}) due to missing metadata or filename.")
-                print("GIF generation process complete.")
+                with self.stage('gif'):
+                    print("=" * 50)
+                    print("🖼️ Generating GIFs...")
+                    # Overall directory for all GIFs from this export run
+                    gif_export_run_dir = os.path.join(output_dir, 'gifs')
+                    os.makedirs(gif_export_run_dir, exist_ok=True)
+
+                    for source_name, conversations in conversations_by_source.items():
+                        if not conversations:
+                            continue
+
+                        # Source-specific subdirectory for GIFs
+                        source_gif_output_dir = os.path.join(gif_export_run_dir, source_name)
+                        os.makedirs(source_gif_output_dir, exist_ok=True)
+
+                        print(f"Generating GIFs for {len(conversations)} {source_name} conversations...")
+                        for conversation in conversations:
+                            # Find corresponding metadata to get the HTML filename base
+                            conv_metadata = next((m for m in all_metadata if m['id'] == conversation.id and m['source'] == source_name), None)
+
+                            if conv_metadata and 'filename' in conv_metadata:
+                                gif_filename_base = Path(conv_metadata['filename']).stem
+                                gif_output_path = os.path.join(source_gif_output_dir, f"{gif_filename_base}.gif")
+
+                                print(f"  Generating GIF for: {conversation.title} -> {gif_output_path}")
+                                try:
+                                    success_gif = self.gif_generator.generate_gif(conversation, str(gif_output_path))
+                                    if success_gif:
+                                        print(f"    Successfully generated GIF: {gif_output_path}")
+                                        self.report.count('gif_files')
+                                    else:
+                                        print(f"    Failed to generate GIF for: {conversation.title}")
+                                        self.report.count('gif_failed')
+                                except Exception as e_gif:
+                                    print(f"    Error generating GIF for {conversation.title}: {e_gif}")
+                                    self.report.count('gif_failed')
+                            else:
+                                print(f"  Skipping GIF for conversation ID {conversation.id} (source: {source_name}) due to missing metadata or filename.")
+                    print("GIF generation process complete.")
             
             print("=" * 50)
             print("✅ Conversion completed successfully!")
@@ -470,6 +839,14 @@ class ChatArchiveConverter:
             return False
 
 
+def _tree_bytes(root_dir: str) -> int:
+    """Total size of the files under a directory."""
+    total = 0
+    for root, _, files in os.walk(root_dir):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
 def print_version_banner():
     """
     Print version and copyright banner as FIRST step of initialization.
@@ -512,13 +889,36 @@ def main():
     parser.add_argument('--pdf', action='store_true', help='Generate PDF for each conversation')
     parser.add_argument('--png', action='store_true', help='Generate PNG image for each conversation')
     parser.add_argument('--svg', action='store_true', help='Generate SVG image for each conversation')
-    # One could add --input-dir and --output-dir arguments here if needed
-    # parser.add_argument('--input-dir', default='data/raw', help='Directory containing raw chat files.')
-    # parser.add_argument('--output-dir', default='data/html', help='Base directory for HTML output.')
+    parser.add_argument('--merge-exports', action='store_true', help='Read every export in the raw data directory and its subdirectories, keeping the newest version of each conversation')
+    parser.add_argument('--dedup', action='store_true', help='Drop repeated and near-duplicate conversations, keeping the most complete version')
+    parser.add_argument('--dedup-report', metavar='FILE', help='Report of collapsed conversations for --dedup (default: data/dedup_report.json)')
+    parser.add_argument('--related', action='store_true', help='List related conversations on each page (requires NumPy)')
+    parser.add_argument('--precompress', action='store_true', help='Write .gz/.br variants of HTML, CSS, JS and JSON files for static hosting')
+    parser.add_argument('--minify-html', action='store_true', help='Minify generated HTML pages (same as CHAT_MINIFY_HTML=true)')
+    parser.add_argument('--input-dir', help='Directory containing raw chat files (same as CHAT_RAW_DIR)')
+    parser.add_argument('--output-dir', help='Base directory for HTML output (same as CHAT_OUTPUT_DIR)')
+    parser.add_argument('--workers', type=int, help='Worker processes for rendering, 0 = all cores (same as CHAT_WORKERS)')
+    parser.add_argument('--report', metavar='FILE', help='Write a JSON run report (stage timings, memory, counters)')
+    parser.add_argument('--prometheus', metavar='FILE', help='Write run metrics as a Prometheus textfile (e.g. for node_exporter)')
+    parser.add_argument('--slow-log-ms', type=float, metavar='MS', help='Log conversations whose page took at least MS milliseconds to render')
+    parser.add_argument('--trace-memory', action='store_true', help='Record the peak Python heap of each stage (slower)')
+    add_profile_arguments(parser, STAGES)
     args = parser.parse_args()
 
-    converter = ChatArchiveConverter() # Potentially pass input/output dirs from args if added
-    success = converter.convert(args) # Pass args to convert method
+    config = Config.from_env(Path(__file__).resolve().parent.parent)
+    if args.minify_html:
+        config.minify_html = True
+    if args.input_dir:
+        config.raw_data_dir = Path(args.input_dir)
+    if args.output_dir:
+        config.html_output_dir = Path(args.output_dir)
+    if args.workers is not None:
+        config.workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    converter = ChatArchiveConverter(config)
+    converter.profiler = Profiler.from_args(args, 'convert', str(config.data_dir / 'profiles'))
+    with converter.profiler:
+        success = converter.convert(args) # Pass args to convert method
     sys.exit(0 if success else 1)
 
 
@@ -0,0 +1,2 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""Parsed-corpus storage shared by the command line tools."""
@@ -0,0 +1,291 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Parse-once cache of conversations shared by all entry points.
+
+Parsing a large export with ``json.load`` and the source parser dominates the
+start of every run. The parsed ``Conversation`` objects are therefore pickled
+to ``<cache_dir>/corpus`` once, keyed by the input file's size, modification
+time and SHA-256 digest, and loaded from there until the export changes.
+
+A cache entry is trusted as long as size and mtime match. If only the mtime
+changed (the file was copied or touched), the digest decides, so re-copying
+an identical export never triggers a re-parse.
+"""
+import os
+import json
+import pickle
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from parsers.base_parser import BaseParser, Conversation, Message
+from corpus.columnar import META_FILENAME, ColumnarCorpus, write_columnar
+
+logger = logging.getLogger(__name__)
+
+# Bump when Conversation/Message or the parsers change what they produce
+CACHE_FORMAT_VERSION = 2
+
+DIGEST_CHUNK_SIZE = 1 << 20
+
+# Conversations are stored as plain tuples: unpickling them and calling the
+# dataclass constructors is ~40% faster than unpickling dataclass instances
+ConversationRow = Tuple[Any, ...]
+
+
+def file_digest(file_path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_conversation(conversation: Conversation) -> ConversationRow:
+    """Flatten a conversation into a tuple of builtins for pickling."""
+    return (
+        conversation.id,
+        conversation.title,
+        conversation.source,
+        conversation.created_at,
+        conversation.updated_at,
+        conversation.uuid,
+        [(m.role, m.content, m.timestamp, m.uuid) for m in conversation.messages],
+    )
+
+
+def decode_conversation(row: ConversationRow) -> Conversation:
+    """Rebuild a conversation from ``encode_conversation`` output."""
+    conv_id, title, source, created_at, updated_at, conv_uuid, messages = row
+    return Conversation(
+        id=conv_id,
+        title=title,
+        source=source,
+        created_at=created_at,
+        updated_at=updated_at,
+        messages=[Message(*message) for message in messages],
+        uuid=conv_uuid,
+    )
+
+
+class CorpusCache:
+    """Stores parsed conversations of each input file on disk."""
+
+    def __init__(self, cache_dir: Optional[str] = None, enabled: bool = True):
+        """
+        Initialize the corpus cache.
+
+        Args:
+            cache_dir: Cache root; entries live in ``<cache_dir>/corpus``
+            enabled: If False (or cache_dir is None), every load parses the file
+        """
+        self.cache_dir = os.path.join(str(cache_dir), 'corpus') if cache_dir else None
+        self.columnar_dir = os.path.join(str(cache_dir), 'columnar') if cache_dir else None
+        self.enabled = enabled and self.cache_dir is not None
+        # Loads served from the cache and loads that parsed the export
+        self.hits = 0
+        self.misses = 0
+
+    def load(
+        self,
+        parser: BaseParser,
+        file_path: str,
+        max_file_size_mb: Optional[int] = None
+    ) -> List[Conversation]:
+        """
+        Load the conversations of an export, parsing it only if it changed.
+
+        Args:
+            parser: Parser for the export's source format
+            file_path: Path to the raw JSON export
+            max_file_size_mb: Passed to ``BaseParser.load_file`` on a miss
+
+        Returns:
+            List of Conversation objects
+        """
+        if not self.enabled:
+            return parser.load_file(file_path, max_file_size_mb)
+
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            # Let the parser report the problem in its usual way
+            return parser.load_file(file_path, max_file_size_mb)
+
+        entry_path = self._entry_path(parser, file_path)
+        header = self._read_header(entry_path)
+        digest = None
+
+        if header and header['size'] == stat.st_size:
+            if header['mtime_ns'] != stat.st_mtime_ns:
+                digest = file_digest(file_path)
+            if digest is None or digest == header['digest']:
+                conversations = self._read_conversations(entry_path)
+                if conversations is not None:
+                    if digest is not None:
+                        # Same content under a new mtime: skip hashing next time
+                        header['mtime_ns'] = stat.st_mtime_ns
+                        self._write_entry(entry_path, header, conversations)
+                    logger.info("Loaded %d %s conversations from cache", len(conversations), parser.source_name)
+                    self.hits += 1
+                    return conversations
+
+        if digest is None:
+            digest = file_digest(file_path)
+
+        self.misses += 1
+        conversations = parser.load_file(file_path, max_file_size_mb)
+        if conversations:
+            header = {
+                'version': CACHE_FORMAT_VERSION,
+                'source': parser.source_name,
+                'path': os.path.abspath(file_path),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'digest': digest,
+            }
+            self._write_entry(entry_path, header, conversations)
+        return conversations
+
+    def load_columnar(
+        self,
+        parser: BaseParser,
+        file_path: str,
+        max_file_size_mb: Optional[int] = None
+    ) -> ColumnarCorpus:
+        """
+        Open the memory-mapped columnar store of an export.
+
+        The store is built from the cached conversations the first time and
+        rebuilt only when the export's content digest changes.
+
+        Args:
+            parser: Parser for the export's source format
+            file_path: Path to the raw JSON export
+            max_file_size_mb: Passed to ``BaseParser.load_file`` on a miss
+
+        Returns:
+            Open ColumnarCorpus (close it, or use it as a context manager)
+
+        Raises:
+            ValueError: If the cache is disabled
+        """
+        if not self.enabled:
+            raise ValueError("The columnar store requires the corpus cache to be enabled")
+
+        store_dir = os.path.join(
+            self.columnar_dir,
+            os.path.splitext(os.path.basename(self._entry_path(parser, file_path)))[0]
+        )
+        store_source = self._read_store_meta(store_dir).get('source') or {}
+
+        try:
+            stat = os.stat(file_path)
+            unchanged = (store_source.get('size'), store_source.get('mtime_ns')) == (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            unchanged = False
+
+        if unchanged:
+            try:
+                return ColumnarCorpus(store_dir)
+            except (OSError, ValueError) as e:
+                logger.warning("Rebuilding columnar store '%s': %s", store_dir, e)
+                store_source = {}
+
+        # Brings the parse cache up to date, which also records the digest
+        conversations = self.load(parser, file_path, max_file_size_mb)
+        header = self._read_header(self._entry_path(parser, file_path)) or {}
+        source_info = {
+            'path': os.path.abspath(file_path),
+            'size': header.get('size'),
+            'mtime_ns': header.get('mtime_ns'),
+            'digest': header.get('digest'),
+        }
+
+        if store_source.get('digest') and store_source.get('digest') == source_info['digest']:
+            # Same content under a new mtime: only the recorded source changes
+            meta = self._read_store_meta(store_dir)
+            meta['source'] = source_info
+            with open(os.path.join(store_dir, META_FILENAME), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        else:
+            os.makedirs(self.columnar_dir, exist_ok=True)
+            write_columnar(conversations, store_dir, source_info=source_info)
+
+        return ColumnarCorpus(store_dir)
+
+    def _read_store_meta(self, store_dir: str) -> Dict[str, Any]:
+        """Metadata of a columnar store, or an empty dict if there is none."""
+        try:
+            with open(os.path.join(store_dir, META_FILENAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _entry_path(self, parser: BaseParser, file_path: str) -> str:
+        """Cache entry for one input file of one source."""
+        path_hash = hashlib.sha256(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{parser.source_name}-{path_hash}.pickle")
+
+    def _read_header(self, entry_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Read the header of a cache entry.
+
+        The header is pickled separately in front of the conversations, so a
+        stale entry is rejected without unpickling its payload.
+
+        Returns:
+            Header dictionary, or None if missing, unreadable or outdated
+        """
+        try:
+            with open(entry_path, 'rb') as f:
+                header = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Ignoring unreadable corpus cache entry '%s': %s", entry_path, e)
+            return None
+
+        if not isinstance(header, dict) or header.get('version') != CACHE_FORMAT_VERSION:
+            return None
+        return header
+
+    def _read_conversations(self, entry_path: str) -> Optional[List[Conversation]]:
+        """Read the conversations of a cache entry, or None if unreadable."""
+        try:
+            with open(entry_path, 'rb') as f:
+                pickle.load(f)
+                rows = pickle.load(f)
+            return [decode_conversation(row) for row in rows]
+        except Exception as e:
+            logger.warning("Ignoring unreadable corpus cache entry '%s': %s", entry_path, e)
+            return None
+
+    def _write_entry(self, entry_path: str, header: Dict[str, Any], conversations: List[Conversation]) -> None:
+        """Atomically write a cache entry."""
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(
+                    [encode_conversation(c) for c in conversations],
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL
+                )
+            os.replace(temp_path, entry_path)
+        except (OSError, pickle.PicklingError) as e:
+            logger.warning("Could not write corpus cache entry '%s': %s", entry_path, e)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
@@ -0,0 +1,261 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Memory-mapped columnar store of a parsed corpus.
+
+A store is a directory of flat column files, one entry per message:
+
+    conv_index.u32     index of the message's conversation
+    role.u8            role code (see ``meta.json`` "roles")
+    timestamp.f64      seconds since 1970-01-01 (naive), NaN if unknown
+    text_offsets.u64   start of each message in text.bin, plus a final end offset
+    text.bin           UTF-8 message text, concatenated
+    meta.json          conversation metadata and per-conversation message ranges
+
+Readers map the files and view them through ``memoryview.cast``, so paging
+through a million messages costs neither a ``Message`` object nor a copy of
+its text per message.
+"""
+import os
+import sys
+import json
+import mmap
+import math
+import shutil
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from parsers.base_parser import Conversation, Message
+
+STORE_FORMAT_VERSION = 2
+
+META_FILENAME = 'meta.json'
+TEXT_FILENAME = 'text.bin'
+
+# Column file name -> array typecode
+COLUMNS = {
+    'conv_index.u32': 'I',
+    'role.u8': 'B',
+    'timestamp.f64': 'd',
+    'text_offsets.u64': 'Q',
+}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_seconds(value: Optional[datetime]) -> float:
+    """Naive datetime to seconds since the (naive) epoch, NaN for None."""
+    if value is None:
+        return math.nan
+    return (value - _EPOCH).total_seconds()
+
+
+def _from_seconds(value: float) -> Optional[datetime]:
+    """Inverse of ``_to_seconds``."""
+    if math.isnan(value):
+        return None
+    return _EPOCH + timedelta(seconds=value)
+
+
+class MessageView(NamedTuple):
+    """A message of a columnar store; ``text`` is a view into the mapped blob."""
+    index: int
+    role: str
+    timestamp: Optional[datetime]
+    text: memoryview
+
+
+def write_columnar(
+    conversations: Iterable[Conversation],
+    directory: str,
+    source_info: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Write conversations to a columnar store.
+
+    Columns are appended per conversation, so the input may be a generator
+    (e.g. ``BaseParser.iter_file``). The store is assembled in a temporary
+    directory and moved into place when complete.
+
+    Args:
+        conversations: Conversations to store
+        directory: Store directory (replaced if it exists)
+        source_info: Extra metadata describing the input, kept in meta.json
+
+    Returns:
+        Number of messages written
+    """
+    temp_dir = f"{directory}.{os.getpid()}.tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+
+    roles: Dict[str, int] = {}
+    meta_conversations: List[Dict[str, Any]] = []
+    files = {name: open(os.path.join(temp_dir, name), 'wb') for name in COLUMNS}
+    text_file = open(os.path.join(temp_dir, TEXT_FILENAME), 'wb')
+    message_count = 0
+    text_offset = 0
+
+    try:
+        array('Q', [0]).tofile(files['text_offsets.u64'])
+
+        for conv_index, conversation in enumerate(conversations):
+            conv_column = array('I', [conv_index]) * len(conversation.messages)
+            role_column = array('B')
+            time_column = array('d')
+            offset_column = array('Q')
+
+            for message in conversation.messages:
+                if message.role not in roles:
+                    if len(roles) == 256:
+                        raise ValueError("Too many distinct message roles for a u8 column")
+                    roles[message.role] = len(roles)
+                role_column.append(roles[message.role])
+                time_column.append(_to_seconds(message.timestamp))
+
+                encoded = message.content.encode('utf-8')
+                text_file.write(encoded)
+                text_offset += len(encoded)
+                offset_column.append(text_offset)
+
+            conv_column.tofile(files['conv_index.u32'])
+            role_column.tofile(files['role.u8'])
+            time_column.tofile(files['timestamp.f64'])
+            offset_column.tofile(files['text_offsets.u64'])
+
+            meta_conversations.append({
+                'id': conversation.id,
+                'title': conversation.title,
+                'source': conversation.source,
+                'created_at': conversation.created_at.isoformat() if conversation.created_at else None,
+                'updated_at': conversation.updated_at.isoformat() if conversation.updated_at else None,
+                'uuid': conversation.uuid,
+                'start': message_count,
+                'count': len(conversation.messages),
+            })
+            message_count += len(conversation.messages)
+    finally:
+        for f in files.values():
+            f.close()
+        text_file.close()
+
+    meta = {
+        'version': STORE_FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'message_count': message_count,
+        'roles': sorted(roles, key=roles.get),
+        'conversations': meta_conversations,
+        'source': source_info or {},
+    }
+    with open(os.path.join(temp_dir, META_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(temp_dir, directory)
+    return message_count
+
+
+class ColumnarCorpus:
+    """Read-only, memory-mapped view of a columnar store."""
+
+    def __init__(self, directory: str):
+        """
+        Open a columnar store.
+
+        Args:
+            directory: Store directory written by ``write_columnar``
+
+        Raises:
+            ValueError: If the store was written in an incompatible format
+        """
+        self.directory = directory
+        with open(os.path.join(directory, META_FILENAME), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+
+        if self.meta.get('version') != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar store version in {directory}")
+        if self.meta.get('byteorder') != sys.byteorder:
+            raise ValueError(f"Columnar store {directory} was written with a different byte order")
+
+        self.roles: List[str] = self.meta['roles']
+        self.conversations: List[Dict[str, Any]] = self.meta['conversations']
+
+        self._maps: List[mmap.mmap] = []
+        self.conv_index = self._map_column('conv_index.u32')
+        self.role_codes = self._map_column('role.u8')
+        self.timestamps = self._map_column('timestamp.f64')
+        self.text_offsets = self._map_column('text_offsets.u64')
+        self.text = self._map(TEXT_FILENAME)
+
+    def __len__(self) -> int:
+        return self.meta['message_count']
+
+    def __enter__(self) -> 'ColumnarCorpus':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory maps."""
+        for view in (self.conv_index, self.role_codes, self.timestamps, self.text_offsets, self.text):
+            view.release()
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                # A caller still holds a text view; the map is unmapped
+                # when the last view is garbage collected
+                pass
+        self._maps = []
+
+    def message(self, index: int) -> MessageView:
+        """Get one message by its position in the store."""
+        start = self.text_offsets[index]
+        end = self.text_offsets[index + 1]
+        return MessageView(
+            index,
+            self.roles[self.role_codes[index]],
+            _from_seconds(self.timestamps[index]),
+            self.text[start:end],
+        )
+
+    def message_text(self, index: int) -> str:
+        """Decode the text of one message."""
+        return str(self.text[self.text_offsets[index]:self.text_offsets[index + 1]], 'utf-8')
+
+    def iter_messages(self, conversation_index: int) -> Iterator[MessageView]:
+        """Iterate over the messages of one conversation."""
+        info = self.conversations[conversation_index]
+        for index in range(info['start'], info['start'] + info['count']):
+            yield self.message(index)
+
+    def to_conversation(self, conversation_index: int) -> Conversation:
+        """Materialize one conversation as a ``Conversation`` (without message UUIDs)."""
+        info = self.conversations[conversation_index]
+        return Conversation(
+            id=info['id'],
+            title=info['title'],
+            source=info['source'],
+            created_at=datetime.fromisoformat(info['created_at']) if info['created_at'] else None,
+            updated_at=datetime.fromisoformat(info['updated_at']) if info['updated_at'] else None,
+            messages=[
+                Message(role=m.role, content=str(m.text, 'utf-8'), timestamp=m.timestamp)
+                for m in self.iter_messages(conversation_index)
+            ],
+            uuid=info['uuid'],
+        )
+
+    def _map(self, name: str) -> memoryview:
+        """Map a file read-only; empty files map to an empty view."""
+        path = os.path.join(self.directory, name)
+        if os.path.getsize(path) == 0:
+            return memoryview(b'')
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped)
+
+    def _map_column(self, name: str) -> memoryview:
+        """Map a column file as a typed array view."""
+        return self._map(name).cast(COLUMNS[name])
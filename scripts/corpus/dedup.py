@@ -0,0 +1,270 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Collapse repeated and near-duplicate conversations before rendering.
+
+Re-exported accounts and merged exports bring the same conversation back
+again and again, often with a few more messages or small edits. Conversations
+are grouped when they:
+- have the same source and ID (a repeated export);
+- have identical message roles and text (an exact digest match); or
+- are near-duplicates. Their MinHash signatures over word shingles put them
+  in the same locality-sensitive hashing bucket, and their estimated Jaccard
+  similarity reaches the threshold.
+
+Each group keeps its most complete conversation: most messages, then most
+text, then the latest update. The others are dropped and listed in the
+report.
+
+Near-duplicate detection needs NumPy; without it only the first two checks run.
+"""
+import re
+import json
+import zlib
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from parsers.base_parser import Conversation
+
+logger = logging.getLogger(__name__)
+
+REPORT_FORMAT_VERSION = 1
+
+DEFAULT_THRESHOLD = 0.85
+NUM_PERMUTATIONS = 128
+# 16 bands of 8 rows: pairs at Jaccard 0.85 share a band with ~99.4%
+# probability, pairs at 0.5 with ~6%
+LSH_BANDS = 16
+SHINGLE_SIZE = 3
+
+# Conversations with fewer shingles are only collapsed by the exact checks
+MIN_SHINGLES = 20
+
+# Text hashed per conversation for near-duplicate detection
+MAX_TEXT_CHARS = 200_000
+
+# Shingles hashed per block when computing signatures
+_SIGNATURE_BLOCK = 4096
+
+_WORD_RE = re.compile(r'\w+')
+
+_SEED = 20250101
+
+
+def content_digest(conversation: Conversation) -> str:
+    """SHA-256 digest of a conversation's message roles and text."""
+    digest = hashlib.sha256()
+    for message in conversation.messages:
+        digest.update(message.role.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update((message.content or '').encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def completeness(conversation: Conversation) -> Tuple[int, int, datetime]:
+    """Sort key of the version of a conversation to keep; larger is better."""
+    return (
+        len(conversation.messages),
+        sum(len(message.content or '') for message in conversation.messages),
+        conversation.updated_at or conversation.created_at or datetime.min,
+    )
+
+
+class Deduplicator:
+    """Finds and collapses duplicate conversations."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, near_duplicates: bool = True):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            threshold: Estimated Jaccard similarity from which two
+                conversations count as near-duplicates
+            near_duplicates: Also look for near-duplicates (needs NumPy)
+        """
+        self.threshold = threshold
+        self.near_duplicates = near_duplicates
+        if near_duplicates and np is None:
+            logger.warning("NumPy is not installed; only exact duplicates are removed")
+            self.near_duplicates = False
+        self.groups: List[Dict[str, Any]] = []
+        self.stats = {'conversations': 0, 'kept': 0, 'same_id': 0, 'exact': 0, 'near': 0}
+        self._token_memo: Dict[str, int] = {}
+
+    def deduplicate(self, conversations: List[Conversation]) -> List[Conversation]:
+        """
+        Drop all but the most complete version of each duplicated conversation.
+
+        Args:
+            conversations: Conversations of any sources
+
+        Returns:
+            The kept conversations, in their original order
+        """
+        parent = list(range(len(conversations)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i: int, j: int) -> None:
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        digests = [content_digest(conv) for conv in conversations]
+        first_by_id: Dict[Tuple[str, str], int] = {}
+        first_by_digest: Dict[str, int] = {}
+        for i, conv in enumerate(conversations):
+            union(i, first_by_id.setdefault((conv.source, conv.id), i))
+            union(i, first_by_digest.setdefault(digests[i], i))
+
+        # Identical content shares one signature
+        signatures: Dict[int, 'np.ndarray'] = {}
+        if self.near_duplicates:
+            for i in first_by_digest.values():
+                signature = self._signature(conversations[i])
+                if signature is not None:
+                    signatures[i] = signature
+            for i, j in self._near_pairs(signatures):
+                union(i, j)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(conversations)):
+            groups.setdefault(find(i), []).append(i)
+
+        kept_indices = []
+        self.groups = []
+        for members in groups.values():
+            kept = max(members, key=lambda i: completeness(conversations[i]))
+            kept_indices.append(kept)
+            if len(members) == 1:
+                continue
+            collapsed = []
+            for i in members:
+                if i == kept:
+                    continue
+                reason, similarity = self._reason(conversations, digests, signatures, first_by_digest, kept, i)
+                self.stats[reason] += 1
+                collapsed.append({**_describe(conversations[i]), 'reason': reason, 'similarity': similarity})
+            self.groups.append({'kept': _describe(conversations[kept]), 'collapsed': collapsed})
+
+        self.stats['conversations'] += len(conversations)
+        self.stats['kept'] += len(kept_indices)
+        return [conversations[i] for i in sorted(kept_indices)]
+
+    def write_report(self, path: str) -> None:
+        """Write the collapsed groups as JSON."""
+        report = {
+            'format_version': REPORT_FORMAT_VERSION,
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'threshold': self.threshold,
+            'near_duplicates': self.near_duplicates,
+            'stats': self.stats,
+            'groups': sorted(self.groups, key=lambda g: len(g['collapsed']), reverse=True),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+
+    def _reason(
+        self,
+        conversations: List[Conversation],
+        digests: List[str],
+        signatures: Dict[int, 'np.ndarray'],
+        first_by_digest: Dict[str, int],
+        kept: int,
+        other: int
+    ) -> Tuple[str, Optional[float]]:
+        """Why ``other`` was collapsed into ``kept``, and their similarity if known."""
+        if digests[other] == digests[kept]:
+            similarity = 1.0
+        else:
+            similarity = None
+            kept_signature = signatures.get(first_by_digest[digests[kept]])
+            other_signature = signatures.get(first_by_digest[digests[other]])
+            if kept_signature is not None and other_signature is not None:
+                similarity = round(float(np.mean(kept_signature == other_signature)), 3)
+
+        if (conversations[other].source, conversations[other].id) == (conversations[kept].source, conversations[kept].id):
+            return 'same_id', similarity
+        if digests[other] == digests[kept]:
+            return 'exact', similarity
+        return 'near', similarity
+
+    def _signature(self, conversation: Conversation) -> Optional['np.ndarray']:
+        """MinHash signature of a conversation's word shingles, or None if too short."""
+        text = '\n'.join(message.content or '' for message in conversation.messages)[:MAX_TEXT_CHARS]
+        words = _WORD_RE.findall(text.lower())
+        if len(words) < MIN_SHINGLES + SHINGLE_SIZE - 1:
+            return None
+
+        memo = self._token_memo
+        if len(memo) > 1 << 20:
+            memo.clear()
+        for word in set(words).difference(memo):
+            memo[word] = zlib.crc32(word.encode('utf-8'))
+        tokens = np.fromiter(map(memo.__getitem__, words), dtype=np.uint64, count=len(words))
+
+        # Hash each run of SHINGLE_SIZE words into one 64-bit value
+        count = len(tokens) - SHINGLE_SIZE + 1
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset, multiplier in enumerate(_SHINGLE_MULTIPLIERS):
+            shingles = shingles * multiplier + tokens[offset:offset + count]
+        shingles = np.unique(shingles)
+
+        signature = np.full(NUM_PERMUTATIONS, np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(shingles), _SIGNATURE_BLOCK):
+            block = shingles[start:start + _SIGNATURE_BLOCK, None]
+            # Multiply-shift hashing; uint64 arithmetic wraps around
+            hashed = (block * _HASH_A + _HASH_B) >> np.uint64(32)
+            np.minimum(signature, hashed.min(axis=0), out=signature)
+        return signature
+
+    def _near_pairs(self, signatures: Dict[int, 'np.ndarray']) -> List[Tuple[int, int]]:
+        """Pairs sharing an LSH band whose estimated similarity reaches the threshold."""
+        rows = NUM_PERMUTATIONS // LSH_BANDS
+        pairs = []
+        seen = set()
+        for band in range(LSH_BANDS):
+            buckets: Dict[bytes, int] = {}
+            for i, signature in signatures.items():
+                key = signature[band * rows:(band + 1) * rows].tobytes()
+                # Compare with the bucket's first member only, which keeps
+                # large buckets linear; the union joins the rest
+                first = buckets.setdefault(key, i)
+                if first == i or (first, i) in seen:
+                    continue
+                seen.add((first, i))
+                if np.mean(signatures[first] == signature) >= self.threshold:
+                    pairs.append((first, i))
+        return pairs
+
+
+def _describe(conversation: Conversation) -> Dict[str, Any]:
+    return {
+        'source': conversation.source,
+        'id': conversation.id,
+        'title': conversation.title,
+        'messages': len(conversation.messages),
+        'created_at': conversation.created_at.isoformat() if conversation.created_at else None,
+        'updated_at': conversation.updated_at.isoformat() if conversation.updated_at else None,
+    }
+
+
+if np is not None:
+    _rng = np.random.default_rng(_SEED)
+    _SHINGLE_MULTIPLIERS = [np.uint64(1)] + [
+        np.uint64(m) | np.uint64(1) for m in _rng.integers(1, 2 ** 63, size=SHINGLE_SIZE - 1, dtype=np.uint64)
+    ]
+    # Odd multipliers for multiply-shift hashing
+    _HASH_A = _rng.integers(1, 2 ** 63, size=NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+    _HASH_B = _rng.integers(0, 2 ** 63, size=NUM_PERMUTATIONS, dtype=np.uint64)
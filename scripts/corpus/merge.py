@@ -0,0 +1,158 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Merge a history of overlapping exports into one canonical corpus.
+
+Each export of an account repeats most conversations of the previous one,
+sometimes with new messages. Merging keeps one version of every
+conversation, identified by its conversation ID. If a conversation has no
+ID, its first message ID is used instead. The newest version wins, judged
+by update time, then message count, then the later export in path order.
+
+Exports are read in two passes, one export at a time. The first pass only
+records which export holds the winning version of each conversation. The
+second pass reads each export again and yields just those versions. So
+apart from the merged result, at most one export is in memory at any time.
+"""
+import os
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from parsers.base_parser import BaseParser, Conversation, iter_json_array
+
+logger = logging.getLogger(__name__)
+
+# Conversation fields that identify the format of an export
+SOURCE_MARKERS = {
+    'openai': ('mapping',),
+    'anthropic': ('chat_messages',),
+}
+
+# (update time, message count, export index): larger is newer
+Version = Tuple[datetime, int, int]
+
+
+def detect_source(file_path: str) -> Optional[str]:
+    """
+    Identify the source format of an export from its first conversation.
+
+    Args:
+        file_path: Path to a JSON export
+
+    Returns:
+        Source name, or None if the file is empty or not a known export
+    """
+    try:
+        first = next(iter_json_array(file_path), None)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        logger.debug("Skipping '%s': %s", file_path, e)
+        return None
+    if not isinstance(first, dict):
+        return None
+    for source, markers in SOURCE_MARKERS.items():
+        if any(marker in first for marker in markers):
+            return source
+    return None
+
+
+def find_exports(raw_dir: str) -> Dict[str, List[str]]:
+    """
+    Find every export below a directory, grouped by source.
+
+    Args:
+        raw_dir: Directory searched recursively for ``*.json`` files
+
+    Returns:
+        Dictionary mapping source names to export paths in sorted order
+    """
+    exports: Dict[str, List[str]] = {}
+    for root, dirs, files in os.walk(raw_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith('.json'):
+                continue
+            path = os.path.join(root, name)
+            source = detect_source(path)
+            if source:
+                exports.setdefault(source, []).append(path)
+    return exports
+
+
+def merge_key(conversation: Conversation) -> str:
+    """Identity of a conversation across exports."""
+    if conversation.id:
+        return conversation.id
+    first_uuid = next((m.uuid for m in conversation.messages if m.uuid), None)
+    if first_uuid:
+        return f"message:{first_uuid}"
+    return f"title:{conversation.title}\0{conversation.created_at}"
+
+
+class ExportMerger:
+    """Merges the exports of one source by conversation identity."""
+
+    def __init__(self, parser: BaseParser, load: Optional[Callable[[str], Iterable[Conversation]]] = None):
+        """
+        Initialize the merger.
+
+        Args:
+            parser: Parser for the exports' source format
+            load: Reads the conversations of one export (default:
+                ``parser.iter_file``, which streams the export)
+        """
+        self.parser = parser
+        self.load = load or parser.iter_file
+        # Exports read, conversation versions seen, and versions kept
+        self.stats = {'exports': 0, 'versions': 0, 'conversations': 0, 'replaced': 0}
+
+    def merge(self, file_paths: List[str]) -> Iterator[Conversation]:
+        """
+        Yield the newest version of every conversation in the exports.
+
+        Args:
+            file_paths: Exports of this merger's source; ties are won by the
+                later one in this order
+
+        Yields:
+            One Conversation per identity, grouped by the export holding it
+        """
+        winners = self._select(file_paths)
+        self.stats['conversations'] = len(winners)
+
+        wanted: Dict[int, Set[int]] = {}
+        for _, file_index, position in winners.values():
+            wanted.setdefault(file_index, set()).add(position)
+        del winners
+
+        for file_index, path in enumerate(file_paths):
+            positions = wanted.pop(file_index, None)
+            if not positions:
+                continue
+            for position, conversation in enumerate(self.load(path)):
+                if position in positions:
+                    yield conversation
+
+    def _select(self, file_paths: List[str]) -> Dict[str, Tuple[Version, int, int]]:
+        """First pass: the winning version, export and position of each conversation."""
+        winners: Dict[str, Tuple[Version, int, int]] = {}
+        for file_index, path in enumerate(file_paths):
+            self.stats['exports'] += 1
+            count = 0
+            for position, conversation in enumerate(self.load(path)):
+                count += 1
+                version = (
+                    conversation.updated_at or conversation.created_at or datetime.min,
+                    len(conversation.messages),
+                    file_index,
+                )
+                key = merge_key(conversation)
+                current = winners.get(key)
+                if current is None:
+                    winners[key] = (version, file_index, position)
+                elif version > current[0]:
+                    winners[key] = (version, file_index, position)
+                    self.stats['replaced'] += 1
+            self.stats['versions'] += count
+            logger.info("Read %d %s conversations from %s", count, self.parser.source_name, path)
+        return winners
+
@@ -0,0 +1,399 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Related conversations from hashed TF-IDF vectors.
+
+The title and message text of each conversation are split into words, which
+are hashed (CRC-32) into ``HASH_BUCKETS`` buckets and weighted by sublinear
+term frequency times inverse document frequency. These sparse vectors are
+reduced to ``dimensions`` dense values by a fixed random sign projection,
+which keeps cosine similarities to within a few hundredths, and normalized.
+The neighbours of a conversation are then the top-k columns of blocked
+matrix products, with blocks sized so their scores fit the memory budget.
+
+Vectors, neighbour lists and IDF weights are kept in
+``<cache_dir>/related/related.npz``. Later runs only vectorize new and
+changed conversations, using the stored IDF weights:
+- Those conversations get their own neighbour rows computed.
+- Existing rows take them in where they score higher.
+- Rows that pointed at changed or removed conversations are recomputed.
+
+Once the conversations added, changed or removed since the IDF weights were
+computed exceed ``REBUILD_RATIO`` of the corpus, everything is rebuilt.
+"""
+import os
+import re
+import json
+import zlib
+import hashlib
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from parsers.base_parser import Conversation
+
+logger = logging.getLogger(__name__)
+
+STATE_FILENAME = 'related.npz'
+
+# Bump when tokenization, weighting or the projection change
+STATE_FORMAT_VERSION = 1
+
+HASH_BUCKETS = 1 << 16
+DEFAULT_DIMENSIONS = 256
+DEFAULT_COUNT = 5
+
+# Pairs scoring below this are not worth showing as related
+MIN_SIMILARITY = 0.15
+
+# Share of the corpus that may change before the IDF weights are recomputed
+REBUILD_RATIO = 0.25
+
+# Text compared per conversation; enough to tell what it is about
+MAX_TEXT_CHARS = 50_000
+
+PROJECTION_SEED = 1729
+
+_TOKEN_RE = re.compile(r'[^\W\d_]{3,}')
+
+# Hashed words remembered across conversations
+_BUCKET_MEMO_LIMIT = 1 << 20
+
+# (buckets, weights) of one conversation
+SparseVector = Tuple['np.ndarray', 'np.ndarray']
+
+
+def conversation_key(conversation: Conversation) -> str:
+    """Identity of a conversation across runs."""
+    return f"{conversation.source}:{conversation.id}"
+
+
+def conversation_text(conversation: Conversation) -> str:
+    """Text a conversation is compared by: its title and messages, truncated."""
+    parts = [conversation.title or '']
+    size = len(parts[0])
+    for message in conversation.messages:
+        if size >= MAX_TEXT_CHARS:
+            break
+        parts.append(message.content or '')
+        size += len(parts[-1]) + 1
+    return '\n'.join(parts)[:MAX_TEXT_CHARS]
+
+
+class RelatedIndex:
+    """Top-k similar conversations, kept up to date incrementally."""
+
+    def __init__(
+        self,
+        state_dir: Optional[str] = None,
+        count: int = DEFAULT_COUNT,
+        dimensions: int = DEFAULT_DIMENSIONS,
+        memory_budget_mb: int = 256
+    ):
+        """
+        Open the index, loading the state of earlier runs if it matches.
+
+        Args:
+            state_dir: Directory for the stored state (None keeps nothing)
+            count: Neighbours kept per conversation
+            dimensions: Size of the projected vectors
+            memory_budget_mb: Memory for one block of similarity scores
+
+        Raises:
+            RuntimeError: If NumPy is not installed
+        """
+        if np is None:
+            raise RuntimeError("Related conversations require NumPy: pip install numpy")
+        self.state_path = os.path.join(state_dir, STATE_FILENAME) if state_dir else None
+        self.count = count
+        self.dimensions = dimensions
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024
+        self.stats = {'vectorized': 0, 'rows_computed': 0, 'rebuilt': 0}
+
+        # Row ("slot") state; removed conversations leave an empty slot
+        # until the next rebuild
+        self.keys: List[Optional[str]] = []
+        self.digests: List[str] = []
+        self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self.neighbours = np.zeros((0, count), dtype=np.int32)
+        self.scores = np.zeros((0, count), dtype=np.float32)
+        self.idf: Optional['np.ndarray'] = None
+        self.idf_documents = 0
+        self.drift = 0
+
+        self._slots: Dict[str, int] = {}
+        self._bucket_memo: Dict[str, int] = {}
+        self._projection: Optional['np.ndarray'] = None
+        self._load()
+
+    def update(self, conversations: Sequence[Conversation]) -> None:
+        """
+        Bring the index up to date with the current corpus and save it.
+
+        Conversations in the index but not in ``conversations`` are removed.
+
+        Args:
+            conversations: Every conversation of the corpus
+        """
+        incoming: Dict[str, int] = {}
+        digests: Dict[str, str] = {}
+        for position, conversation in enumerate(conversations):
+            key = conversation_key(conversation)
+            incoming[key] = position
+            digests[key] = hashlib.sha1(conversation_text(conversation).encode('utf-8')).hexdigest()
+
+        added = [key for key in incoming if key not in self._slots]
+        changed = [key for key in incoming if key in self._slots and self.digests[self._slots[key]] != digests[key]]
+        removed = [key for key in self._slots if key not in incoming]
+        drift = len(added) + len(changed) + len(removed)
+
+        if self.idf is None or self.drift + drift > REBUILD_RATIO * max(self.idf_documents, 1):
+            self._rebuild(conversations, incoming, digests)
+        elif drift:
+            self._apply_changes(conversations, incoming, digests, added, changed, removed)
+            self.drift += drift
+        else:
+            return
+        self._save()
+
+    def related(self, key: str) -> List[Tuple[str, float]]:
+        """
+        Most similar conversations first.
+
+        Args:
+            key: Conversation key (see ``conversation_key``)
+
+        Returns:
+            (key, cosine similarity) pairs, at most ``count``
+        """
+        slot = self._slots.get(key)
+        if slot is None:
+            return []
+        return [
+            (self.keys[neighbour], float(score))
+            for neighbour, score in zip(self.neighbours[slot], self.scores[slot])
+            if neighbour >= 0
+        ]
+
+    def _rebuild(self, conversations: Sequence[Conversation], incoming: Dict[str, int], digests: Dict[str, str]) -> None:
+        keys = list(incoming)
+        sparse = [self._term_vector(conversation_text(conversations[incoming[key]])) for key in keys]
+
+        document_frequency = np.zeros(HASH_BUCKETS, dtype=np.int64)
+        for buckets, _ in sparse:
+            document_frequency[buckets] += 1
+        self.idf = (np.log((1 + len(keys)) / (1 + document_frequency)) + 1).astype(np.float32)
+        self.idf_documents = len(keys)
+        self.drift = 0
+
+        self.keys = keys
+        self.digests = [digests[key] for key in keys]
+        self._slots = {key: slot for slot, key in enumerate(keys)}
+        self.vectors = self._project(sparse)
+        self.neighbours = np.full((len(keys), self.count), -1, dtype=np.int32)
+        self.scores = np.zeros((len(keys), self.count), dtype=np.float32)
+        self._compute_rows(np.arange(len(keys)))
+        self.stats['vectorized'] += len(keys)
+        self.stats['rebuilt'] = 1
+
+    def _apply_changes(
+        self,
+        conversations: Sequence[Conversation],
+        incoming: Dict[str, int],
+        digests: Dict[str, str],
+        added: List[str],
+        changed: List[str],
+        removed: List[str]
+    ) -> None:
+        removed_slots = [self._slots.pop(key) for key in removed]
+        for slot in removed_slots:
+            self.keys[slot] = None
+            self.digests[slot] = ''
+            self.vectors[slot] = 0
+            self.neighbours[slot] = -1
+            self.scores[slot] = 0
+
+        first_new = len(self.keys)
+        for key in added:
+            self._slots[key] = len(self.keys)
+            self.keys.append(key)
+            self.digests.append('')
+        grow = len(added)
+        self.vectors = np.concatenate([self.vectors, np.zeros((grow, self.dimensions), dtype=np.float32)])
+        self.neighbours = np.concatenate([self.neighbours, np.full((grow, self.count), -1, dtype=np.int32)])
+        self.scores = np.concatenate([self.scores, np.zeros((grow, self.count), dtype=np.float32)])
+
+        fresh = changed + added
+        fresh_slots = np.array([self._slots[key] for key in fresh], dtype=np.int64)
+        for key in fresh:
+            self.digests[self._slots[key]] = digests[key]
+        self.vectors[fresh_slots] = self._project([
+            self._term_vector(conversation_text(conversations[incoming[key]])) for key in fresh
+        ])
+        self.stats['vectorized'] += len(fresh)
+
+        # Rows that listed a changed or removed conversation start over
+        stale = np.array([self._slots[key] for key in changed] + removed_slots, dtype=np.int32)
+        recompute = np.isin(self.neighbours, stale).any(axis=1)
+        recompute[fresh_slots] = True
+        recompute[removed_slots] = False
+        self._compute_rows(np.flatnonzero(recompute))
+
+        # The others only need to consider the new vectors
+        others = np.flatnonzero(~recompute & self._valid_slots())
+        others = others[others < first_new]
+        self._merge_candidates(others, fresh_slots)
+
+    def _term_vector(self, text: str) -> SparseVector:
+        """Hashed sublinear term frequencies of a text."""
+        term_counts = Counter(_TOKEN_RE.findall(text.lower()))
+        if not term_counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        memo = self._bucket_memo
+        if len(memo) > _BUCKET_MEMO_LIMIT:
+            memo.clear()
+        buckets = np.empty(len(term_counts), dtype=np.int64)
+        for i, term in enumerate(term_counts):
+            bucket = memo.get(term)
+            if bucket is None:
+                bucket = memo[term] = zlib.crc32(term.encode('utf-8')) & (HASH_BUCKETS - 1)
+            buckets[i] = bucket
+        counts = np.fromiter(term_counts.values(), dtype=np.float64, count=len(term_counts))
+        # Words sharing a bucket add up
+        unique, inverse = np.unique(buckets, return_inverse=True)
+        summed = np.bincount(inverse, weights=counts)
+        return unique, (1 + np.log(summed)).astype(np.float32)
+
+    def _project(self, sparse: List[SparseVector]) -> 'np.ndarray':
+        """TF-IDF weight, project and normalize sparse vectors."""
+        projection = self._projection_matrix()
+        vectors = np.zeros((len(sparse), self.dimensions), dtype=np.float32)
+        for row, (buckets, weights) in enumerate(sparse):
+            if len(buckets):
+                # One small product per conversation beats any batched
+                # gather-and-reduce over the whole corpus
+                vectors[row] = (weights * self.idf[buckets]) @ projection[buckets].astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    def _projection_matrix(self) -> 'np.ndarray':
+        if self._projection is None:
+            rng = np.random.default_rng(PROJECTION_SEED)
+            signs = rng.integers(0, 2, size=(HASH_BUCKETS, self.dimensions), dtype=np.int8)
+            self._projection = signs * np.int8(2) - np.int8(1)
+        return self._projection
+
+    def _valid_slots(self) -> 'np.ndarray':
+        """Slots holding a conversation with any words in it."""
+        return np.array([key is not None for key in self.keys], dtype=bool) & self.vectors.any(axis=1)
+
+    def _block_rows(self, columns: int) -> int:
+        """Rows per block of ``columns`` scores: float32 scores plus int64 ranks."""
+        return max(1, self.memory_budget_bytes // max(columns * 12, 1))
+
+    def _compute_rows(self, slots: 'np.ndarray') -> None:
+        """Neighbours of ``slots`` among all conversations."""
+        valid = self._valid_slots()
+        columns = np.arange(len(self.keys))
+        block = self._block_rows(len(self.keys))
+        for start in range(0, len(slots), block):
+            rows = slots[start:start + block]
+            scores = self.vectors[rows] @ self.vectors.T
+            scores[:, ~valid] = -np.inf
+            scores[np.arange(len(rows)), rows] = -np.inf
+            self._store_top(rows, scores, np.broadcast_to(columns, scores.shape))
+        self.stats['rows_computed'] += len(slots)
+
+    def _merge_candidates(self, slots: 'np.ndarray', candidates: 'np.ndarray') -> None:
+        """Let ``candidates`` into the neighbour lists of ``slots`` where they score higher."""
+        if not len(slots) or not len(candidates):
+            return
+        candidate_vectors = self.vectors[candidates]
+        usable = candidate_vectors.any(axis=1)
+        block = self._block_rows(len(candidates) + self.count)
+        for start in range(0, len(slots), block):
+            rows = slots[start:start + block]
+            new_scores = self.vectors[rows] @ candidate_vectors.T
+            new_scores[:, ~usable] = -np.inf
+            current = np.where(self.neighbours[rows] >= 0, self.scores[rows], -np.inf)
+            self._store_top(
+                rows,
+                np.concatenate([current, new_scores], axis=1),
+                np.concatenate([self.neighbours[rows], np.broadcast_to(candidates, new_scores.shape)], axis=1)
+            )
+
+    def _store_top(self, rows: 'np.ndarray', scores: 'np.ndarray', ids: 'np.ndarray') -> None:
+        """Keep the ``count`` best scoring ids of each row; ``scores`` is overwritten."""
+        k = min(self.count, scores.shape[1])
+        self.neighbours[rows] = -1
+        self.scores[rows] = 0
+        if not k:
+            return
+        # Negated in place so the smallest values are the best, without a copy
+        np.negative(scores, out=scores)
+        top = np.argpartition(scores, k - 1, axis=1)[:, :k] if k < scores.shape[1] else np.argsort(scores, axis=1)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = -np.take_along_axis(top_scores, order, axis=1)
+        top_ids = np.take_along_axis(ids, top, axis=1)
+
+        keep = top_scores >= MIN_SIMILARITY
+        self.neighbours[rows, :k] = np.where(keep, top_ids, -1)
+        self.scores[rows, :k] = np.where(keep, top_scores, 0)
+
+    def _load(self) -> None:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with np.load(self.state_path) as data:
+                meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+                if (meta.get('version') != STATE_FORMAT_VERSION or meta.get('dimensions') != self.dimensions
+                        or meta.get('count') != self.count or meta.get('buckets') != HASH_BUCKETS):
+                    logger.info("Related conversations state is from other settings; rebuilding")
+                    return
+                vectors, neighbours, scores, idf = data['vectors'], data['neighbours'], data['scores'], data['idf']
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring unreadable related conversations state %s: %s", self.state_path, e)
+            return
+        if not len(meta['keys']) == len(meta['digests']) == len(vectors) == len(neighbours) == len(scores):
+            logger.warning("Ignoring inconsistent related conversations state %s", self.state_path)
+            return
+
+        self.keys = meta['keys']
+        self.digests = meta['digests']
+        self.idf_documents = meta['idf_documents']
+        self.drift = meta['drift']
+        self.vectors, self.neighbours, self.scores, self.idf = vectors, neighbours, scores, idf
+        self._slots = {key: slot for slot, key in enumerate(self.keys) if key is not None}
+
+    def _save(self) -> None:
+        if not self.state_path:
+            return
+        meta = {
+            'version': STATE_FORMAT_VERSION,
+            'dimensions': self.dimensions,
+            'count': self.count,
+            'buckets': HASH_BUCKETS,
+            'idf_documents': self.idf_documents,
+            'drift': self.drift,
+            'keys': self.keys,
+            'digests': self.digests,
+        }
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez(
+                f,
+                meta=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8),
+                vectors=self.vectors,
+                neighbours=self.neighbours,
+                scores=self.scores,
+                idf=self.idf
+            )
+        os.replace(temp_path, self.state_path)
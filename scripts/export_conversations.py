@@ -2,23 +2,45 @@
 # Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
 """CLI tool to export conversations to various formats."""
 import os
+import json
+import hashlib
 import argparse
 import csv
-from typing import List
+import importlib.util
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from config import Config
+from corpus.cache import CorpusCache
+from corpus.columnar import ColumnarCorpus
+from exporters.bulk import export_bulk, parse_bulk_path
+from exporters.workbook import LAYOUTS as WORKBOOK_LAYOUTS, clean_cell, write_workbook
 from parsers.openai_parser import OpenAIParser
 from parsers.anthropic_parser import AnthropicParser
 from parsers.base_parser import Conversation
+from profiling import Profiler, add_profile_arguments, init_worker as init_profiling_worker
 
-try:
-    from docx import Document
-    from openpyxl import Workbook
-    from reportlab.lib.pagesizes import letter
-    from reportlab.pdfgen import canvas
-except Exception as e:  # pragma: no cover - optional dependencies
-    raise SystemExit(f"Required packages are missing: {e}")
+# Optional packages needed per format. They are imported inside the
+# exporters, so a txt/md/csv run never pays for loading them.
+FORMAT_BACKENDS = {
+    'xlsx': 'openpyxl',
+    'docx': 'docx',
+    'pdf': 'reportlab',
+}
+
+# Digests of the conversations each output file was written from
+EXPORT_MANIFEST = '.export-manifest.json'
+
+# Bump when an exporter's output changes, so existing files are rewritten
+EXPORT_FORMAT_VERSION = 2
+
+# Stages that --profile can select
+PROFILE_STAGES = ('load', 'export', 'bulk', 'workbook')
 
+# Completed files between manifest saves, so interrupted runs can resume
+MANIFEST_SAVE_INTERVAL = 50
 
-RAW_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'raw')
+CONFIG = Config.from_env(Path(__file__).resolve().parent.parent)
+RAW_DIR = str(CONFIG.raw_data_dir)
 
 
 def find_input_files() -> dict:
@@ -40,14 +62,60 @@ def find_input_files() -> dict:
 def load_conversations() -> List[Conversation]:
     """Parse all available conversations."""
     inputs = find_input_files()
+    cache = CorpusCache(CONFIG.cache_dir, enabled=CONFIG.corpus_cache)
     convs: List[Conversation] = []
     if 'openai' in inputs:
-        convs.extend(OpenAIParser().parse_file(inputs['openai']))
+        convs.extend(cache.load(OpenAIParser(), inputs['openai'], CONFIG.max_file_size_mb))
     if 'anthropic' in inputs:
-        convs.extend(AnthropicParser().parse_file(inputs['anthropic']))
+        convs.extend(cache.load(AnthropicParser(), inputs['anthropic'], CONFIG.max_file_size_mb))
     return convs
 
 
+def load_columnar_stores() -> List[ColumnarCorpus]:
+    """Open the memory-mapped columnar stores of all available exports."""
+    inputs = find_input_files()
+    cache = CorpusCache(CONFIG.cache_dir, enabled=True)
+    stores: List[ColumnarCorpus] = []
+    if 'openai' in inputs:
+        stores.append(cache.load_columnar(OpenAIParser(), inputs['openai'], CONFIG.max_file_size_mb))
+    if 'anthropic' in inputs:
+        stores.append(cache.load_columnar(AnthropicParser(), inputs['anthropic'], CONFIG.max_file_size_mb))
+    return stores
+
+
+def iter_conversations(match: str) -> Iterator[Conversation]:
+    """
+    Yield matching conversations one at a time, for single-file exports.
+
+    Conversations come from the memory-mapped columnar stores, or straight
+    from the streaming parsers if the corpus cache is disabled, so memory
+    does not grow with the archive.
+    """
+    match_lower = match.lower()
+
+    def matches(title: str, conv_id: str) -> bool:
+        return not match or match_lower in title.lower() or match_lower in conv_id.lower()
+
+    if not CONFIG.corpus_cache:
+        inputs = find_input_files()
+        for source, parser in (('openai', OpenAIParser()), ('anthropic', AnthropicParser())):
+            if source in inputs:
+                for conv in parser.iter_file(inputs[source]):
+                    if matches(conv.title, conv.id):
+                        yield conv
+        return
+
+    stores = load_columnar_stores()
+    try:
+        for store in stores:
+            for index, info in enumerate(store.conversations):
+                if matches(info['title'], info['id']):
+                    yield store.to_conversation(index)
+    finally:
+        for store in stores:
+            store.close()
+
+
 def filter_conversations(convs: List[Conversation], match: str) -> List[Conversation]:
     if not match:
         return convs
@@ -82,16 +150,20 @@ def export_csv(conv: Conversation, out_path: str) -> None:
 
 
 def export_xlsx(conv: Conversation, out_path: str) -> None:
-    wb = Workbook()
-    ws = wb.active
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
     ws.append(['timestamp', 'role', 'content'])
     for msg in conv.messages:
         ts = msg.timestamp.strftime('%Y-%m-%d %H:%M:%S') if msg.timestamp else ''
-        ws.append([ts, msg.role, msg.content])
+        ws.append([ts, msg.role, clean_cell(msg.content, ws)])
     wb.save(out_path)
 
 
 def export_docx(conv: Conversation, out_path: str) -> None:
+    from docx import Document
+
     doc = Document()
     doc.add_heading(conv.title, 0)
     for msg in conv.messages:
@@ -101,26 +173,40 @@ def export_docx(conv: Conversation, out_path: str) -> None:
 
 
 def export_pdf(conv: Conversation, out_path: str) -> None:
-    c = canvas.Canvas(out_path, pagesize=letter)
-    width, height = letter
-    y = height - 40
-    c.setFont('Helvetica-Bold', 14)
-    c.drawString(40, y, conv.title)
-    y -= 30
-    c.setFont('Helvetica', 10)
-    for msg in conv.messages:
-        line = f"{msg.role.capitalize()} "
-        if msg.timestamp:
-            line += msg.timestamp.strftime('%Y-%m-%d %H:%M:%S') + ': '
-        line += msg.content
-        for chunk in [line[i:i+90] for i in range(0, len(line), 90)]:
-            if y < 40:
-                c.showPage()
-                y = height - 40
-                c.setFont('Helvetica', 10)
-            c.drawString(40, y, chunk)
-            y -= 14
-    c.save()
+    from exporters.pdf import write_pdf
+
+    write_pdf([conv], out_path)
+
+
+def export_txt_columnar(store: ColumnarCorpus, conv_index: int, out_path: str) -> None:
+    """Write the txt export straight from the mapped text blob."""
+    with open(out_path, 'wb') as f:
+        f.write(f"# {store.conversations[conv_index]['title']}\n\n".encode('utf-8'))
+        for msg in store.iter_messages(conv_index):
+            ts = msg.timestamp.strftime('%Y-%m-%d %H:%M:%S') if msg.timestamp else ''
+            f.write(f"{ts} {msg.role}: ".encode('utf-8'))
+            f.write(msg.text)
+            f.write(b"\n\n")
+
+
+def export_md_columnar(store: ColumnarCorpus, conv_index: int, out_path: str) -> None:
+    """Write the md export straight from the mapped text blob."""
+    with open(out_path, 'wb') as f:
+        f.write(f"# {store.conversations[conv_index]['title']}\n\n".encode('utf-8'))
+        for msg in store.iter_messages(conv_index):
+            ts = msg.timestamp.strftime('%Y-%m-%d %H:%M:%S') if msg.timestamp else ''
+            f.write(f"**{msg.role.capitalize()}** {ts}: ".encode('utf-8'))
+            f.write(msg.text)
+            f.write(b"\n\n")
+
+
+def export_csv_columnar(store: ColumnarCorpus, conv_index: int, out_path: str) -> None:
+    with open(out_path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['timestamp', 'role', 'content'])
+        for msg in store.iter_messages(conv_index):
+            ts = msg.timestamp.strftime('%Y-%m-%d %H:%M:%S') if msg.timestamp else ''
+            writer.writerow([ts, msg.role, str(msg.text, 'utf-8')])
 
 
 EXPORTERS = {
@@ -132,31 +218,300 @@ EXPORTERS = {
     'pdf': export_pdf,
 }
 
+# Formats written directly from a columnar store; the others go through
+# ColumnarCorpus.to_conversation
+COLUMNAR_EXPORTERS = {
+    'txt': export_txt_columnar,
+    'md': export_md_columnar,
+    'csv': export_csv_columnar,
+}
+
+
+def conversation_digest(conv: Conversation) -> str:
+    """Digest of everything a conversation export is built from."""
+    digest = hashlib.sha256(f"{conv.id}\0{conv.title}\0".encode('utf-8'))
+    for msg in conv.messages:
+        ts = msg.timestamp.isoformat() if msg.timestamp else ''
+        digest.update(f"{msg.role}\0{ts}\0".encode('utf-8'))
+        digest.update(msg.content.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def store_conversation_digest(store: ColumnarCorpus, conv_index: int) -> str:
+    """``conversation_digest`` computed from a columnar store (same result)."""
+    info = store.conversations[conv_index]
+    digest = hashlib.sha256(f"{info['id']}\0{info['title']}\0".encode('utf-8'))
+    for msg in store.iter_messages(conv_index):
+        ts = msg.timestamp.isoformat() if msg.timestamp else ''
+        digest.update(f"{msg.role}\0{ts}\0".encode('utf-8'))
+        digest.update(msg.text)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def unique_base_names(entries: List[Tuple[str, str]]) -> List[str]:
+    """
+    Derive one output base name per conversation without collisions.
+
+    Titles that reduce to the same name get the conversation ID appended
+    (then a counter), so no export silently overwrites another. Names are
+    compared case-insensitively for case-insensitive file systems.
+
+    Args:
+        entries: (title, conversation ID) pairs, in export order
+
+    Returns:
+        Base names in the same order
+    """
+    used = set()
+    names = []
+    for title, conv_id in entries:
+        base = ''.join(c for c in title if c.isalnum() or c in '_-')[:50] or conv_id[:8]
+        name = base
+        if name.lower() in used:
+            name = f"{base}_{conv_id[:8]}"
+        counter = 2
+        while name.lower() in used:
+            name = f"{base}_{conv_id[:8]}_{counter}"
+            counter += 1
+        used.add(name.lower())
+        names.append(name)
+    return names
+
+
+def load_manifest(output_dir: str) -> Dict[str, str]:
+    """Load the digests of files written by a previous export run."""
+    try:
+        with open(os.path.join(output_dir, EXPORT_MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(output_dir: str, manifest: Dict[str, str]) -> None:
+    """Atomically save the export manifest."""
+    path = os.path.join(output_dir, EXPORT_MANIFEST)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+# Columnar stores opened by this process, keyed by directory
+_open_stores: Dict[str, ColumnarCorpus] = {}
+
+
+def run_export_job(job: Dict[str, Any]) -> None:
+    """
+    Write one (conversation, format) export.
+
+    Jobs carry either the Conversation itself or the directory and index of
+    a columnar store, which worker processes open once and keep mapped.
+    """
+    fmt = job['fmt']
+    out_path = job['out_path']
+    if 'conversation' in job:
+        EXPORTERS[fmt](job['conversation'], out_path)
+        return
+
+    store = _open_stores.get(job['store_dir'])
+    if store is None:
+        store = _open_stores[job['store_dir']] = ColumnarCorpus(job['store_dir'])
+    if fmt in COLUMNAR_EXPORTERS:
+        COLUMNAR_EXPORTERS[fmt](store, job['index'], out_path)
+    else:
+        EXPORTERS[fmt](store.to_conversation(job['index']), out_path)
+
+
+def _iter_job_results(jobs: List[Dict[str, Any]], workers: int) -> Iterator[Tuple[Dict[str, Any], Optional[Exception]]]:
+    """Run jobs serially or in a process pool, yielding (job, error) as they finish."""
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            try:
+                run_export_job(job)
+                yield job, None
+            except Exception as e:
+                yield job, e
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    # Bounded submission keeps only a few queued conversations in memory
+    max_pending = workers * 4
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_profiling_worker) as executor:
+        pending = {}
+        job_iter = iter(jobs)
+        for job in job_iter:
+            pending[executor.submit(run_export_job, job)] = job
+            if len(pending) < max_pending:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.exception()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.exception()
+
+
+def export_conversations(
+    entries: List[Tuple[Dict[str, Any], str, str]],
+    formats: List[str],
+    output_dir: str,
+    workers: int = 1,
+    force: bool = False
+) -> Dict[str, int]:
+    """
+    Export conversations in every requested format.
+
+    Work is spread over (conversation, format) pairs. Files whose manifest
+    digest matches the conversation are skipped unless force is set, so an
+    interrupted run resumes where it stopped.
+
+    Args:
+        entries: (job payload, base name, content digest) per conversation
+        formats: Formats to write
+        output_dir: Output directory
+        workers: Number of worker processes
+        force: Rewrite files even if they are up to date
+
+    Returns:
+        Counts of 'written', 'skipped' and 'failed' files
+    """
+    manifest = load_manifest(output_dir)
+
+    jobs = []
+    stats = {'written': 0, 'skipped': 0, 'failed': 0}
+    for payload, base_name, digest in entries:
+        for fmt in formats:
+            filename = f"{base_name}.{fmt}"
+            out_path = os.path.join(output_dir, filename)
+            job_digest = f"{EXPORT_FORMAT_VERSION}:{digest}"
+            if not force and manifest.get(filename) == job_digest and os.path.exists(out_path):
+                stats['skipped'] += 1
+                continue
+            jobs.append(dict(payload, fmt=fmt, out_path=out_path, filename=filename, digest=job_digest))
+
+    total = len(jobs)
+    if stats['skipped']:
+        print(f"Skipping {stats['skipped']} up-to-date files")
+
+    try:
+        for done, (job, error) in enumerate(_iter_job_results(jobs, workers), 1):
+            if error is not None:
+                stats['failed'] += 1
+                manifest.pop(job['filename'], None)
+                print(f"[{done}/{total}] Failed {job['out_path']}: {error}")
+                continue
+            stats['written'] += 1
+            manifest[job['filename']] = job['digest']
+            print(f"[{done}/{total}] Wrote {job['out_path']}")
+            if done % MANIFEST_SAVE_INTERVAL == 0:
+                save_manifest(output_dir, manifest)
+    finally:
+        save_manifest(output_dir, manifest)
+
+    return stats
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(description='Export selected conversations to various formats.')
     parser.add_argument('-m', '--match', help='Title or ID substring to match')
     parser.add_argument('-f', '--formats', default='txt', help='Comma separated list of formats (txt,md,csv,xlsx,docx,pdf)')
     parser.add_argument('-o', '--output', default='exports', help='Output directory')
+    parser.add_argument('--columnar', action='store_true', help='Read from the memory-mapped columnar store (faster for bulk exports)')
+    parser.add_argument('-j', '--workers', type=int, default=CONFIG.workers, help='Worker processes, 0 = all cores (default: CHAT_WORKERS)')
+    parser.add_argument('--force', action='store_true', help='Rewrite files even if they are up to date')
+    parser.add_argument('--workbook', metavar='PATH', help='Write all matching conversations to one streaming XLSX workbook')
+    parser.add_argument('--workbook-layout', choices=WORKBOOK_LAYOUTS, default='sheets',
+                        help='sheets: one sheet per source; rows: one sheet with a source column')
+    parser.add_argument('--bulk', metavar='PATH',
+                        help='Stream all matching conversations into one corpus file; the format comes from '
+                             'the extension (.jsonl, .csv, .md, optionally + .gz/.bz2/.xz, or .pdf '
+                             'with one bookmark per conversation)')
+    add_profile_arguments(parser, PROFILE_STAGES)
     args = parser.parse_args()
 
-    convs = filter_conversations(load_conversations(), args.match or '')
-    if not convs:
-        print('No conversations matched.')
+    with Profiler.from_args(args, 'export', str(CONFIG.data_dir / 'profiles')) as profiler:
+        run_export(args, profiler)
+
+
+def run_export(args: argparse.Namespace, profiler: Profiler) -> None:
+    """Run the export selected by the command-line arguments."""
+    requested = [fmt.strip() for fmt in args.formats.split(',')]
+    missing = sorted({
+        FORMAT_BACKENDS[fmt] for fmt in requested
+        if fmt in FORMAT_BACKENDS and importlib.util.find_spec(FORMAT_BACKENDS[fmt]) is None
+    })
+    if missing:
+        raise SystemExit(f"Required packages are missing: {', '.join(missing)}")
+
+    if args.bulk:
+        try:
+            fmt, _ = parse_bulk_path(args.bulk)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        if fmt in FORMAT_BACKENDS and importlib.util.find_spec(FORMAT_BACKENDS[fmt]) is None:
+            raise SystemExit(f"Required packages are missing: {FORMAT_BACKENDS[fmt]}")
+        with profiler.stage('bulk'):
+            count = export_bulk(iter_conversations(args.match or ''), args.bulk)
+        print(f"Wrote {count} conversations to {args.bulk}")
         return
 
-    os.makedirs(args.output, exist_ok=True)
-    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip() in EXPORTERS]
-    if not formats:
-        print('No valid formats specified.')
+    if args.workbook:
+        if importlib.util.find_spec('openpyxl') is None:
+            raise SystemExit("Required packages are missing: openpyxl")
+        with profiler.stage('workbook'):
+            count = write_workbook(iter_conversations(args.match or ''), args.workbook, args.workbook_layout)
+        print(f"Wrote {count} messages to {args.workbook}")
         return
 
-    for conv in convs:
-        base_name = ''.join(c for c in conv.title if c.isalnum() or c in '_-')[:50] or conv.id[:8]
-        for fmt in formats:
-            out_path = os.path.join(args.output, f"{base_name}.{fmt}")
-            EXPORTERS[fmt](conv, out_path)
-            print(f"Wrote {out_path}")
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip() in EXPORTERS]
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    match = (args.match or '').lower()
+
+    stores: List[ColumnarCorpus] = []
+    try:
+        # Names are assigned over the whole corpus, so a conversation keeps
+        # its file name whatever --match selects
+        if args.columnar:
+            with profiler.stage('load'):
+                stores = load_columnar_stores()
+            _open_stores.update({store.directory: store for store in stores})
+            located = [(store, index, info) for store in stores for index, info in enumerate(store.conversations)]
+            base_names = unique_base_names([(info['title'], info['id']) for _, _, info in located])
+            entries = [
+                ({'store_dir': store.directory, 'index': index}, base_name,
+                 store_conversation_digest(store, index))
+                for (store, index, info), base_name in zip(located, base_names)
+                if not match or match in info['title'].lower() or match in info['id'].lower()
+            ]
+        else:
+            with profiler.stage('load'):
+                convs = load_conversations()
+            base_names = unique_base_names([(conv.title, conv.id) for conv in convs])
+            selected = {id(conv) for conv in filter_conversations(convs, args.match or '')}
+            entries = [
+                ({'conversation': conv}, base_name, conversation_digest(conv))
+                for conv, base_name in zip(convs, base_names)
+                if id(conv) in selected
+            ]
+
+        if not entries:
+            print('No conversations matched.')
+            return
+
+        os.makedirs(args.output, exist_ok=True)
+        if not formats:
+            print('No valid formats specified.')
+            return
+
+        with profiler.stage('export'):
+            stats = export_conversations(entries, formats, args.output, workers, args.force)
+        print(f"Exported {stats['written']} files ({stats['skipped']} up to date, {stats['failed']} failed)")
+    finally:
+        for store in stores:
+            store.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,2 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""Streaming exporters that write a whole archive to a single file."""
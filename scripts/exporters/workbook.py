@@ -0,0 +1,149 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Streaming XLSX export using openpyxl write-only worksheets.
+
+Write-only worksheets serialize each row as it is appended instead of
+keeping a cell object per value, so memory stays flat no matter how many
+messages the workbook holds.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from parsers.base_parser import Conversation
+
+# Excel's hard limits
+MAX_SHEET_ROWS = 1048576
+MAX_CELL_CHARS = 32767
+MAX_SHEET_TITLE_CHARS = 31
+
+TRUNCATION_MARKER = ' [truncated]'
+
+# Leading characters that make spreadsheet applications read text as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@')
+
+LAYOUTS = ('sheets', 'rows')
+
+MESSAGE_HEADER = ['timestamp', 'role', 'content']
+CONVERSATION_HEADER = ['conversation_id', 'conversation_title', 'conversation_created_at']
+
+
+def _format_time(value) -> str:
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+def clean_cell(text: str, sheet) -> Any:
+    """
+    Make text safe for a worksheet cell.
+
+    Control characters that XLSX cannot store are removed, and text over
+    Excel's per-cell limit is truncated with a marker. Text that starts like
+    a formula (``=``, ``+``, ``-``, ``@``) becomes a cell explicitly typed as
+    a string, so openpyxl never writes it as a formula.
+
+    Args:
+        text: Cell text
+        sheet: Worksheet the value is appended to
+
+    Returns:
+        Value for ``sheet.append``: the text, or a string-typed cell
+    """
+    return _string_cell(_clean_text(text), sheet)
+
+
+def _clean_text(text: str) -> str:
+    """Remove characters XLSX cannot store and truncate to the cell limit."""
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    text = ILLEGAL_CHARACTERS_RE.sub('', text)
+    if len(text) > MAX_CELL_CHARS:
+        text = text[:MAX_CELL_CHARS - len(TRUNCATION_MARKER)] + TRUNCATION_MARKER
+    return text
+
+
+def _string_cell(value: Any, sheet) -> Any:
+    """Wrap formula-like text in a new string-typed cell of ``sheet``."""
+    if not isinstance(value, str) or not value.startswith(FORMULA_PREFIXES):
+        return value
+    from openpyxl.cell import WriteOnlyCell
+
+    # A new cell per row: openpyxl reuses an appended cell for later columns
+    cell = WriteOnlyCell(sheet, value=value)
+    cell.data_type = 's'
+    return cell
+
+
+class _SheetWriter:
+    """Appends rows to a write-only sheet, starting a new sheet when full."""
+
+    def __init__(self, workbook, title: str, header: List[str]):
+        self.workbook = workbook
+        self.title = title
+        self.header = header
+        self.part = 0
+        self.rows = MAX_SHEET_ROWS
+        self.sheet = None
+
+    def append(self, row: list) -> None:
+        """Append a row of cleaned text; formula-like text stays text."""
+        if self.rows >= MAX_SHEET_ROWS:
+            self.part += 1
+            suffix = f" ({self.part})" if self.part > 1 else ''
+            title = self.title[:MAX_SHEET_TITLE_CHARS - len(suffix)] + suffix
+            self.sheet = self.workbook.create_sheet(title=title)
+            self.sheet.append(self.header)
+            self.rows = 1
+        self.sheet.append([_string_cell(value, self.sheet) for value in row])
+        self.rows += 1
+
+
+def write_workbook(
+    conversations: Iterable[Conversation],
+    out_path: str,
+    layout: str = 'sheets'
+) -> int:
+    """
+    Write every message of an archive to a single XLSX workbook.
+
+    Args:
+        conversations: Conversations to export, consumed one at a time
+        out_path: Path of the .xlsx file
+        layout: 'sheets' for one sheet per source, 'rows' for a single
+            sheet with a source column; both have one row per message with
+            the conversation's ID, title and creation time
+
+    Returns:
+        Number of message rows written
+    """
+    from openpyxl import Workbook
+
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown workbook layout '{layout}' (expected one of {', '.join(LAYOUTS)})")
+
+    workbook = Workbook(write_only=True)
+    writers: Dict[str, _SheetWriter] = {}
+    single: Optional[_SheetWriter] = None
+    if layout == 'rows':
+        single = _SheetWriter(workbook, 'messages', ['source'] + CONVERSATION_HEADER + MESSAGE_HEADER)
+
+    count = 0
+    for conv in conversations:
+        conv_cells = [_clean_text(conv.id), _clean_text(conv.title), _format_time(conv.created_at)]
+        if single is not None:
+            writer, prefix = single, [conv.source] + conv_cells
+        else:
+            writer = writers.get(conv.source)
+            if writer is None:
+                writer = writers[conv.source] = _SheetWriter(
+                    workbook, conv.source, CONVERSATION_HEADER + MESSAGE_HEADER
+                )
+            prefix = conv_cells
+
+        for msg in conv.messages:
+            writer.append(prefix + [_format_time(msg.timestamp), msg.role, _clean_text(msg.content)])
+            count += 1
+
+    if not workbook.worksheets:
+        # A workbook needs at least one sheet
+        workbook.create_sheet(title='messages').append(CONVERSATION_HEADER + MESSAGE_HEADER)
+
+    workbook.save(out_path)
+    return count
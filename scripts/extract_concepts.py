@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
 # Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
-import json
+import os
 import sys
+import json
+import asyncio
 import argparse
+import sqlite3
+from typing import Dict, Optional
+
+from config import get_config
+from concepts.cache import CACHE_FILENAME, ConceptCache
+from concepts.extraction import DEFAULT_HOST, MAX_TEXT_CHARS, PROMPT_TEMPLATE, PROMPT_VERSION
 
 try:
     import ollama
@@ -14,13 +22,6 @@ try:
 except ImportError:
     lmstudio = None
 
-PROMPT_TEMPLATE = (
-    "You are an information extraction agent. "
-    "Given the following text, identify the main concepts as a list of strings "
-    "and any directed relationships between them as triples [source, relation, target]. "
-    "Respond in JSON with keys 'concepts' and 'relations'.\nText:\n{text}"
-)
-
 
 def run_model(text: str, model: str):
     if ollama:
@@ -34,17 +35,97 @@ def run_model(text: str, model: str):
         raise RuntimeError("No LLM backend available. Install ollama or lmstudio.")
 
 
+def open_cache(args) -> Optional[ConceptCache]:
+    """Open the result cache, or None if disabled or unavailable."""
+    if args.no_cache:
+        return None
+    try:
+        return ConceptCache(os.path.join(str(get_config().cache_dir), CACHE_FILENAME), PROMPT_VERSION)
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def run_archive(args, cache: Optional[ConceptCache]) -> Dict[str, int]:
+    """Extract concepts from every message of the archive into a JSONL file."""
+    from concepts.extraction import OllamaHttpClient, extract_archive, iter_archive, iter_items
+
+    client = OllamaHttpClient(args.host, timeout=args.timeout)
+    items = iter_items(iter_archive(args.input_dir), max_chars=args.max_chars)
+    with open(args.output, 'w', encoding='utf-8') as out:
+        return asyncio.run(extract_archive(
+            items, out, client, args.model,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            batch_chars=args.batch_chars,
+            cache=cache,
+        ))
+
+
+def print_cache_stats(cache: ConceptCache) -> None:
+    stats = cache.stats()
+    print(f"Concept cache: {stats['path']} ({stats['size_bytes'] / 1024:.0f} KB)")
+    for entry in stats['entries']:
+        print(f"  {entry['model']} (prompt v{entry['prompt_version']}): {entry['entries']} results")
+    print(f"  Lifetime lookups: {stats['hits']} hits, {stats['misses']} misses "
+          f"({stats['hit_rate']:.1%} hit rate)")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Extract concepts using a local LLM")
     parser.add_argument("--model", default="deepseek-r1_0528")
-    parser.add_argument("text")
+    parser.add_argument("text", nargs="?", help="Text to analyse (omit with --archive)")
+    parser.add_argument("--archive", action="store_true",
+                        help="Extract from every message of the parsed archive instead of one text")
+    parser.add_argument("--input-dir", default=str(get_config().raw_data_dir), help="Directory with the raw exports")
+    parser.add_argument("-o", "--output", default="concepts.jsonl", help="JSONL output file for --archive")
+    parser.add_argument("--host", default=os.environ.get("OLLAMA_HOST", DEFAULT_HOST),
+                        help="Ollama-compatible server (default: OLLAMA_HOST)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent requests")
+    parser.add_argument("--batch-size", type=int, default=8, help="Messages per prompt")
+    parser.add_argument("--batch-chars", type=int, default=6000, help="Maximum message characters per prompt")
+    parser.add_argument("--max-chars", type=int, default=MAX_TEXT_CHARS, help="Truncate longer messages")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for one reply")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or store cached results")
+    parser.add_argument("--cache-stats", action="store_true", help="Report result cache contents and hit rate")
     args = parser.parse_args()
 
-    raw = run_model(args.text, args.model)
-    try:
-        data = json.loads(raw)
-    except json.JSONDecodeError:
-        data = {"concepts": [], "relations": []}
+    if args.cache_stats:
+        args.no_cache = False
+        cache = open_cache(args)
+        if cache is None:
+            raise SystemExit("The concept cache could not be opened")
+        with cache:
+            print_cache_stats(cache)
+        return
+
+    if args.archive:
+        cache = open_cache(args)
+        try:
+            stats = run_archive(args, cache)
+        finally:
+            if cache is not None:
+                cache.close()
+        hit_rate = stats['cached'] / stats['messages'] if stats['messages'] else 0.0
+        print(f"Extracted {stats['messages']} messages in {stats['batches']} batches "
+              f"({stats['requests']} requests, {stats['failed']} failed, "
+              f"{stats['cached']} cached = {hit_rate:.1%} hit rate) -> {args.output}", file=sys.stderr)
+        return
+    if args.text is None:
+        parser.error("text is required unless --archive is given")
+
+    cache = open_cache(args)
+    data = cache.get(args.model, args.text) if cache is not None else None
+    if data is None:
+        raw = run_model(args.text, args.model)
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            data = {"concepts": [], "relations": []}
+        else:
+            if cache is not None and isinstance(data, dict):
+                cache.put(args.model, args.text, data)
+    if cache is not None:
+        cache.close()
     print(json.dumps(data))
 
 
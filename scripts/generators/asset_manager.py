@@ -1,178 +1,298 @@
 # Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
 """
-Asset manager for copying CSS, JS, and other static files.
+Asset manager for building and installing CSS, JS, and other static files.
+
+Assets are built once per manager: the stylesheet and script are minified,
+and the favicon, manifest and robots.txt are generated. The stylesheet,
+script and favicon are then named after a digest of their content (e.g.
+``style.3f2a9c1b0d.css``). Their URLs change exactly when their content
+does, so they can be cached forever.
+
+With a store directory, built files are written there once and linked into
+each export. A link is a reflink where the file system supports it, else a
+hardlink, else a copy. Store files are read-only, so editing an export
+cannot change the files other exports share.
 """
 import os
+import sys
+import json
 import shutil
-from typing import List, Dict
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from generators.asset_minifier import minify_css, minify_js
+
+# Assets served under content-hashed names; the others keep their names
+FINGERPRINTED_ASSETS = ('style.css', 'script.js', 'favicon.svg')
+FINGERPRINT_LENGTH = 10
+
+# File names of unbuilt assets, as linked by pages rendered without a build
+PLAIN_ASSET_NAMES = {name: name for name in ('style.css', 'script.js', 'favicon.svg', 'manifest.json', 'robots.txt')}
+
+# Cache-Control of fingerprinted assets
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Static-host header rules (Netlify / Cloudflare Pages format)
+HEADERS_FILENAME = '_headers'
+
+# Linux ioctl cloning a file's extents into another (copy-on-write)
+_FICLONE = 0x40049409
+
+FAVICON_SVG = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 32 32">
+  <rect width="32" height="32" fill="#007AFF" rx="6"/>
+  <path d="M8 12h16v2H8zm0 4h16v2H8zm0 4h12v2H8z" fill="white"/>
+</svg>'''
+
+ROBOTS_TXT = """User-agent: *
+Disallow: /assets/
+Allow: /
+
+# This is a personal chat archive
+# Please respect privacy
+"""
+
+
+def fingerprint_name(name: str, content: bytes) -> str:
+    """``style.css`` -> ``style.<digest>.css`` for the given content."""
+    stem, ext = os.path.splitext(name)
+    digest = hashlib.sha256(content).hexdigest()[:FINGERPRINT_LENGTH]
+    return f"{stem}.{digest}{ext}"
+
+
+def link_file(source: str, destination: str) -> str:
+    """
+    Make ``destination`` a reflink, hardlink or copy of ``source``.
+
+    An existing destination is replaced.
+
+    Args:
+        source: File to link to
+        destination: Path of the new file
+
+    Returns:
+        'reflink', 'hardlink' or 'copy', whichever succeeded
+    """
+    temp_path = f"{destination}.{os.getpid()}.tmp"
+    try:
+        method = _reflink(source, temp_path)
+        if method is None:
+            try:
+                os.link(source, temp_path)
+                method = 'hardlink'
+            except OSError:
+                shutil.copyfile(source, temp_path)
+                method = 'copy'
+        os.replace(temp_path, destination)
+        return method
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _reflink(source: str, destination: str) -> Optional[str]:
+    """Clone ``source`` to a new ``destination`` file, or None if unsupported."""
+    if fcntl is None or not sys.platform.startswith('linux'):
+        return None
+    try:
+        with open(source, 'rb') as src, open(destination, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return 'reflink'
+    except OSError:
+        try:
+            os.remove(destination)
+        except OSError:
+            pass
+        return None
 
 
 class AssetManager:
-    """Manages copying and organizing static assets."""
-    
-    def __init__(self, source_assets_dir: str):
+    """Builds, fingerprints and installs static assets."""
+
+    def __init__(self, source_assets_dir: str, store_dir: Optional[str] = None, minify: bool = True):
         """
         Initialize the asset manager.
-        
+
         Args:
             source_assets_dir: Path to source assets directory
+            store_dir: Shared directory of built assets to link exports to
+                (None writes every file into each export)
+            minify: Minify the stylesheet and script
         """
         self.source_assets_dir = source_assets_dir
-    
-    def copy_assets(self, destination_dir: str) -> bool:
+        self.store_dir = store_dir
+        self.minify = minify
+        # Built assets by site name: asset -> (file name, content)
+        self._built: Dict[str, Dict[str, Tuple[str, bytes]]] = {}
+        # Installs of the last setup by method ('reflink', 'hardlink', 'copy', 'write')
+        self.install_counts: Dict[str, int] = {}
+
+    def build(self, site_name: str = "Chat Archive") -> Dict[str, Tuple[str, bytes]]:
         """
-        Copy all assets to the destination directory.
-        
+        Build the assets; later calls return the same build.
+
         Args:
-            destination_dir: Destination directory for assets
-            
+            site_name: Name of the site, used in the web app manifest
+
         Returns:
-            True if successful, False otherwise
+            Dictionary mapping asset names to their file name and content
         """
-        import os, shutil, sys
-        assets = self.get_asset_list()
-        os.makedirs(destination_dir, exist_ok=True)
-        for asset in assets:
-            src = os.path.join(self.source_assets_dir, asset)
-            dest = os.path.join(destination_dir, asset)
+        if site_name in self._built:
+            return self._built[site_name]
+
+        contents: Dict[str, bytes] = {}
+        for name, minifier in (('style.css', minify_css), ('script.js', minify_js)):
+            path = os.path.join(self.source_assets_dir, name)
             try:
-                shutil.copy2(src, dest)
+                with open(path, 'r', encoding='utf-8') as f:
+                    source = f.read()
             except FileNotFoundError:
-                print(f"Warning: asset '{asset}' not found in '{self.source_assets_dir}'", file=sys.stderr)
-        return True
-    
-    def create_favicon(self, destination_dir: str) -> bool:
-        """
-        Create a simple favicon for the site.
-        
-        Args:
-            destination_dir: Destination directory for favicon
-            
-        Returns:
-            True if successful, False otherwise
-        """
-        try:
-            # Create a simple SVG favicon
-            favicon_svg = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 32 32">
-  <rect width="32" height="32" fill="#007AFF" rx="6"/>
-  <path d="M8 12h16v2H8zm0 4h16v2H8zm0 4h12v2H8z" fill="white"/>
-</svg>'''
-            
-            favicon_path = os.path.join(destination_dir, 'favicon.svg')
-            with open(favicon_path, 'w', encoding='utf-8') as f:
-                f.write(favicon_svg)
-            
-            print("Created favicon.svg")
-            return True
-            
-        except Exception as e:
-            print(f"Error creating favicon: {e}")
-            return False
-    
-    def create_manifest(self, destination_dir: str, site_name: str = "Chat Archive") -> bool:
+                print(f"Warning: asset '{name}' not found in '{self.source_assets_dir}'", file=sys.stderr)
+                continue
+            contents[name] = (minifier(source) if self.minify else source).encode('utf-8')
+        contents['favicon.svg'] = FAVICON_SVG.encode('utf-8')
+
+        built = {
+            name: (fingerprint_name(name, content) if name in FINGERPRINTED_ASSETS else name, content)
+            for name, content in contents.items()
+        }
+        # The manifest refers to the favicon by its final name
+        manifest = self._manifest(site_name, built['favicon.svg'][0])
+        built['manifest.json'] = ('manifest.json', manifest)
+        built['robots.txt'] = ('robots.txt', ROBOTS_TXT.encode('utf-8'))
+
+        self._built[site_name] = built
+        return built
+
+    def asset_names(self, site_name: str = "Chat Archive") -> Dict[str, str]:
         """
-        Create a web app manifest for the site.
-        
+        File names of the built assets, for templates to link to.
+
         Args:
-            destination_dir: Destination directory for manifest
             site_name: Name of the site
-            
-        Returns:
-            True if successful, False otherwise
-        """
-        try:
-            manifest = {
-                "name": site_name,
-                "short_name": "Chat Archive",
-                "description": "HTML Chat Archive Viewer",
-                "start_url": "./index.html",
-                "display": "standalone",
-                "background_color": "#ffffff",
-                "theme_color": "#007AFF",
-                "icons": [
-                    {
-                        "src": "favicon.svg",
-                        "sizes": "any",
-                        "type": "image/svg+xml"
-                    }
-                ]
-            }
-            
-            manifest_path = os.path.join(destination_dir, 'manifest.json')
-            import json
-            with open(manifest_path, 'w', encoding='utf-8') as f:
-                json.dump(manifest, f, indent=2)
-            
-            print("Created manifest.json")
-            return True
-            
-        except Exception as e:
-            print(f"Error creating manifest: {e}")
-            return False
-    
-    def create_robots_txt(self, destination_dir: str) -> bool:
-        """
-        Create a robots.txt file.
-        
-        Args:
-            destination_dir: Destination directory for robots.txt
-            
+
         Returns:
-            True if successful, False otherwise
+            Dictionary mapping asset names (e.g. 'style.css') to file names
         """
-        try:
-            robots_content = """User-agent: *
-Disallow: /assets/
-Allow: /
+        built = self.build(site_name)
+        return {**PLAIN_ASSET_NAMES, **{name: file_name for name, (file_name, _) in built.items()}}
 
-# This is a personal chat archive
-# Please respect privacy
-"""
-            
-            robots_path = os.path.join(destination_dir, 'robots.txt')
-            with open(robots_path, 'w', encoding='utf-8') as f:
-                f.write(robots_content)
-            
-            print("Created robots.txt")
-            return True
-            
-        except Exception as e:
-            print(f"Error creating robots.txt: {e}")
-            return False
-    
     def setup_complete_assets(self, destination_dir: str, site_name: str = "Chat Archive") -> bool:
         """
         Set up all assets and meta files for the site.
-        
+
+        Files of earlier builds in the destination are left in place, so
+        pages rendered against them keep working.
+
         Args:
             destination_dir: Destination directory
             site_name: Name of the site
-            
+
         Returns:
             True if all operations successful, False otherwise
         """
         success = True
-        
-        # Copy main assets
-        if not self.copy_assets(destination_dir):
-            success = False
-        
-        # Create favicon
-        if not self.create_favicon(destination_dir):
-            success = False
-        
-        # Create manifest
-        if not self.create_manifest(destination_dir, site_name):
-            success = False
-        
-        # Create robots.txt
-        if not self.create_robots_txt(destination_dir):
-            success = False
-        
+        self.install_counts = {}
+        os.makedirs(destination_dir, exist_ok=True)
+
+        for name, (file_name, content) in self.build(site_name).items():
+            # Store files are named by content, including the unfingerprinted ones
+            store_name = file_name if name in FINGERPRINTED_ASSETS else fingerprint_name(name, content)
+            try:
+                method = self._install(store_name, content, os.path.join(destination_dir, file_name))
+            except OSError as e:
+                print(f"Error installing asset '{file_name}': {e}")
+                success = False
+                continue
+            self.install_counts[method] = self.install_counts.get(method, 0) + 1
+
+        summary = ', '.join(f"{count} {method}" for method, count in sorted(self.install_counts.items()))
+        print(f"Installed {sum(self.install_counts.values())} assets ({summary})")
         return success
-    
-    def get_asset_list(self) -> List[str]:
+
+    def write_cache_headers(
+        self,
+        site_dir: str,
+        assets_url: str = "/assets",
+        site_name: str = "Chat Archive"
+    ) -> str:
+        """
+        Write long-lived cache headers for the fingerprinted assets.
+
+        The ``_headers`` file is read by static hosts such as Netlify and
+        Cloudflare Pages. Other servers can be configured from the same list.
+
+        Args:
+            site_dir: Root directory of the exported site
+            assets_url: URL path the assets directory is served under
+            site_name: Name of the site
+
+        Returns:
+            Path of the written file
         """
-        Get a list of all assets in the source directory, including subdirectories.
+        lines = []
+        for name, (file_name, _) in sorted(self.build(site_name).items()):
+            if name in FINGERPRINTED_ASSETS:
+                lines.append(f"{assets_url.rstrip('/')}/{file_name}")
+                lines.append(f"  Cache-Control: {IMMUTABLE_CACHE_CONTROL}")
+
+        path = os.path.join(site_dir, HEADERS_FILENAME)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def get_asset_list(self, site_name: str = "Chat Archive") -> List[str]:
         """
-        return ['style.css', 'script.js', 'manifest.json', 'favicon.svg']
\ No newline at end of file
+        Get the file names of all built assets, as installed in an export.
+
+        Args:
+            site_name: Name of the site
+
+        Returns:
+            File names, fingerprinted where the asset is
+        """
+        return [file_name for file_name, _ in self.build(site_name).values()]
+
+    def _install(self, store_name: str, content: bytes, destination: str) -> str:
+        """Install one asset, linking it from the store if there is one."""
+        if not self.store_dir:
+            with open(destination, 'wb') as f:
+                f.write(content)
+            return 'write'
+
+        store_path = os.path.join(self.store_dir, store_name)
+        if not os.path.exists(store_path):
+            os.makedirs(self.store_dir, exist_ok=True)
+            temp_path = f"{store_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(content)
+            os.chmod(temp_path, 0o444)
+            os.replace(temp_path, store_path)
+        return link_file(store_path, destination)
+
+    def _manifest(self, site_name: str, favicon_name: str) -> bytes:
+        """Web app manifest of the site."""
+        manifest = {
+            "name": site_name,
+            "short_name": "Chat Archive",
+            "description": "HTML Chat Archive Viewer",
+            "start_url": "../index.html",
+            "display": "standalone",
+            "background_color": "#ffffff",
+            "theme_color": "#007AFF",
+            "icons": [
+                {
+                    "src": favicon_name,
+                    "sizes": "any",
+                    "type": "image/svg+xml"
+                }
+            ]
+        }
+        return json.dumps(manifest, indent=2).encode('utf-8')
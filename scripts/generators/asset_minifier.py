@@ -0,0 +1,224 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Comment and whitespace minification for the site's CSS and JavaScript.
+
+Both minifiers are deliberately conservative: they tokenize just enough to
+leave strings, template literals and regular expressions untouched, remove
+comments, and collapse whitespace. Nothing is renamed or rewritten, so the
+output behaves exactly like the source. JavaScript keeps its line breaks,
+so automatic semicolon insertion is unaffected.
+"""
+import re
+
+_CSS_TOKEN_RE = re.compile(
+    r'(?P<string>"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')'
+    r'|(?P<comment>/\*.*?\*/)'
+    r'|(?P<space>\s+)',
+    re.DOTALL
+)
+# Characters around which CSS whitespace is never significant
+_CSS_TIGHT = frozenset('{};,>')
+
+# Characters after which a "/" starts a regular expression, not a division
+_REGEX_PRECEDERS = frozenset('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'yield', 'await')
+# Characters around which JavaScript spaces (not line breaks) can be dropped
+_JS_TIGHT = frozenset('{}();,=:[]')
+
+
+def minify_css(source: str) -> str:
+    """
+    Remove comments and insignificant whitespace from a stylesheet.
+
+    Args:
+        source: CSS source
+
+    Returns:
+        Minified CSS
+    """
+    pieces = []
+    position = 0
+    for match in _CSS_TOKEN_RE.finditer(source):
+        pieces.append(source[position:match.start()])
+        position = match.end()
+        if match.lastgroup == 'string':
+            pieces.append(match.group(0))
+        else:
+            # Comments and whitespace both separate tokens at most
+            pieces.append(' ')
+    pieces.append(source[position:])
+
+    text = ''.join(pieces)
+    out = []
+    for index, char in enumerate(text):
+        if char == ' ':
+            before = out[-1] if out else ''
+            after = text[index + 1] if index + 1 < len(text) else ''
+            if not before or before in _CSS_TIGHT or before in ' :' or after in _CSS_TIGHT or after == ' ':
+                continue
+        elif char == '}' and out and out[-1] == ';':
+            out.pop()
+        out.append(char)
+    return ''.join(out).strip()
+
+
+def minify_js(source: str) -> str:
+    """
+    Remove comments, indentation and blank lines from a script.
+
+    Args:
+        source: JavaScript source
+
+    Returns:
+        Minified JavaScript
+    """
+    out = []
+    # Brace depth of the code inside each open template substitution
+    templates = []
+    length = len(source)
+    i = 0
+
+    def gap(whitespace: str, following: str) -> None:
+        # Indentation and blank lines go; a line break or a single space
+        # between tokens stays
+        previous = out[-1][-1:] if out else ''
+        if not previous or previous == '\n':
+            return
+        if '\n' in whitespace:
+            if previous == ' ':
+                out.pop()
+            out.append('\n')
+        elif previous != ' ' and previous not in _JS_TIGHT and following not in _JS_TIGHT:
+            out.append(' ')
+
+    def last_significant() -> str:
+        for piece in reversed(out):
+            stripped = piece.rstrip(' \n')
+            if stripped:
+                return stripped
+        return ''
+
+    while i < length:
+        char = source[i]
+
+        if char in ' \t\r\n':
+            end = i
+            while end < length and source[end] in ' \t\r\n':
+                end += 1
+            gap(source[i:end], source[end:end + 1])
+            i = end
+            continue
+
+        if char == '/' and source.startswith('//', i):
+            end = source.find('\n', i)
+            i = length if end < 0 else end
+            continue
+
+        if char == '/' and source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = length if end < 0 else end + 2
+            # A comment containing a line break still ends the statement
+            gap('\n' if '\n' in source[i:end] else ' ', source[end:end + 1])
+            i = end
+            continue
+
+        if char in '\'"':
+            end = _skip_quoted(source, i, char)
+            out.append(source[i:end])
+            i = end
+            continue
+
+        if char == '`' or (char == '}' and templates and templates[-1] == 0):
+            if char == '}':
+                templates.pop()
+            end, substitution = _skip_template(source, i + 1)
+            out.append(source[i:end])
+            i = end
+            if substitution:
+                templates.append(0)
+            continue
+
+        if char == '/' and _starts_regex(last_significant()):
+            end = _skip_regex(source, i)
+            out.append(source[i:end])
+            i = end
+            continue
+
+        if templates:
+            if char == '{':
+                templates[-1] += 1
+            elif char == '}':
+                templates[-1] -= 1
+        if out and out[-1] == ' ' and char in _JS_TIGHT:
+            out.pop()
+        out.append(char)
+        i += 1
+
+    return ''.join(out).strip() + '\n'
+
+
+def _skip_quoted(source: str, start: int, quote: str) -> int:
+    """End of the string literal opening at ``start``."""
+    i = start + 1
+    while i < len(source):
+        if source[i] == '\\':
+            i += 2
+            continue
+        if source[i] == quote or source[i] == '\n':
+            return i + 1
+        i += 1
+    return len(source)
+
+
+def _skip_template(source: str, start: int):
+    """
+    End of a template literal chunk starting after its "`" or "}".
+
+    Returns:
+        Index after the chunk, and whether it ended at a ``${`` substitution
+    """
+    i = start
+    while i < len(source):
+        if source[i] == '\\':
+            i += 2
+            continue
+        if source[i] == '`':
+            return i + 1, False
+        if source.startswith('${', i):
+            return i + 2, True
+        i += 1
+    return len(source), False
+
+
+def _starts_regex(previous: str) -> bool:
+    """Whether a "/" after ``previous`` output starts a regular expression."""
+    if not previous:
+        return True
+    if previous[-1] in _REGEX_PRECEDERS:
+        return True
+    word = re.search(r'[A-Za-z_$][\w$]*$', previous)
+    return bool(word) and word.group(0) in _REGEX_KEYWORDS
+
+
+def _skip_regex(source: str, start: int) -> int:
+    """End of the regular expression literal (with flags) opening at ``start``."""
+    i = start + 1
+    in_class = False
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '\n':
+            return i
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            while i < len(source) and (source[i].isalnum() or source[i] in '_$'):
+                i += 1
+            return i
+        i += 1
+    return len(source)
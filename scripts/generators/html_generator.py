@@ -3,36 +3,119 @@
 HTML generator for individual conversation pages.
 """
 import os
+import re
 import json
+import time
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from jinja2 import Template
 from parsers.base_parser import Conversation, Message
+from generators.template_env import get_environment
+from generators.asset_manager import PLAIN_ASSET_NAMES
 import traceback
 import markdown
 
+# Conversations with more messages than this are streamed to disk
+DEFAULT_STREAM_THRESHOLD = 200
+
+# Template chunks buffered between writes when streaming a page
+STREAM_BUFFER_SIZE = 64
+
+# Messages rendered into the page itself; later ones load on scroll
+DEFAULT_SEGMENT_SIZE = 250
+
+# Default memory budget for conversations queued to render workers
+DEFAULT_MEMORY_BUDGET_MB = 1024
+
+# Rough peak memory per byte of message text while a page is rendered
+RENDER_MEMORY_FACTOR = 4
+
+# Markdown punctuation removed from index previews
+_PREVIEW_STRIP_RE = re.compile(r'[#*_>\[\]\(\)`]')
+
+# Side files written next to each page, loaded on demand by script.js
+SEGMENT_FILE_FORMAT = 'segment-{:04d}.js'
+RAW_TEXT_FILE_FORMAT = 'raw-{:04d}.js'
+
+
 class HTMLGenerator:
     """Generates HTML files for individual conversations."""
     
-    def __init__(self, templates_dir: str, assets_dir: str):
+    def __init__(
+        self,
+        templates_dir: str,
+        assets_dir: str,
+        cache_dir: Optional[str] = None,
+        compiled_templates_dir: Optional[str] = None,
+        stream_threshold: int = DEFAULT_STREAM_THRESHOLD,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        minify_html: bool = False,
+        workers: int = 1,
+        memory_budget_mb: int = DEFAULT_MEMORY_BUDGET_MB,
+        asset_names: Optional[Dict[str, str]] = None
+    ):
         """
         Initialize the HTML generator.
         
         Args:
             templates_dir: Path to templates directory
             assets_dir: Path to assets directory
+            cache_dir: Cache root for template bytecode (default: user cache dir)
+            compiled_templates_dir: Directory of precompiled templates, if any
+            stream_threshold: Message count above which pages are streamed to disk
+            segment_size: Messages per page segment (0 puts every message on the page)
+            minify_html: Strip comments and indentation from generated pages
+            workers: Number of processes rendering pages in parallel
+            memory_budget_mb: Memory budget for conversations queued to workers
+            asset_names: File names of the built assets (see
+                ``AssetManager.asset_names``; default: unfingerprinted names)
         """
         self.templates_dir = templates_dir
         self.assets_dir = assets_dir
+        self.stream_threshold = stream_threshold
+        self.segment_size = segment_size
+        self.workers = max(1, workers)
+        self.memory_budget_mb = memory_budget_mb
+        self.asset_names = asset_names or PLAIN_ASSET_NAMES
         
-        # Initialize Jinja2 environment
-        self.env = Environment(
-            loader=FileSystemLoader(templates_dir),
-            autoescape=select_autoescape(['html', 'xml'])
-        )
+        # Settings a worker process needs to build an identical generator
+        self._worker_settings = {
+            'templates_dir': templates_dir,
+            'assets_dir': assets_dir,
+            'cache_dir': cache_dir,
+            'compiled_templates_dir': compiled_templates_dir,
+            'stream_threshold': stream_threshold,
+            'segment_size': segment_size,
+            'minify_html': minify_html,
+            'asset_names': asset_names
+        }
+        
+        # One Markdown instance, reset between messages, is much cheaper
+        # than markdown.markdown() building a new parser per call
+        self._markdown = markdown.Markdown()
+        
+        # Shared Jinja2 environment (custom filters are registered there)
+        self.env = get_environment(templates_dir, cache_dir, compiled_templates_dir, minify_html)
+        self._template: Optional[Template] = None
+        self._segment_template: Optional[Template] = None
         
-        # Add custom filters
-        self.env.filters['nl2br'] = self._nl2br_filter
+        # (conversation, seconds) for each page of the last batch
+        self.render_times: List[Tuple[Conversation, float]] = []
+    
+    @property
+    def template(self) -> Template:
+        """Conversation template, resolved once per generator."""
+        if self._template is None:
+            self._template = self.env.get_template('conversation.html')
+        return self._template
+    
+    @property
+    def segment_template(self) -> Template:
+        """Template for lazily loaded message segments."""
+        if self._segment_template is None:
+            self._segment_template = self.env.get_template('conversation_segment.html')
+        return self._segment_template
         
     def generate_conversation_html(
         self,
@@ -42,11 +125,16 @@ class HTMLGenerator:
         index_relative_path: str = "../index.html",
         source_index_relative_path: Optional[str] = None,
         prev_conversation: Optional[Dict[str, str]] = None,
-        next_conversation: Optional[Dict[str, str]] = None
+        next_conversation: Optional[Dict[str, str]] = None,
+        related_conversations: Optional[List[Dict[str, str]]] = None
     ) -> bool:
         """
         Generate HTML file for a single conversation.
         
+        Only the first segment of messages is rendered into the page. Later
+        segments, and the raw text used by the copy button, are written as
+        side files in a directory named after the page.
+        
         Args:
             conversation: Conversation object to render
             output_path: Path where HTML file should be saved
@@ -55,33 +143,53 @@ class HTMLGenerator:
             source_index_relative_path: Relative path to source-specific index
             prev_conversation: Previous conversation info (filename, title)
             next_conversation: Next conversation info (filename, title)
+            related_conversations: Related conversations info (filename, title)
             
         Returns:
             True if successful, False otherwise
         """
         try:
-            template = self.env.get_template('conversation.html')
+            template = self.template
             
-            # Prepare template context
-            context = {
-                'conversation': conversation,
-                'assets_path': assets_relative_path,
-                'index_path': index_relative_path,
-                'source_index_path': source_index_relative_path,
-                'prev_conversation': prev_conversation,
-                'next_conversation': next_conversation,
-                'generation_date': datetime.now()
-            }
-            
-            # Render HTML
-            html_content = template.render(**context)
+            messages = conversation.messages
+            segment_size, segment_count = self.segment_layout(conversation)
+            page_stem = os.path.splitext(os.path.basename(output_path))[0]
+            context = self._page_context(
+                conversation, page_stem, assets_relative_path, index_relative_path,
+                source_index_relative_path, prev_conversation, next_conversation,
+                related_conversations=related_conversations
+            )
             
             # Ensure output directory exists
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             
-            # Write HTML file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            if min(len(messages), segment_size) > self.stream_threshold:
+                # Write chunks as the template produces them instead of
+                # building the whole page in memory first
+                temp_path = f"{output_path}.tmp"
+                stream = template.stream(**context)
+                stream.enable_buffering(STREAM_BUFFER_SIZE)
+                try:
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        stream.dump(f)
+                    os.replace(temp_path, output_path)
+                except BaseException:
+                    # Never leave a half-written page in the export
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+                    raise
+            else:
+                # Render HTML
+                html_content = template.render(**context)
+                
+                # Write HTML file
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(html_content)
+            
+            side_dir = os.path.join(os.path.dirname(output_path), page_stem)
+            self._write_side_files(messages, side_dir, segment_size, segment_count)
             
             return True
             
@@ -90,6 +198,129 @@ class HTMLGenerator:
             print(f"Error generating HTML for conversation {conversation.title}: {e}")
             return False
     
+    def render_conversation_page(
+        self,
+        conversation: Conversation,
+        page_stem: str,
+        assets_relative_path: str = "../assets",
+        index_relative_path: str = "../index.html",
+        source_index_relative_path: Optional[str] = None,
+        prev_conversation: Optional[Dict[str, str]] = None,
+        next_conversation: Optional[Dict[str, str]] = None,
+        related_conversations: Optional[List[Dict[str, str]]] = None,
+        generation_date: Optional[datetime] = None
+    ) -> str:
+        """
+        Render a conversation page to a string instead of a file.
+        
+        The page is the one ``generate_conversation_html`` writes; its side
+        files are available from ``segment_script`` and ``raw_text_script``.
+        
+        Args:
+            conversation: Conversation object to render
+            page_stem: File name of the page without extension (the side
+                files are loaded from a directory of that name)
+            assets_relative_path: Relative path to assets directory
+            index_relative_path: Relative path to main index
+            source_index_relative_path: Relative path to source-specific index
+            prev_conversation: Previous conversation info (filename, title)
+            next_conversation: Next conversation info (filename, title)
+            related_conversations: Related conversations info (filename, title)
+            generation_date: Generation time passed to the template (default: now)
+            
+        Returns:
+            Page HTML
+        """
+        context = self._page_context(
+            conversation, page_stem, assets_relative_path, index_relative_path,
+            source_index_relative_path, prev_conversation, next_conversation,
+            related_conversations, generation_date
+        )
+        return self.template.render(**context)
+    
+    def segment_layout(self, conversation: Conversation) -> Tuple[int, int]:
+        """
+        Split a conversation into page segments; the page holds the first one.
+        
+        Returns:
+            (messages per segment, number of segments)
+        """
+        count = len(conversation.messages)
+        segment_size = self.segment_size if self.segment_size > 0 else max(count, 1)
+        return segment_size, max(1, -(-count // segment_size))
+    
+    def raw_text_script(self, messages: List[Message], index: int, segment_size: int) -> str:
+        """Side file holding the raw text of one segment, for the copy button."""
+        segment = messages[index * segment_size:(index + 1) * segment_size]
+        return f"receiveRawText({index}, {json.dumps([message.content for message in segment])});\n"
+    
+    def segment_script(self, messages: List[Message], index: int, segment_size: int) -> str:
+        """Side file holding the rendered markup of a segment after the first."""
+        start = index * segment_size
+        segment_html = self.segment_template.render(
+            messages=self._iter_rendered_messages(messages[start:start + segment_size]),
+            first_index=start
+        )
+        return f"receiveSegment({index}, {json.dumps(segment_html)});\n"
+    
+    def conversation_metadata(self, conversation: Conversation, source_subdir: str, filename: str) -> Dict[str, Any]:
+        """
+        Index entry of a conversation page.
+        
+        Args:
+            conversation: Conversation the page shows
+            source_subdir: Subdirectory of the page's source
+            filename: File name of the page (see ``page_filename``)
+            
+        Returns:
+            Metadata dictionary as used by ``IndexGenerator``
+        """
+        return {
+            'title': conversation.title,
+            'filename': f"{source_subdir}/conversations/{filename}",
+            'source': conversation.source,
+            'id': conversation.id,
+            'created_at': conversation.created_at,
+            'updated_at': conversation.updated_at,
+            'message_count': len(conversation.messages),
+            'preview': self._generate_preview(conversation),
+            'uuid': getattr(conversation, "uuid", conversation.id)
+        }
+    
+    def page_filename(self, conversation: Conversation) -> str:
+        """File name of a conversation's page."""
+        return self._generate_safe_filename(conversation)
+    
+    def _page_context(
+        self,
+        conversation: Conversation,
+        page_stem: str,
+        assets_relative_path: str,
+        index_relative_path: str,
+        source_index_relative_path: Optional[str],
+        prev_conversation: Optional[Dict[str, str]],
+        next_conversation: Optional[Dict[str, str]],
+        related_conversations: Optional[List[Dict[str, str]]] = None,
+        generation_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Template context of a conversation page."""
+        segment_size, segment_count = self.segment_layout(conversation)
+        return {
+            'conversation': conversation,
+            'messages': self._iter_rendered_messages(conversation.messages[:segment_size]),
+            'segment_base': f"{page_stem}/",
+            'segment_count': segment_count,
+            'segment_size': segment_size,
+            'assets_path': assets_relative_path,
+            'asset_names': self.asset_names,
+            'index_path': index_relative_path,
+            'source_index_path': source_index_relative_path,
+            'prev_conversation': prev_conversation,
+            'next_conversation': next_conversation,
+            'related_conversations': related_conversations or [],
+            'generation_date': generation_date or datetime.now()
+        }
+    
     def generate_conversations_batch(
         self,
         conversations: List[Conversation],
@@ -97,7 +328,8 @@ class HTMLGenerator:
         source_subdir: str,
         assets_relative_path: str = "../assets",
         index_relative_path: str = "../../index.html",
-        source_index_relative_path: Optional[str] = None
+        source_index_relative_path: Optional[str] = None,
+        related: Optional[Dict[str, List[Dict[str, str]]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Generate HTML files for a batch of conversations.
@@ -109,6 +341,7 @@ class HTMLGenerator:
             assets_relative_path: Relative path to assets
             index_relative_path: Relative path to main index
             source_index_relative_path: Relative path to source index
+            related: Related conversations info (filename, title) by conversation ID
             
         Returns:
             List of conversation metadata for index generation
@@ -122,67 +355,174 @@ class HTMLGenerator:
             key=lambda c: c.created_at or datetime.min
         )
         
-        conversation_metadata = []
+        # Precompute filenames once; each is needed for its own page and
+        # for the prev/next links of its neighbours
+        filenames = [self._generate_safe_filename(c) for c in sorted_conversations]
         
+        jobs = []
         for i, conversation in enumerate(sorted_conversations):
-            # Generate safe filename
-            filename = self._generate_safe_filename(conversation)
-            file_path = os.path.join(conversations_dir, filename)
-            
             # Determine previous and next conversations
             prev_conv = None
             next_conv = None
             
             if i > 0:
-                prev_conversation = sorted_conversations[i - 1]
-                prev_filename = self._generate_safe_filename(prev_conversation)
                 prev_conv = {
-                    'filename': prev_filename,
-                    'title': prev_conversation.title
+                    'filename': filenames[i - 1],
+                    'title': sorted_conversations[i - 1].title
                 }
             
             if i < len(sorted_conversations) - 1:
-                next_conversation = sorted_conversations[i + 1]
-                next_filename = self._generate_safe_filename(next_conversation)
                 next_conv = {
-                    'filename': next_filename,
-                    'title': next_conversation.title
+                    'filename': filenames[i + 1],
+                    'title': sorted_conversations[i + 1].title
                 }
             
-            # Convert markdown content of each message to HTML
-            for message in conversation.messages:
-                message.content_html = markdown.markdown(message.content)
-            
-            # Generate HTML
-            success = self.generate_conversation_html(
-                conversation=conversation,
-                output_path=file_path,
-                assets_relative_path=assets_relative_path,
-                index_relative_path=index_relative_path,
-                source_index_relative_path=source_index_relative_path,
-                prev_conversation=prev_conv,
-                next_conversation=next_conv
-            )
-            
+            jobs.append({
+                'conversation': conversation,
+                'output_path': os.path.join(conversations_dir, filenames[i]),
+                'assets_relative_path': assets_relative_path,
+                'index_relative_path': index_relative_path,
+                'source_index_relative_path': source_index_relative_path,
+                'prev_conversation': prev_conv,
+                'next_conversation': next_conv,
+                'related_conversations': (related or {}).get(conversation.id)
+            })
+        
+        # Generate HTML
+        if self.workers > 1 and len(jobs) > 1:
+            outcomes = self._generate_parallel(jobs)
+        else:
+            outcomes = [_timed_render(self, job) for job in jobs]
+        results = [success for success, _ in outcomes]
+        self.render_times = [
+            (conversation, seconds) for conversation, (_, seconds) in zip(sorted_conversations, outcomes)
+        ]
+        
+        conversation_metadata = []
+        
+        for conversation, filename, success in zip(sorted_conversations, filenames, results):
             if success:
                 # Create metadata for index
-                metadata = {
-                    'title': conversation.title,
-                    'filename': f"{source_subdir}/conversations/{filename}",
-                    'source': conversation.source,
-                    'id': conversation.id,
-                    'created_at': conversation.created_at,
-                    'updated_at': conversation.updated_at,
-                    'message_count': len(conversation.messages),
-                    'preview': self._generate_preview(conversation),
-                    'uuid': getattr(conversation, "uuid", conversation.id)
-                }
-                conversation_metadata.append(metadata)
+                conversation_metadata.append(self.conversation_metadata(conversation, source_subdir, filename))
             else:
                 print(f"Failed to generate HTML for conversation: {conversation.title}")
         
         return conversation_metadata
     
+    def _generate_parallel(self, jobs: List[Dict[str, Any]]) -> List[Tuple[bool, float]]:
+        """
+        Render pages in worker processes.
+        
+        Jobs are submitted in order, but only while the estimated memory of
+        the conversations in flight stays within the memory budget.
+        
+        Args:
+            jobs: Keyword arguments for generate_conversation_html, one per page
+            
+        Returns:
+            Success flag and render seconds for each job, in job order
+        """
+        # Imported here: multiprocessing is only needed with workers > 1
+        from concurrent.futures import ProcessPoolExecutor
+        
+        results = [(False, 0.0)] * len(jobs)
+        budget = self.memory_budget_mb * 1024 * 1024
+        pending: Dict[Future, Tuple[int, int]] = {}
+        in_flight = 0
+        
+        def collect(futures) -> int:
+            freed = 0
+            for future in futures:
+                index, cost = pending.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    print(f"Error generating HTML for conversation {jobs[index]['conversation'].title}: {e}")
+                freed += cost
+            return freed
+        
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_render_worker,
+            initargs=(self._worker_settings,)
+        ) as executor:
+            for index, job in enumerate(jobs):
+                cost = _estimate_render_bytes(job['conversation'])
+                while pending and in_flight + cost > budget:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    in_flight -= collect(done)
+                
+                pending[executor.submit(_render_in_worker, job)] = (index, cost)
+                in_flight += cost
+            
+            collect(list(pending))
+        
+        return results
+    
+    def _write_side_files(
+        self,
+        messages: List[Message],
+        side_dir: str,
+        segment_size: int,
+        segment_count: int
+    ) -> None:
+        """
+        Write the on-demand files for a conversation page.
+        
+        Every segment gets a raw-text file for the copy button; segments after
+        the first also get their rendered markup. Both are small JavaScript
+        files so they load from file:// as well as from a web server.
+        
+        Args:
+            messages: All messages of the conversation
+            side_dir: Directory for the side files
+            segment_size: Messages per segment
+            segment_count: Number of segments
+        """
+        os.makedirs(side_dir, exist_ok=True)
+        
+        for index in range(segment_count):
+            self._write_script(
+                os.path.join(side_dir, RAW_TEXT_FILE_FORMAT.format(index)),
+                self.raw_text_script(messages, index, segment_size)
+            )
+            
+            if index > 0:
+                self._write_script(
+                    os.path.join(side_dir, SEGMENT_FILE_FORMAT.format(index)),
+                    self.segment_script(messages, index, segment_size)
+                )
+    
+    def _write_script(self, path: str, content: str) -> None:
+        """Write a generated JavaScript side file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    
+    def _iter_rendered_messages(self, messages: List[Message]) -> Iterator[Message]:
+        """
+        Yield messages with ``content_html`` attached one at a time.
+        
+        The template pulls messages lazily, so only the message currently
+        being written holds its rendered HTML.
+        
+        Args:
+            messages: Messages of the conversation being rendered
+            
+        Yields:
+            Message objects with ``content_html`` set
+        """
+        for message in messages:
+            message.content_html = self._render_markdown(message.content)
+            try:
+                yield message
+            finally:
+                # Release the rendered HTML once it has been written
+                del message.content_html
+    
+    def _render_markdown(self, text: str) -> str:
+        """Convert message markdown to HTML."""
+        return self._markdown.reset().convert(text)
+    
     def _generate_safe_filename(self, conversation: Conversation) -> str:
         """Generate a safe filename for the conversation."""
         # Clean title for filename
@@ -211,26 +551,43 @@ class HTMLGenerator:
         Returns:
             Preview text string
         """
-        import re
         raw = conversation.messages[-1].content if conversation.messages else ''
-        plain = re.sub(r'[#*_>\[\]\(\)`]', '', raw)
-        content = plain
-        return content.strip()[:100]
-    
-    def _nl2br_filter(self, text: str) -> str:
-        """
-        Jinja2 filter to convert newlines to HTML line breaks.
-        
-        Args:
-            text: Input text
-            
-        Returns:
-            Text with newlines converted to <br> tags
-        """
-        if not text:
-            return ""
-        
-        # Escape HTML first, then convert newlines
-        from markupsafe import escape
-        escaped = escape(text)
-        return str(escaped).replace('\n', '<br>\n')
\ No newline at end of file
+        return preview_text(raw)
+
+
+def preview_text(raw: str) -> str:
+    """Index preview of a message: Markdown punctuation removed, first 100 characters."""
+    plain = _PREVIEW_STRIP_RE.sub('', raw)
+    return plain.strip()[:100]
+
+
+# Generator used by each render worker process
+_worker_generator: Optional[HTMLGenerator] = None
+
+
+def _init_render_worker(settings: Dict[str, Any]) -> None:
+    """Create the per-process generator for render workers."""
+    global _worker_generator
+    # Imported in the worker only: the generators do not depend on the
+    # profiling module otherwise
+    from profiling import init_worker as init_profiling_worker
+    init_profiling_worker()
+    _worker_generator = HTMLGenerator(**settings)
+
+
+def _timed_render(generator: HTMLGenerator, job: Dict[str, Any]) -> Tuple[bool, float]:
+    """Render one page, returning its success flag and render time."""
+    start = time.perf_counter()
+    success = generator.generate_conversation_html(**job)
+    return success, time.perf_counter() - start
+
+
+def _render_in_worker(job: Dict[str, Any]) -> Tuple[bool, float]:
+    """Render one conversation page in a worker process."""
+    return _timed_render(_worker_generator, job)
+
+
+def _estimate_render_bytes(conversation: Conversation) -> int:
+    """Estimate the memory needed to ship and render a conversation."""
+    text_bytes = sum(len(message.content) for message in conversation.messages)
+    return text_bytes * RENDER_MEMORY_FACTOR
@@ -0,0 +1,112 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Whitespace and comment minification for HTML templates.
+
+Minification is applied to template *source* by ``MinifyingLoader``, so it
+costs nothing per rendered page and works with streamed rendering. Message
+content is inserted at render time and is never touched.
+"""
+import re
+from typing import Callable, List, Optional, Tuple
+from jinja2 import BaseLoader, Environment
+
+
+# Blocks whose contents must be kept byte-for-byte, plus Jinja tags
+_PROTECTED_RE = re.compile(
+    r'<(pre|textarea|script|style)\b.*?</\1\s*>'
+    r'|\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}',
+    re.DOTALL | re.IGNORECASE
+)
+_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+_WHITESPACE_RE = re.compile(r'\s+')
+_TAG_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9]*|!DOCTYPE)\b[^>]*>', re.IGNORECASE)
+_PLACEHOLDER = '\x00{}\x00'
+_STATEMENT_PLACEHOLDER = '\x01{}\x01'
+_PLACEHOLDER_RE = re.compile('[\x00\x01](\\d+)[\x00\x01]')
+# A space before a Jinja statement that is followed by another space
+_STATEMENT_GAP_RE = re.compile(' (\x01\\d+\x01)(?= )')
+
+# Tags whose surrounding whitespace never renders
+BLOCK_TAGS = frozenset({
+    '!doctype', 'html', 'head', 'body', 'title', 'meta', 'link', 'script', 'style',
+    'div', 'main', 'header', 'footer', 'nav', 'section', 'article', 'aside',
+    'ul', 'ol', 'li', 'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'pre', 'table',
+    'thead', 'tbody', 'tr', 'td', 'th', 'select', 'option', 'form', 'br', 'hr',
+    'svg', 'symbol', 'use', 'polyline', 'path', 'button', 'noscript',
+})
+
+
+def minify_html(source: str) -> str:
+    """
+    Remove comments and collapse insignificant whitespace in HTML.
+
+    Whitespace runs become a single space, and are dropped entirely next to
+    block-level tags. ``<pre>``, ``<textarea>``, ``<script>`` and ``<style>``
+    blocks and Jinja tags are left exactly as written.
+
+    Args:
+        source: HTML (or HTML template) source
+
+    Returns:
+        Minified source
+    """
+    protected: List[str] = []
+
+    def protect(match: re.Match) -> str:
+        token = match.group(0)
+        protected.append(token)
+        # Statements render nothing themselves, so the whitespace on both
+        # sides of them can be merged
+        is_statement = token.startswith(('{%', '{#'))
+        placeholder = _STATEMENT_PLACEHOLDER if is_statement else _PLACEHOLDER
+        return placeholder.format(len(protected) - 1)
+
+    text = _PROTECTED_RE.sub(protect, source)
+    text = _COMMENT_RE.sub('', text)
+    text = _WHITESPACE_RE.sub(' ', text)
+    text = _STATEMENT_GAP_RE.sub(r'\1', text)
+    text = _strip_around_block_tags(text)
+
+    return _PLACEHOLDER_RE.sub(lambda m: protected[int(m.group(1))], text).strip()
+
+
+def _strip_around_block_tags(text: str) -> str:
+    """Drop single spaces that sit directly before or after a block-level tag."""
+    pieces = []
+    position = 0
+    for match in _TAG_RE.finditer(text):
+        before = text[position:match.start()]
+        is_block = match.group(2).lower() in BLOCK_TAGS
+        if is_block and before.endswith(' '):
+            before = before[:-1]
+        pieces.append(before)
+        pieces.append(match.group(0))
+        position = match.end()
+        if is_block and text.startswith(' ', position):
+            position += 1
+    pieces.append(text[position:])
+    return ''.join(pieces)
+
+
+class MinifyingLoader(BaseLoader):
+    """Template loader that minifies HTML template source before compilation."""
+
+    def __init__(self, loader: BaseLoader):
+        """
+        Initialize the loader.
+
+        Args:
+            loader: Loader providing the original template source
+        """
+        self.loader = loader
+
+    def get_source(
+        self,
+        environment: Environment,
+        template: str
+    ) -> Tuple[str, Optional[str], Optional[Callable[[], bool]]]:
+        source, filename, uptodate = self.loader.get_source(environment, template)
+        return minify_html(source), filename, uptodate
+
+    def list_templates(self) -> List[str]:
+        return self.loader.list_templates()
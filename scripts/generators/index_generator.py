@@ -6,27 +6,53 @@ import os
 import json
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Template
+from generators.template_env import get_environment
+from generators.asset_manager import PLAIN_ASSET_NAMES
 import traceback
 
+# Rows rendered into the page itself; script.js renders the rest on demand
+INITIAL_ROWS = 50
+
+# Date format shared by the rows in the page and the data script.js sorts by
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
 
 class IndexGenerator:
     """Generates index pages for navigation."""
     
-    def __init__(self, templates_dir: str):
+    def __init__(
+        self,
+        templates_dir: str,
+        cache_dir: Optional[str] = None,
+        compiled_templates_dir: Optional[str] = None,
+        minify_html: bool = False,
+        asset_names: Optional[Dict[str, str]] = None
+    ):
         """
         Initialize the index generator.
         
         Args:
             templates_dir: Path to templates directory
+            cache_dir: Cache root for template bytecode (default: user cache dir)
+            compiled_templates_dir: Directory of precompiled templates, if any
+            minify_html: Strip comments and indentation from generated pages
+            asset_names: File names of the built assets (see
+                ``AssetManager.asset_names``; default: unfingerprinted names)
         """
         self.templates_dir = templates_dir
+        self.asset_names = asset_names or PLAIN_ASSET_NAMES
         
-        # Initialize Jinja2 environment
-        self.env = Environment(
-            loader=FileSystemLoader(templates_dir),
-            autoescape=select_autoescape(['html', 'xml'])
-        )
+        # Shared Jinja2 environment
+        self.env = get_environment(templates_dir, cache_dir, compiled_templates_dir, minify_html)
+        self._template: Optional[Template] = None
+    
+    @property
+    def template(self) -> Template:
+        """Index template, resolved once per generator."""
+        if self._template is None:
+            self._template = self.env.get_template('index.html')
+        return self._template
     
     def generate_main_index(
         self,
@@ -46,53 +72,7 @@ class IndexGenerator:
             True if successful, False otherwise
         """
         try:
-            template = self.env.get_template('index.html')
-            
-            # Sort conversations by date (newest first)
-            sorted_conversations = sorted(
-                all_conversations,
-                key=lambda c: c.get('created_at') or datetime.min,
-                reverse=True
-            )
-            
-            # Calculate statistics
-            total_messages = sum(c.get('message_count', 0) for c in all_conversations)
-            
-            # Get date range
-            date_range = self._calculate_date_range(all_conversations)
-            
-            # Group conversations by source for navigation
-            source_links = self._generate_source_links(all_conversations)
-            
-            # Prepare conversations data for JavaScript
-            conversations_json = json.dumps([
-                {
-                    'title': c['title'],
-                    'source': c['source'],
-                    'created_at': c['created_at'].isoformat() if c.get('created_at') else None,
-                    'message_count': c.get('message_count', 0),
-                    'preview': c.get('preview', ''),
-                    'filename': c['filename'],
-                    'uuid': c.get('uuid', ''),
-                }
-                for c in sorted_conversations
-            ])
-            
-            # Prepare template context
-            context = {
-                'page_title': 'Chat Archive',
-                'conversations': sorted_conversations,
-                'conversations_json': conversations_json,
-                'total_messages': total_messages,
-                'date_range': date_range,
-                'source_links': source_links,
-                'show_source_filter': len(source_links) > 1,
-                'assets_path': assets_relative_path,
-                'generation_date': datetime.now()
-            }
-            
-            # Render HTML
-            html_content = template.render(**context)
+            html_content = self.render_main_index(all_conversations, assets_relative_path)
             
             # Ensure output directory exists
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -130,60 +110,10 @@ class IndexGenerator:
             True if successful, False otherwise
         """
         try:
-            template = self.env.get_template('index.html')
-            
-            # Filter conversations for this source
-            source_conversations = [
-                c for c in conversations if c.get('source') == source_name
-            ]
-            
-            # Sort conversations by date (newest first)
-            sorted_conversations = sorted(
-                source_conversations,
-                key=lambda c: c.get('created_at') or datetime.min,
-                reverse=True
+            html_content = self.render_source_index(
+                conversations, source_name, assets_relative_path, main_index_path
             )
             
-            # Calculate statistics
-            total_messages = sum(c.get('message_count', 0) for c in source_conversations)
-            
-            # Get date range
-            date_range = self._calculate_date_range(source_conversations)
-            
-            # Prepare conversations data for JavaScript
-            conversations_json = json.dumps([
-                {
-                    'title': c['title'],
-                    'source': c['source'],
-                    'created_at': c['created_at'].isoformat() if c.get('created_at') else None,
-                    'message_count': c.get('message_count', 0),
-                    'preview': c.get('preview', ''),
-                    'filename': f"conversations/{os.path.basename(c['filename'])}",
-                    'uuid': c.get('uuid', ''),
-                }
-                for c in sorted_conversations
-            ])
-            
-            # Prepare template context
-            context = {
-                'page_title': f'{source_name.title()} Conversations',
-                'conversations': sorted_conversations,
-                'conversations_json': conversations_json,
-                'total_messages': total_messages,
-                'date_range': date_range,
-                'source_links': None,  # Don't show source links on source-specific pages
-                'show_source_filter': False,
-                'breadcrumb': {
-                    'url': main_index_path,
-                    'text': 'All Conversations'
-                },
-                'assets_path': assets_relative_path,
-                'generation_date': datetime.now()
-            }
-            
-            # Render HTML
-            html_content = template.render(**context)
-            
             # Ensure output directory exists
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             
@@ -198,6 +128,124 @@ class IndexGenerator:
             print(f"Error generating {source_name} index: {e}")
             return False
     
+    def render_main_index(
+        self,
+        all_conversations: List[Dict[str, Any]],
+        assets_relative_path: str = "assets",
+        generation_date: Optional[datetime] = None
+    ) -> str:
+        """
+        Render the main index page to a string.
+        
+        Args:
+            all_conversations: List of all conversation metadata
+            assets_relative_path: Relative path to assets directory
+            generation_date: Date shown as the generation time (default: now)
+            
+        Returns:
+            Page HTML
+        """
+        # Sort conversations by date (newest first)
+        sorted_conversations = sorted(
+            all_conversations,
+            key=lambda c: c.get('created_at') or datetime.min,
+            reverse=True
+        )
+        
+        # Calculate statistics
+        total_messages = sum(c.get('message_count', 0) for c in all_conversations)
+        
+        # Get date range
+        date_range = self._calculate_date_range(all_conversations)
+        
+        # Group conversations by source for navigation
+        source_links = self._generate_source_links(all_conversations)
+        
+        # Prepare conversations data for JavaScript
+        links = [c['filename'] for c in sorted_conversations]
+        conversations_json = conversations_data_json(sorted_conversations, links)
+        
+        # Prepare template context
+        context = {
+            'page_title': 'Chat Archive',
+            'conversations': initial_rows(sorted_conversations, links),
+            'total_conversations': len(sorted_conversations),
+            'conversations_json': conversations_json,
+            'total_messages': total_messages,
+            'date_range': date_range,
+            'source_links': source_links,
+            'show_source_filter': len(source_links) > 1,
+            'assets_path': assets_relative_path,
+            'asset_names': self.asset_names,
+            'generation_date': generation_date or datetime.now()
+        }
+        
+        return self.template.render(**context)
+    
+    def render_source_index(
+        self,
+        conversations: List[Dict[str, Any]],
+        source_name: str,
+        assets_relative_path: str = "../assets",
+        main_index_path: str = "../index.html",
+        generation_date: Optional[datetime] = None
+    ) -> str:
+        """
+        Render a source-specific index page to a string.
+        
+        Args:
+            conversations: List of conversations (other sources are skipped)
+            source_name: Name of the source (e.g., 'openai', 'anthropic')
+            assets_relative_path: Relative path to assets directory
+            main_index_path: Relative path to main index
+            generation_date: Date shown as the generation time (default: now)
+            
+        Returns:
+            Page HTML
+        """
+        # Filter conversations for this source
+        source_conversations = [
+            c for c in conversations if c.get('source') == source_name
+        ]
+        
+        # Sort conversations by date (newest first)
+        sorted_conversations = sorted(
+            source_conversations,
+            key=lambda c: c.get('created_at') or datetime.min,
+            reverse=True
+        )
+        
+        # Calculate statistics
+        total_messages = sum(c.get('message_count', 0) for c in source_conversations)
+        
+        # Get date range
+        date_range = self._calculate_date_range(source_conversations)
+        
+        # Prepare conversations data for JavaScript
+        links = [f"conversations/{os.path.basename(c['filename'])}" for c in sorted_conversations]
+        conversations_json = conversations_data_json(sorted_conversations, links)
+        
+        # Prepare template context
+        context = {
+            'page_title': f'{source_name.title()} Conversations',
+            'conversations': initial_rows(sorted_conversations, links),
+            'total_conversations': len(sorted_conversations),
+            'conversations_json': conversations_json,
+            'total_messages': total_messages,
+            'date_range': date_range,
+            'source_links': None,  # Don't show source links on source-specific pages
+            'show_source_filter': False,
+            'breadcrumb': {
+                'url': main_index_path,
+                'text': 'All Conversations'
+            },
+            'assets_path': assets_relative_path,
+            'asset_names': self.asset_names,
+            'generation_date': generation_date or datetime.now()
+        }
+        
+        return self.template.render(**context)
+    
     def _calculate_date_range(self, conversations: List[Dict[str, Any]]) -> Optional[Dict[str, datetime]]:
         """
         Calculate the date range for a list of conversations.
@@ -251,4 +299,55 @@ class IndexGenerator:
         # Sort by name
         source_links.sort(key=lambda x: x['name'])
         
-        return source_links
\ No newline at end of file
+        return source_links
+
+def conversations_data_json(conversations: List[Dict[str, Any]], links: List[str]) -> str:
+    """
+    Index data for script.js, as compact column-oriented JSON.
+
+    Each field is one array with an entry per conversation, in the order
+    given. Sources and link directories are stored once and referenced by
+    position. The JSON is safe to embed in a ``<script>`` element.
+
+    Args:
+        conversations: Conversation metadata, newest first
+        links: Link to each conversation's page, relative to the index page
+
+    Returns:
+        JSON with ``sources``, ``dirs`` and the per-conversation arrays
+        ``title``, ``source``, ``date``, ``messages``, ``preview``, ``dir``
+        and ``file``
+    """
+    sources: Dict[str, int] = {}
+    dirs: Dict[str, int] = {}
+    columns: Dict[str, list] = {
+        'title': [], 'source': [], 'date': [], 'messages': [], 'preview': [], 'dir': [], 'file': []
+    }
+    for conv, link in zip(conversations, links):
+        directory, _, name = link.rpartition('/')
+        columns['title'].append(conv.get('title') or 'Untitled Conversation')
+        columns['source'].append(sources.setdefault(conv.get('source') or 'unknown', len(sources)))
+        columns['date'].append(conv['created_at'].strftime(DATE_FORMAT) if conv.get('created_at') else '')
+        columns['messages'].append(conv.get('message_count', 0))
+        columns['preview'].append(conv.get('preview', ''))
+        columns['dir'].append(dirs.setdefault(directory + '/' if directory else '', len(dirs)))
+        columns['file'].append(name)
+
+    data = {'sources': list(sources), 'dirs': list(dirs), **columns}
+    # "<" escaped so a title containing "</script>" cannot end the element
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('<', '\\u003c')
+
+
+def initial_rows(conversations: List[Dict[str, Any]], links: List[str]) -> List[Dict[str, Any]]:
+    """The first ``INITIAL_ROWS`` conversations, as rendered into the page."""
+    return [
+        {
+            'title': conv.get('title') or 'Untitled Conversation',
+            'href': link,
+            'source': conv.get('source') or 'unknown',
+            'date': conv['created_at'].strftime(DATE_FORMAT) if conv.get('created_at') else 'N/A',
+            'message_count': conv.get('message_count', 0),
+            'preview': conv.get('preview', ''),
+        }
+        for conv, link in zip(conversations[:INITIAL_ROWS], links)
+    ]
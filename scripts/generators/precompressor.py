@@ -0,0 +1,243 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Precompressed gzip/brotli variants of generated files for static hosting.
+
+Variants are keyed by a digest of the file content and the compression
+settings, so every sibling is a compression of the file next to it.
+"""
+import os
+import time
+import gzip
+import json
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+# File types a static server would otherwise compress on the fly
+COMPRESSIBLE_EXTENSIONS = ('.html', '.css', '.js', '.json')
+
+# Files smaller than this are cheaper to send as-is
+MIN_COMPRESS_SIZE = 256
+
+# Per-tree record of the content digest each variant was built from
+MANIFEST_FILENAME = '.precompressed.json'
+
+# Store entries unused for this long are removed after each run
+STORE_MAX_AGE_DAYS = 30
+# Beyond this size, the least recently used store entries are removed
+STORE_MAX_BYTES = 512 * 1024 * 1024
+
+
+class Precompressor:
+    """Writes .gz and .br siblings for the text files of a generated site."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        workers: Optional[int] = None,
+        gzip_level: int = 9,
+        brotli_quality: int = 9,
+        store_max_age_days: float = STORE_MAX_AGE_DAYS,
+        store_max_bytes: int = STORE_MAX_BYTES
+    ):
+        """
+        Initialize the precompressor.
+
+        Args:
+            cache_dir: Shared store of compressed variants keyed by content
+                digest, reused across builds (disabled if None)
+            workers: Number of compression threads (default: CPU count)
+            gzip_level: gzip compression level (1-9)
+            brotli_quality: Brotli quality (0-11); 11 is ~20x slower than 9
+                for under 10% smaller output on chat pages
+            store_max_age_days: Remove store entries unused for longer
+            store_max_bytes: Size limit of the store
+        """
+        self.store_dir = os.path.join(cache_dir, 'precompressed') if cache_dir else None
+        self.workers = workers or os.cpu_count() or 1
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.store_max_age_days = store_max_age_days
+        self.store_max_bytes = store_max_bytes
+
+        self.encodings = ['gz']
+        if brotli is not None:
+            self.encodings.append('br')
+
+    def compress_tree(self, root_dir: str) -> Dict[str, int]:
+        """
+        Write compressed siblings for every compressible file under a directory.
+
+        Files whose digest matches the tree manifest and whose siblings exist
+        are skipped; variants already in the shared store are copied instead
+        of recompressed. The store is pruned afterwards.
+
+        Args:
+            root_dir: Root of the generated site
+
+        Returns:
+            Counts of 'compressed', 'reused' and 'unchanged' files
+        """
+        if brotli is None:
+            print("Warning: brotli is not installed; writing .gz variants only")
+
+        manifest_path = os.path.join(root_dir, MANIFEST_FILENAME)
+        manifest = self._load_manifest(manifest_path)
+        if manifest.get('settings') != self._settings():
+            manifest = {}
+        previous = manifest.get('files', {})
+
+        files = self._find_compressible_files(root_dir)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(
+                lambda rel_path: self._compress_file(root_dir, rel_path, previous.get(rel_path)),
+                files
+            ))
+
+        stats = {'compressed': 0, 'reused': 0, 'unchanged': 0}
+        digests = {}
+        for rel_path, (status, digest) in zip(files, results):
+            stats[status] += 1
+            digests[rel_path] = digest
+
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({'settings': self._settings(), 'files': digests}, f, indent=2, sort_keys=True)
+
+        if self.store_dir:
+            self.prune_store()
+        return stats
+
+    def prune_store(self) -> Dict[str, int]:
+        """
+        Remove store entries unused for too long, then the least recently
+        used ones while the store exceeds its size limit.
+
+        Returns:
+            Counts of 'removed' entries and 'bytes' freed
+        """
+        entries = []
+        for root, _, names in os.walk(self.store_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((info.st_mtime, info.st_size, path))
+
+        # Oldest first; reuse refreshes an entry's modification time
+        entries.sort()
+        cutoff = time.time() - self.store_max_age_days * 86400
+        total = sum(size for _, size, _ in entries)
+        stats = {'removed': 0, 'bytes': 0}
+        for mtime, size, path in entries:
+            if mtime >= cutoff and total <= self.store_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            stats['removed'] += 1
+            stats['bytes'] += size
+        return stats
+
+    def _find_compressible_files(self, root_dir: str) -> List[str]:
+        """List compressible files under root_dir as relative paths."""
+        files = []
+        for root, dirs, names in os.walk(root_dir):
+            for name in names:
+                if not name.endswith(COMPRESSIBLE_EXTENSIONS) or name == MANIFEST_FILENAME:
+                    continue
+                path = os.path.join(root, name)
+                if os.path.getsize(path) < MIN_COMPRESS_SIZE:
+                    continue
+                files.append(os.path.relpath(path, root_dir))
+        files.sort()
+        return files
+
+    def _compress_file(self, root_dir: str, rel_path: str, previous_digest: Optional[str]) -> Tuple[str, str]:
+        """
+        Produce the compressed variants of one file.
+
+        Returns:
+            Tuple of (status, content digest)
+        """
+        path = os.path.join(root_dir, rel_path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+
+        if digest == previous_digest and all(
+            os.path.exists(f"{path}.{encoding}") for encoding in self.encodings
+        ):
+            return 'unchanged', digest
+
+        status = 'reused'
+        for encoding in self.encodings:
+            stored = self._store_path(digest, encoding)
+            if stored and os.path.exists(stored):
+                shutil.copyfile(stored, f"{path}.{encoding}")
+                self._touch(stored)
+                continue
+
+            status = 'compressed'
+            compressed = self._compress(data, encoding)
+            with open(f"{path}.{encoding}", 'wb') as f:
+                f.write(compressed)
+            if stored:
+                self._save_to_store(stored, compressed)
+
+        return status, digest
+
+    def _compress(self, data: bytes, encoding: str) -> bytes:
+        """Compress bytes with the given encoding."""
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        # mtime=0 keeps output identical for identical input
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def _settings(self) -> str:
+        """Compression settings the variants depend on, e.g. 'gz9-br9'."""
+        return f"gz{self.gzip_level}-br{self.brotli_quality}"
+
+    def _store_path(self, digest: str, encoding: str) -> Optional[str]:
+        """Path of a variant in the shared store, or None if disabled."""
+        if not self.store_dir:
+            return None
+        level = self.brotli_quality if encoding == 'br' else self.gzip_level
+        return os.path.join(self.store_dir, f"{encoding}{level}", digest[:2], f"{digest}.{encoding}")
+
+    def _touch(self, stored_path: str) -> None:
+        """Mark a store entry as recently used."""
+        try:
+            os.utime(stored_path)
+        except OSError:
+            pass
+
+    def _save_to_store(self, stored_path: str, compressed: bytes) -> None:
+        """Atomically add a variant to the shared store."""
+        try:
+            os.makedirs(os.path.dirname(stored_path), exist_ok=True)
+            temp_path = f"{stored_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(temp_path, stored_path)
+        except OSError as e:
+            print(f"Warning: could not cache compressed file {stored_path}: {e}")
+
+    def _load_manifest(self, manifest_path: str) -> Dict[str, str]:
+        """Load the digest manifest of a previous run, if any."""
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
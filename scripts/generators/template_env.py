@@ -0,0 +1,143 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Shared Jinja2 environment with a persistent bytecode cache.
+
+Every generator in a process shares one Environment per template directory,
+so templates are parsed and compiled at most once per run. Compiled bytecode is
+also persisted on disk, which lets new processes (delta scripts, workers)
+skip template compilation entirely. Templates can additionally be
+precompiled to Python modules at build time and loaded via ``ModuleLoader``.
+"""
+import os
+from typing import Dict, Optional, Tuple
+from jinja2 import (
+    ChoiceLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    ModuleLoader,
+    select_autoescape,
+)
+from markupsafe import escape
+from config import default_cache_dir
+from generators.html_minifier import MinifyingLoader
+
+
+# Directory (next to the scripts) where build.py places precompiled templates
+COMPILED_TEMPLATES_DIRNAME = 'compiled_templates'
+
+_environments: Dict[Tuple[str, Optional[str], Optional[str], bool], Environment] = {}
+
+
+def nl2br(text: str) -> str:
+    """
+    Jinja2 filter to convert newlines to HTML line breaks.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Text with newlines converted to <br> tags
+    """
+    if not text:
+        return ""
+
+    # Escape HTML first, then convert newlines
+    return str(escape(text)).replace('\n', '<br>\n')
+
+
+def get_environment(
+    templates_dir: str,
+    cache_dir: Optional[str] = None,
+    compiled_dir: Optional[str] = None,
+    minify: bool = False
+) -> Environment:
+    """
+    Get the shared Jinja2 environment for a templates directory.
+
+    Args:
+        templates_dir: Path to templates directory
+        cache_dir: Cache root for template bytecode (default: ``default_cache_dir()``)
+        compiled_dir: Directory of templates precompiled by ``precompile_templates``
+        minify: Minify template HTML before compiling it
+
+    Returns:
+        Environment instance shared by all callers with the same arguments
+    """
+    templates_dir = os.path.abspath(str(templates_dir))
+    cache_dir = str(cache_dir) if cache_dir else str(default_cache_dir())
+    compiled_dir = str(compiled_dir) if compiled_dir else None
+
+    key = (templates_dir, cache_dir, compiled_dir, minify)
+    env = _environments.get(key)
+    if env is not None:
+        return env
+
+    variant = _variant_name(minify)
+    loader = FileSystemLoader(templates_dir)
+    if minify:
+        loader = MinifyingLoader(loader)
+    if compiled_dir and os.path.isdir(os.path.join(compiled_dir, variant)):
+        loader = ChoiceLoader([ModuleLoader(os.path.join(compiled_dir, variant)), loader])
+
+    env = Environment(
+        loader=loader,
+        autoescape=select_autoescape(['html', 'xml']),
+        bytecode_cache=_create_bytecode_cache(os.path.join(cache_dir, 'jinja', variant)),
+        # Templates don't change during a run; skip the per-render mtime check
+        auto_reload=False
+    )
+    env.filters['nl2br'] = nl2br
+
+    _environments[key] = env
+    return env
+
+
+def precompile_templates(templates_dir: str, target_dir: str) -> int:
+    """
+    Compile all templates to Python modules for ``ModuleLoader``.
+
+    Both the plain and the minified variant are compiled, each into its own
+    subdirectory of target_dir.
+
+    Args:
+        templates_dir: Path to templates directory
+        target_dir: Directory where compiled modules are written
+
+    Returns:
+        Number of templates compiled per variant
+    """
+    count = 0
+    for minify in (False, True):
+        loader = FileSystemLoader(str(templates_dir))
+        env = Environment(
+            loader=MinifyingLoader(loader) if minify else loader,
+            autoescape=select_autoescape(['html', 'xml'])
+        )
+        env.filters['nl2br'] = nl2br
+
+        variant_dir = os.path.join(str(target_dir), _variant_name(minify))
+        os.makedirs(variant_dir, exist_ok=True)
+        count = len(env.list_templates(extensions=['html', 'xml']))
+        env.compile_templates(
+            variant_dir,
+            extensions=['html', 'xml'],
+            zip=None,
+            ignore_errors=False
+        )
+    return count
+
+
+def _variant_name(minify: bool) -> str:
+    """Name of the compiled/cached template variant."""
+    return 'minified' if minify else 'plain'
+
+
+def _create_bytecode_cache(directory: str) -> Optional[FileSystemBytecodeCache]:
+    """Create a bytecode cache, or None if the directory is not writable."""
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        print(f"Warning: template cache disabled ({directory}): {e}")
+        return None
+    return FileSystemBytecodeCache(directory)
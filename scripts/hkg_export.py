@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Export the archive and its cached concepts as hKG bulk-load files.
+
+Writes deduplicated ChatMessage/Concept nodes and MENTIONS/RELATES
+relationships as neo4j-admin import CSVs and as UNWIND batch files, and
+optionally loads the batches into Neo4j (``--load``), replacing the
+per-message MERGE round-trips of ``src/hkgImporter.ts``.
+"""
+import os
+import sys
+import argparse
+from datetime import datetime
+from typing import Dict, Optional
+
+from config import get_config
+from concepts.cache import CACHE_FILENAME, ConceptCache
+from concepts.extraction import MAX_TEXT_CHARS, PROMPT_VERSION, clean_result, iter_archive
+from concepts.graph import GraphBatchWriter, load_batches
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_millis(value: Optional[datetime]) -> int:
+    """Naive datetime to milliseconds since the (naive) epoch, 0 for None."""
+    if value is None:
+        return 0
+    return int((value - _EPOCH).total_seconds() * 1000)
+
+
+def export_graph(args) -> Dict[str, int]:
+    """Write the graph files; returns row counts plus messages without concepts."""
+    config = get_config()
+    cache = None
+    if not args.no_concepts:
+        cache = ConceptCache(os.path.join(str(config.cache_dir), CACHE_FILENAME), PROMPT_VERSION)
+
+    writer = GraphBatchWriter(args.output, batch_size=args.batch_size)
+    without_concepts = 0
+    try:
+        for conv in iter_archive(args.input_dir):
+            for index, msg in enumerate(conv.messages):
+                text = msg.content.strip()
+                timestamp = to_millis(msg.timestamp or conv.created_at)
+                if not text or timestamp <= args.since:
+                    continue
+
+                result = cache.get(args.model, text[:args.max_chars], count=False) if cache else None
+                if result is None:
+                    without_concepts += 1
+                    result = {'concepts': [], 'relations': []}
+                else:
+                    result = clean_result(result)
+
+                writer.add_message(
+                    msg.uuid or f"{conv.id}:{index}",
+                    msg.content,
+                    timestamp,
+                    result['concepts'],
+                    result['relations'],
+                )
+    finally:
+        manifest = writer.close()
+        if cache is not None:
+            cache.close()
+
+    counts = dict(manifest['counts'])
+    counts['without_concepts'] = without_concepts
+    return counts
+
+
+def main():
+    config = get_config()
+    parser = argparse.ArgumentParser(description="Export conversations and cached concepts for the hKG graph")
+    parser.add_argument("--input-dir", default=str(config.raw_data_dir), help="Directory with the raw exports")
+    parser.add_argument("-o", "--output", default=str(config.data_dir / 'hkg'), help="Output directory")
+    parser.add_argument("--model", default="deepseek-r1_0528", help="Model whose cached concepts are used")
+    parser.add_argument("--max-chars", type=int, default=MAX_TEXT_CHARS,
+                        help="Same value as used for extract_concepts.py --archive")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per UNWIND batch")
+    parser.add_argument("--since", type=int, default=0,
+                        help="Only messages newer than this timestamp (ms), e.g. Meta.lastImportedTs")
+    parser.add_argument("--no-concepts", action="store_true", help="Export message nodes only")
+    parser.add_argument("--load", action="store_true",
+                        help="Load the batches into Neo4j (NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)")
+    parser.add_argument("--database", help="Neo4j database name")
+    args = parser.parse_args()
+
+    counts = export_graph(args)
+    print(f"Wrote {counts['chat_messages']} messages, {counts['concepts']} concepts, "
+          f"{counts['mentions']} MENTIONS and {counts['relates']} RELATES to {args.output} "
+          f"({counts['without_concepts']} messages have no cached concepts)")
+
+    if args.load:
+        try:
+            import neo4j
+        except ImportError:
+            print("Error: --load requires the neo4j package (pip install neo4j)", file=sys.stderr)
+            sys.exit(1)
+        driver = neo4j.GraphDatabase.driver(
+            os.environ.get('NEO4J_URI', 'bolt://localhost:7687'),
+            auth=(os.environ.get('NEO4J_USER', 'neo4j'), os.environ.get('NEO4J_PASSWORD', 'neo4j'))
+        )
+        try:
+            sent = load_batches(driver, args.output, args.database)
+        finally:
+            driver.close()
+        print(f"Loaded {sent['statements']} statements into Neo4j")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Run instrumentation: stage timers, memory, counters and a slow log.
+
+A ``RunReport`` collects measurements while a command runs and writes them
+as a JSON report and, optionally, as a Prometheus textfile for the node
+exporter's textfile collector.
+
+Memory is measured as the process's peak resident set size (the kernel's
+high-water mark, so a stage reports the peak reached by its end and how much
+it raised it), plus the peak of the largest child process for stages that
+use render workers. ``trace_memory`` additionally records the peak Python
+heap of each stage with ``tracemalloc``, which is exact but slows Python
+code down noticeably.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import tracemalloc
+import contextlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_FORMAT_VERSION = 1
+
+# Prefix of every Prometheus metric name
+METRIC_PREFIX = 'chat_archive'
+
+
+def peak_rss_bytes(children: bool = False) -> Optional[int]:
+    """
+    Peak resident set size of this process, or of its largest child.
+
+    Returns:
+        Bytes, or None where ``resource`` is unavailable
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RunReport:
+    """Measurements of one run of a command."""
+
+    def __init__(self, command: str, slow_threshold_ms: Optional[float] = None, trace_memory: bool = False):
+        """
+        Start a report.
+
+        Args:
+            command: Name of the command being measured
+            slow_threshold_ms: Conversations taking at least this long are
+                added to the slow log (None disables the log)
+            trace_memory: Record each stage's peak Python heap with tracemalloc
+        """
+        self.command = command
+        self.slow_threshold_ms = slow_threshold_ms
+        self.trace_memory = trace_memory
+        self.started_at = datetime.now()
+        self.success: Optional[bool] = None
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, int] = {}
+        self.slow_log: List[Dict[str, Any]] = []
+        self.info: Dict[str, Any] = {}
+        self._start = time.perf_counter()
+        self._duration: Optional[float] = None
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, Any]]:
+        """
+        Measure a stage of the run.
+
+        A stage entered again (e.g. once per source) accumulates its time.
+
+        Args:
+            name: Stage name
+
+        Yields:
+            The stage's record, to which callers may add values
+        """
+        record = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+        rss_before = peak_rss_bytes()
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record['failed'] = True
+            raise
+        finally:
+            record['seconds'] = round(record['seconds'] + time.perf_counter() - start, 6)
+            record['calls'] += 1
+            if tracing:
+                heap_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                record['python_heap_peak_bytes'] = max(record.get('python_heap_peak_bytes', 0), heap_peak)
+            rss_after = peak_rss_bytes()
+            if rss_after is not None:
+                record['peak_rss_bytes'] = rss_after
+                record['rss_growth_bytes'] = record.get('rss_growth_bytes', 0) + rss_after - rss_before
+                record['children_peak_rss_bytes'] = peak_rss_bytes(children=True)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Add to a counter."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe_conversation(self, source: str, conversation_id: str, title: str, messages: int, seconds: float) -> None:
+        """
+        Record how long one conversation took, keeping it if it was slow.
+
+        Args:
+            source: Source name
+            conversation_id: Conversation ID
+            title: Conversation title
+            messages: Number of messages
+            seconds: Time spent on the conversation
+        """
+        if self.slow_threshold_ms is None or seconds * 1000 < self.slow_threshold_ms:
+            return
+        self.slow_log.append({
+            'source': source,
+            'id': conversation_id,
+            'title': title,
+            'messages': messages,
+            'ms': round(seconds * 1000, 1),
+        })
+
+    def finish(self, success: bool) -> None:
+        """Mark the run as finished."""
+        self.success = success
+        self._duration = time.perf_counter() - self._start
+
+    @property
+    def duration(self) -> float:
+        """Seconds from the start of the report to ``finish`` (or now)."""
+        return self._duration if self._duration is not None else time.perf_counter() - self._start
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The report as a JSON-serializable dictionary."""
+        return {
+            'format_version': REPORT_FORMAT_VERSION,
+            'command': self.command,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'duration_seconds': round(self.duration, 6),
+            'success': self.success,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'children_peak_rss_bytes': peak_rss_bytes(children=True),
+            'info': self.info,
+            'stages': self.stages,
+            'counters': self.counters,
+            'slow_threshold_ms': self.slow_threshold_ms,
+            'slow_log': sorted(self.slow_log, key=lambda entry: entry['ms'], reverse=True),
+        }
+
+    def write_json(self, path: str) -> None:
+        """Write the report as JSON."""
+        _atomic_write(path, json.dumps(self.as_dict(), indent=2, ensure_ascii=False, default=str) + '\n')
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Write the report in the Prometheus text exposition format.
+
+        The file is replaced atomically, as the textfile collector requires.
+        """
+        labels = f'command="{_escape_label(self.command)}"'
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[tuple]) -> None:
+            if not samples:
+                return
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            for extra, value in samples:
+                sample_labels = f"{labels},{extra}" if extra else labels
+                lines.append(f"{METRIC_PREFIX}_{name}{{{sample_labels}}} {value}")
+
+        metric('run_success', 'gauge', 'Whether the last run succeeded.', [('', int(bool(self.success)))])
+        metric('run_duration_seconds', 'gauge', 'Wall time of the last run.', [('', round(self.duration, 6))])
+        metric('run_timestamp_seconds', 'gauge', 'Start time of the last run.',
+               [('', int(self.started_at.timestamp()))])
+        peak = peak_rss_bytes()
+        if peak is not None:
+            metric('peak_rss_bytes', 'gauge', 'Peak resident set size of the last run.', [('', peak)])
+
+        def stage_samples(key: str) -> List[tuple]:
+            return [
+                (f'stage="{_escape_label(name)}"', record[key])
+                for name, record in self.stages.items() if record.get(key) is not None
+            ]
+
+        metric('stage_duration_seconds', 'gauge', 'Wall time per stage of the last run.', stage_samples('seconds'))
+        metric('stage_peak_rss_bytes', 'gauge', 'Peak resident set size at the end of each stage.',
+               stage_samples('peak_rss_bytes'))
+        metric('stage_rss_growth_bytes', 'gauge', 'Growth of the peak resident set size during each stage.',
+               stage_samples('rss_growth_bytes'))
+        metric('stage_python_heap_peak_bytes', 'gauge', 'Peak Python heap per stage (tracemalloc).',
+               stage_samples('python_heap_peak_bytes'))
+        metric('items', 'gauge', 'Counts from the last run (conversations, messages, bytes, cache hits).',
+               [(f'name="{_escape_label(name)}"', value) for name, value in sorted(self.counters.items())])
+        if self.slow_threshold_ms is not None:
+            metric('slow_conversations', 'gauge', 'Conversations slower than the slow-log threshold.',
+                   [('', len(self.slow_log))])
+
+        _atomic_write(path, '\n'.join(lines) + '\n')
+
+    def summary_lines(self, slow_entries: int = 5) -> List[str]:
+        """Human-readable stage timings and the slowest conversations."""
+        lines = [f"{name:16s} {record['seconds']:9.3f} s" for name, record in self.stages.items()]
+        if self.slow_log:
+            lines.append(f"{len(self.slow_log)} conversations took at least {self.slow_threshold_ms:g} ms:")
+            for entry in sorted(self.slow_log, key=lambda e: e['ms'], reverse=True)[:slow_entries]:
+                lines.append(f"  {entry['ms']:9.1f} ms  {entry['messages']:5d} msgs  {entry['title']} ({entry['source']})")
+        return lines
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _atomic_write(path: str, content: str) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temp_path, path)
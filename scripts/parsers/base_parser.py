@@ -5,8 +5,19 @@ Base parser class for chat archive conversion.
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
+import os
+import re
+import json
 import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# JSON insignificant whitespace
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+# Characters that could still extend a number, followed by whitespace
+_VALUE_TAIL_RE = re.compile(r'[0-9.eE+\-]*[ \t\n\r]*')
 
 
 @dataclass
@@ -36,6 +47,96 @@ class Conversation:
             self.uuid = str(uuid.uuid4())
 
 
+def iter_json_array(file_path: str, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array one at a time.
+
+    Only the element being decoded (plus one read chunk) is held in memory,
+    so exports far larger than RAM-friendly sizes can be processed.
+
+    Args:
+        file_path: Path to a JSON file containing an array
+        chunk_size: Number of characters to read at a time
+
+    Yields:
+        Decoded array elements in file order
+
+    Raises:
+        ValueError: If the file is not a well-formed JSON array
+    """
+    decoder = json.JSONDecoder()
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        position = 0
+        eof = False
+        read_size = chunk_size
+
+        def fill() -> None:
+            # Drop consumed text, then append the next chunk. The read size
+            # doubles while a single element keeps failing to decode, so very
+            # large elements are re-parsed a logarithmic number of times.
+            nonlocal buffer, position, eof, read_size
+            buffer = buffer[position:]
+            position = 0
+            data = f.read(read_size)
+            if not data:
+                eof = True
+            buffer += data
+            read_size *= 2
+
+        def skip_whitespace() -> None:
+            nonlocal position
+            while True:
+                position = _WHITESPACE_RE.match(buffer, position).end()
+                if position < len(buffer) or eof:
+                    return
+                fill()
+
+        skip_whitespace()
+        if buffer[position:position + 1] != '[':
+            raise ValueError(f"Expected a JSON array in {file_path}")
+        position += 1
+
+        expect_value = True
+        first = True
+        while True:
+            skip_whitespace()
+            if position >= len(buffer):
+                raise ValueError(f"Unterminated JSON array in {file_path}")
+
+            char = buffer[position]
+            if char == ']' and (first or not expect_value):
+                return
+            if not expect_value:
+                if char != ',':
+                    raise ValueError(f"Expected ',' or ']' at offset {position} in {file_path}")
+                position += 1
+                expect_value = True
+                continue
+
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+
+            # A number cut off by the buffer end ("1.5e" of "1.5e10") still
+            # decodes, so only accept a value once a character that cannot
+            # continue it has been read
+            if not eof and _VALUE_TAIL_RE.match(buffer, end).end() >= len(buffer):
+                fill()
+                continue
+
+            yield value
+            position = end
+            expect_value = False
+            first = False
+            read_size = chunk_size
+
+
 class BaseParser(ABC):
     """Abstract base class for chat archive parsers."""
     
@@ -54,6 +155,85 @@ class BaseParser(ABC):
             List of Conversation objects
         """
         pass
+
+    def iter_file(self, file_path: str) -> Iterator[Conversation]:
+        """
+        Parse a JSON file incrementally, yielding one conversation at a time.
+
+        Unlike ``parse_file`` the whole export is never loaded at once, which
+        keeps memory flat for very large archives.
+
+        Args:
+            file_path: Path to the JSON file to parse
+
+        Yields:
+            Conversation objects with at least one message; if the file
+            cannot be read to the end, the error is logged and the stream
+            stops early
+        """
+        try:
+            yield from self._iter_conversations(file_path)
+        except Exception as e:
+            self._log_read_error(file_path, e)
+
+    def load_file(self, file_path: str, max_file_size_mb: Optional[int] = None) -> List[Conversation]:
+        """
+        Parse a JSON file, streaming it if it exceeds the size limit.
+
+        Args:
+            file_path: Path to the JSON file to parse
+            max_file_size_mb: Files larger than this are parsed with
+                ``iter_file`` instead of being loaded whole (None = never)
+
+        Returns:
+            List of Conversation objects (empty if the file cannot be read)
+        """
+        try:
+            size_mb = os.path.getsize(file_path) / (1024 * 1024)
+        except OSError:
+            size_mb = 0
+
+        if max_file_size_mb is not None and size_mb > max_file_size_mb:
+            logger.info(
+                "Streaming %s file '%s' (%.1f MB > %d MB)",
+                self.source_name, file_path, size_mb, max_file_size_mb
+            )
+            # Like parse_file, a file that cannot be read to the end yields
+            # nothing rather than the conversations before the error
+            try:
+                return list(self._iter_conversations(file_path))
+            except Exception as e:
+                self._log_read_error(file_path, e)
+                return []
+
+        return self.parse_file(file_path)
+
+    def _iter_conversations(self, file_path: str) -> Iterator[Conversation]:
+        """Stream the conversations of a file, raising on file-level errors."""
+        for conv_data in iter_json_array(file_path):
+            try:
+                conversation = self._parse_conversation(conv_data)
+                if conversation and conversation.messages:
+                    yield conversation
+            except (KeyError, ValueError, AttributeError, TypeError) as e:
+                conv_label = self._describe_conversation(conv_data)
+                logger.warning("Failed to parse conversation '%s': %s", conv_label, e)
+                continue
+
+    def _log_read_error(self, file_path: str, error: Exception) -> None:
+        """Log why a file could not be read."""
+        if isinstance(error, (FileNotFoundError, PermissionError)):
+            logger.error("Cannot access %s file '%s': %s", self.source_name, file_path, error)
+        elif isinstance(error, (json.JSONDecodeError, ValueError)):
+            logger.error("Invalid JSON in %s file '%s': %s", self.source_name, file_path, error)
+        else:
+            logger.error("Unexpected error reading %s file '%s': %s", self.source_name, file_path, error)
+
+    def _describe_conversation(self, conv_data: Any) -> str:
+        """Short label for a raw conversation, used in log messages."""
+        if not isinstance(conv_data, dict):
+            return 'invalid'
+        return str(conv_data.get('uuid') or conv_data.get('title') or 'unknown')
     
     @abstractmethod
     def _parse_conversation(self, conv_data: Dict[str, Any]) -> Conversation:
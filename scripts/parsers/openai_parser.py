@@ -3,6 +3,7 @@
 Parser for OpenAI/ChatGPT chat archive JSON files.
 """
 import json
+import hashlib
 import logging
 from typing import List, Dict, Any
 from .base_parser import BaseParser, Conversation, Message
@@ -70,8 +71,13 @@ class OpenAIParser(BaseParser):
         created_at = self._parse_timestamp(conv_data.get('create_time'))
         updated_at = self._parse_timestamp(conv_data.get('update_time'))
         
-        # Generate ID from title and timestamp
-        conv_id = f"openai_{hash(title + str(created_at))}"
+        # Use the export's ID so the same conversation keeps its ID (and its
+        # page) across exports and runs; older exports without one fall back
+        # to a digest of title and creation time
+        conv_id = conv_data.get('conversation_id') or conv_data.get('id')
+        if not conv_id:
+            digest = hashlib.sha1(f"{title}\0{conv_data.get('create_time')}".encode('utf-8')).hexdigest()
+            conv_id = f"openai_{digest[:16]}"
         
         # Create conversation object
         conversation = Conversation(
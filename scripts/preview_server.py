@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Local preview server that renders pages on request.
+
+Serves the same site ``convert_to_html.py`` writes, but renders each page
+only when it is requested. The corpus is opened through the columnar store
+(memory-mapped, so start-up reads only conversation metadata) and a
+conversation's messages are materialized only when one of its pages is
+rendered. Rendered responses are kept in an LRU cache bounded by size and
+carry an ETag, so revalidating browsers get ``304 Not Modified``.
+
+Every page shows the server's start time as its generation date, which
+keeps a re-rendered page byte-identical to the evicted one and its ETag
+stable. Fingerprinted assets are served as immutable, like a static host
+configured with the ``_headers`` file of a conversion.
+
+Usage:
+    python scripts/preview_server.py [--port 8000] [--input-dir DIR] [--cache-mb 64]
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+import mimetypes
+from collections import OrderedDict
+from datetime import datetime
+from functools import partial
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+# Add the scripts directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config, default_cache_dir
+from corpus.cache import CorpusCache
+from corpus.columnar import ColumnarCorpus
+from parsers.anthropic_parser import AnthropicParser
+from parsers.openai_parser import OpenAIParser
+from parsers.base_parser import Conversation
+from generators.html_generator import HTMLGenerator, preview_text
+from generators.index_generator import IndexGenerator
+from generators.asset_manager import FINGERPRINTED_ASSETS, IMMUTABLE_CACHE_CONTROL, AssetManager
+from generators.template_env import COMPILED_TEMPLATES_DIRNAME
+
+# Raw export names searched for in the input directory, per source
+INPUT_FILES = {
+    'anthropic': ['claude_conversations.json', 'anthropic_conversations.json', 'example_claude_conversations.json'],
+    'openai': ['openai_conversations.json', 'chatgpt_conversations.json', 'example_openai_conversations.json'],
+}
+
+DEFAULT_CACHE_MB = 64
+
+# Conversations kept materialized for their segment and raw-text requests
+RECENT_CONVERSATIONS = 8
+
+_SIDE_FILE_RE = re.compile(r'^(segment|raw)-(\d+)\.js$')
+
+
+class Page(NamedTuple):
+    """A rendered response."""
+    body: bytes
+    content_type: str
+    etag: str
+    cache_control: str = 'no-cache'
+
+
+class PageCache:
+    """Thread-safe LRU cache of rendered pages, bounded by their total size."""
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Total size of the cached bodies; larger pages are not cached
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pages: 'OrderedDict[str, Page]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, record: bool = True) -> Optional[Page]:
+        """
+        Return a cached page and mark it as recently used.
+
+        Args:
+            key: Page key
+            record: Count the lookup in the hit and miss statistics
+        """
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                self.misses += record
+                return None
+            self._pages.move_to_end(key)
+            self.hits += record
+            return page
+
+    def put(self, key: str, page: Page) -> None:
+        """Cache a page, evicting the least recently used ones to make room."""
+        if len(page.body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._pages.pop(key, None)
+            if old is not None:
+                self.size -= len(old.body)
+            self._pages[key] = page
+            self.size += len(page.body)
+            while self.size > self.max_bytes:
+                _, evicted = self._pages.popitem(last=False)
+                self.size -= len(evicted.body)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._pages),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class PageEntry(NamedTuple):
+    """A conversation page of the site, rendered on request."""
+    metadata: Dict[str, Any]
+    load: Callable[[], Conversation]
+
+
+class PreviewSite:
+    """Maps site paths to pages and renders them on request."""
+
+    def __init__(
+        self,
+        html_generator: HTMLGenerator,
+        index_generator: IndexGenerator,
+        assets_dir: str,
+        cache_bytes: int = DEFAULT_CACHE_MB * 1024 * 1024,
+        immutable_assets: Iterable[str] = ()
+    ):
+        """
+        Initialize an empty site.
+
+        Args:
+            html_generator: Renders conversation pages and their side files
+            index_generator: Renders the index pages
+            assets_dir: Directory holding the prepared site assets
+            cache_bytes: Size of the rendered page cache
+            immutable_assets: Asset file names (fingerprinted) that may be
+                cached without revalidation
+        """
+        self.html_generator = html_generator
+        self.index_generator = index_generator
+        self.assets_dir = assets_dir
+        self.immutable_assets = frozenset(immutable_assets)
+        self.cache = PageCache(cache_bytes)
+        self.generation_date = datetime.now()
+        self.renders = 0
+        self.render_seconds = 0.0
+        self.sources: Dict[str, List[PageEntry]] = {}
+        self._pages: Dict[Tuple[str, str], int] = {}
+        self._recent: 'OrderedDict[Tuple[str, int], Conversation]' = OrderedDict()
+        # Generators keep per-instance parser state, so renders are serialized
+        self._render_lock = threading.Lock()
+
+    def add_source(self, source: str, entries: Iterable[PageEntry]) -> None:
+        """
+        Register the conversation pages of a source.
+
+        Pages are ordered by creation date for the previous/next links, as
+        in a full conversion.
+        """
+        pages = sorted(entries, key=lambda e: e.metadata['created_at'] or datetime.min)
+        self.sources[source] = pages
+        for position, entry in enumerate(pages):
+            self._pages[(source, os.path.basename(entry.metadata['filename']))] = position
+
+    @property
+    def conversation_count(self) -> int:
+        return sum(len(pages) for pages in self.sources.values())
+
+    def respond(self, path: str) -> Optional[Page]:
+        """
+        Return the page at a site path, rendering it if it is not cached.
+
+        Args:
+            path: URL path, e.g. ``/openai/conversations/<page>.html``
+
+        Returns:
+            The page, or None if the path does not exist
+        """
+        key = path.lstrip('/') or 'index.html'
+        page = self.cache.get(key)
+        if page is not None:
+            return page
+
+        with self._render_lock:
+            # Another request may have rendered it while this one waited
+            page = self.cache.get(key, record=False)
+            if page is not None:
+                return page
+            start = time.perf_counter()
+            page = self._render(key)
+            if page is None:
+                return None
+            self.renders += 1
+            self.render_seconds += time.perf_counter() - start
+        self.cache.put(key, page)
+        return page
+
+    def stats(self) -> Dict[str, Any]:
+        """Server counters, as served at ``/__stats``."""
+        return {
+            'conversations': self.conversation_count,
+            'renders': self.renders,
+            'render_seconds': round(self.render_seconds, 3),
+            'cache': self.cache.stats(),
+        }
+
+    def _render(self, key: str) -> Optional[Page]:
+        parts = key.split('/')
+        if parts == ['index.html']:
+            metadata = [entry.metadata for pages in self.sources.values() for entry in pages]
+            return _html(self.index_generator.render_main_index(
+                metadata, assets_relative_path='assets', generation_date=self.generation_date
+            ))
+        if parts[0] == 'assets' and len(parts) == 2:
+            return self._asset(parts[1])
+        if parts[0] not in self.sources:
+            return None
+
+        source = parts[0]
+        if parts[1:] == ['index.html']:
+            return _html(self.index_generator.render_source_index(
+                [entry.metadata for entry in self.sources[source]], source,
+                assets_relative_path='../assets', main_index_path='../index.html',
+                generation_date=self.generation_date
+            ))
+        if len(parts) == 3 and parts[1] == 'conversations':
+            return self._conversation_page(source, parts[2])
+        if len(parts) == 4 and parts[1] == 'conversations':
+            match = _SIDE_FILE_RE.match(parts[3])
+            if match:
+                return self._side_file(source, f"{parts[2]}.html", match.group(1), int(match.group(2)))
+        return None
+
+    def _conversation_page(self, source: str, filename: str) -> Optional[Page]:
+        position = self._pages.get((source, filename))
+        if position is None:
+            return None
+        pages = self.sources[source]
+
+        def neighbour(index: int) -> Optional[Dict[str, str]]:
+            if 0 <= index < len(pages):
+                metadata = pages[index].metadata
+                return {'filename': os.path.basename(metadata['filename']), 'title': metadata['title']}
+            return None
+
+        return _html(self.html_generator.render_conversation_page(
+            self._conversation(source, position),
+            page_stem=os.path.splitext(filename)[0],
+            assets_relative_path='../../assets',
+            index_relative_path='../../index.html',
+            source_index_relative_path='../index.html',
+            prev_conversation=neighbour(position - 1),
+            next_conversation=neighbour(position + 1),
+            generation_date=self.generation_date
+        ))
+
+    def _side_file(self, source: str, filename: str, kind: str, index: int) -> Optional[Page]:
+        position = self._pages.get((source, filename))
+        if position is None:
+            return None
+        conversation = self._conversation(source, position)
+        segment_size, segment_count = self.html_generator.segment_layout(conversation)
+        if index >= segment_count or (kind == 'segment' and index == 0):
+            return None
+        if kind == 'raw':
+            script = self.html_generator.raw_text_script(conversation.messages, index, segment_size)
+        else:
+            script = self.html_generator.segment_script(conversation.messages, index, segment_size)
+        return _page(script.encode('utf-8'), 'text/javascript; charset=utf-8')
+
+    def _conversation(self, source: str, position: int) -> Conversation:
+        """Materialize a conversation, keeping the last few for their side files."""
+        key = (source, position)
+        conversation = self._recent.get(key)
+        if conversation is None:
+            conversation = self.sources[source][position].load()
+            self._recent[key] = conversation
+            if len(self._recent) > RECENT_CONVERSATIONS:
+                self._recent.popitem(last=False)
+        else:
+            self._recent.move_to_end(key)
+        return conversation
+
+    def _asset(self, name: str) -> Optional[Page]:
+        # Only names present in the assets directory; never a path
+        if name not in os.listdir(self.assets_dir):
+            return None
+        with open(os.path.join(self.assets_dir, name), 'rb') as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        page = _page(body, content_type)
+        if name in self.immutable_assets:
+            page = page._replace(cache_control=IMMUTABLE_CACHE_CONTROL)
+        return page
+
+
+def _page(body: bytes, content_type: str) -> Page:
+    return Page(body, content_type, f'"{hashlib.sha1(body).hexdigest()[:20]}"')
+
+
+def _html(content: str) -> Page:
+    return _page(content.encode('utf-8'), 'text/html; charset=utf-8')
+
+
+def store_entries(store: ColumnarCorpus, source: str, html_generator: HTMLGenerator) -> List[PageEntry]:
+    """
+    Page entries for the conversations of a columnar store.
+
+    Only metadata and the last message of each conversation (for the index
+    preview) are read; messages are materialized when a page is rendered.
+    """
+    entries = []
+    for index, info in enumerate(store.conversations):
+        # Metadata only; the page file name depends on title, date and ID
+        stub = Conversation(
+            id=info['id'],
+            title=info['title'],
+            source=info['source'],
+            created_at=datetime.fromisoformat(info['created_at']) if info['created_at'] else None,
+            updated_at=datetime.fromisoformat(info['updated_at']) if info['updated_at'] else None,
+            uuid=info['uuid'],
+        )
+        metadata = html_generator.conversation_metadata(stub, source, html_generator.page_filename(stub))
+        metadata['message_count'] = info['count']
+        if info['count']:
+            metadata['preview'] = preview_text(store.message_text(info['start'] + info['count'] - 1))
+        entries.append(PageEntry(metadata, partial(store.to_conversation, index)))
+    return entries
+
+
+def conversation_entries(conversations: List[Conversation], source: str, html_generator: HTMLGenerator) -> List[PageEntry]:
+    """Page entries for conversations already in memory."""
+    return [
+        PageEntry(
+            html_generator.conversation_metadata(conv, source, html_generator.page_filename(conv)),
+            partial(lambda c: c, conv)
+        )
+        for conv in conversations
+    ]
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    """Serves a PreviewSite with ETag revalidation."""
+
+    server_version = 'ChatArchivePreview/1.0'
+
+    def do_GET(self) -> None:
+        self._serve(include_body=True)
+
+    def do_HEAD(self) -> None:
+        self._serve(include_body=False)
+
+    def _serve(self, include_body: bool) -> None:
+        site: PreviewSite = self.server.site
+        path = unquote(urlsplit(self.path).path)
+
+        if path == '/__stats':
+            page = _page(json.dumps(site.stats(), indent=2).encode('utf-8'), 'application/json')
+        else:
+            if path.endswith('/'):
+                path += 'index.html'
+            try:
+                page = site.respond(path)
+            except Exception as e:
+                self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Rendering failed: {e}")
+                return
+            if page is None:
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+
+        if page.etag in _parse_etags(self.headers.get('If-None-Match', '')):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', page.etag)
+            self.send_header('Cache-Control', page.cache_control)
+            self.end_headers()
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', page.content_type)
+        self.send_header('Content-Length', str(len(page.body)))
+        self.send_header('ETag', page.etag)
+        self.send_header('Cache-Control', page.cache_control)
+        self.end_headers()
+        if include_body:
+            self.wfile.write(page.body)
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def _parse_etags(header: str) -> List[str]:
+    return [tag.strip().removeprefix('W/') for tag in header.split(',') if tag.strip()]
+
+
+def find_input_files(raw_dir: str) -> Dict[str, str]:
+    """Locate the raw export of each source in raw_dir."""
+    inputs = {}
+    for source, names in INPUT_FILES.items():
+        for name in names:
+            path = os.path.join(raw_dir, name)
+            if os.path.exists(path):
+                inputs[source] = path
+                break
+    return inputs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Preview the chat archive site, rendering pages on request.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind (default 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default 8000)')
+    parser.add_argument('--input-dir', help='Directory containing raw chat files (same as CHAT_RAW_DIR)')
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_MB,
+                        help=f'Size of the rendered page cache (default {DEFAULT_CACHE_MB})')
+    parser.add_argument('--quiet', action='store_true', help='Do not log requests')
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    config = Config.from_env(Path(script_dir).parent)
+    if args.input_dir:
+        config.raw_data_dir = Path(args.input_dir)
+    cache_dir = str(config.cache_dir or default_cache_dir())
+
+    inputs = find_input_files(str(config.raw_data_dir))
+    if not inputs:
+        raise SystemExit(f"No input files found in {config.raw_data_dir}")
+
+    templates_dir = os.path.join(script_dir, 'templates')
+    source_assets_dir = os.path.join(script_dir, 'assets')
+    compiled_dir = os.path.join(script_dir, COMPILED_TEMPLATES_DIRNAME)
+    asset_manager = AssetManager(source_assets_dir)
+    asset_names = asset_manager.asset_names()
+    html_generator = HTMLGenerator(
+        templates_dir,
+        source_assets_dir,
+        cache_dir=cache_dir,
+        compiled_templates_dir=compiled_dir,
+        stream_threshold=config.stream_threshold_messages,
+        segment_size=config.segment_size,
+        minify_html=config.minify_html,
+        asset_names=asset_names
+    )
+    index_generator = IndexGenerator(
+        templates_dir,
+        cache_dir=cache_dir,
+        compiled_templates_dir=compiled_dir,
+        minify_html=config.minify_html,
+        asset_names=asset_names
+    )
+
+    with tempfile.TemporaryDirectory(prefix='chat-preview-') as assets_dir:
+        asset_manager.setup_complete_assets(assets_dir, site_name='Chat Archive')
+        site = PreviewSite(
+            html_generator, index_generator, assets_dir, args.cache_mb * 1024 * 1024,
+            immutable_assets=[asset_names[name] for name in FINGERPRINTED_ASSETS]
+        )
+
+        start = time.perf_counter()
+        corpus_cache = CorpusCache(cache_dir, enabled=config.corpus_cache)
+        parsers = {'anthropic': AnthropicParser(), 'openai': OpenAIParser()}
+        stores: List[ColumnarCorpus] = []
+        try:
+            for source, path in inputs.items():
+                if corpus_cache.enabled:
+                    store = corpus_cache.load_columnar(parsers[source], path, config.max_file_size_mb)
+                    stores.append(store)
+                    site.add_source(source, store_entries(store, source, html_generator))
+                else:
+                    conversations = corpus_cache.load(parsers[source], path, config.max_file_size_mb)
+                    site.add_source(source, conversation_entries(conversations, source, html_generator))
+            print(f"Loaded {site.conversation_count} conversations in {time.perf_counter() - start:.2f} s")
+
+            server = ThreadingHTTPServer((args.host, args.port), PreviewHandler)
+            server.site = site
+            server.quiet = args.quiet
+            print(f"Serving http://{args.host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                print()
+            finally:
+                server.server_close()
+        finally:
+            for store in stores:
+                store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,18 +4,28 @@
 import os
 import json
 import argparse
+from datetime import datetime
 from pathlib import Path
 
 from parsers.openai_parser import OpenAIParser
 from generators.html_generator import HTMLGenerator
 from generators.index_generator import IndexGenerator
 from generators.asset_manager import AssetManager
+from config import get_config
+from corpus.cache import CorpusCache
+from generators.template_env import COMPILED_TEMPLATES_DIRNAME
+from profiling import Profiler, add_profile_arguments
 
-STATE_DIR = Path('data/html/incremental')
+CONFIG = get_config()
+STATE_DIR = CONFIG.html_output_dir / 'incremental'
 PROCESSED_IDS_FILE = STATE_DIR / 'processed_ids.json'
 METADATA_FILE = STATE_DIR / 'metadata.json'
-TEMPLATES_DIR = Path('scripts/templates')
-ASSETS_DIR = Path('scripts/assets')
+TEMPLATES_DIR = CONFIG.templates_dir
+ASSETS_DIR = CONFIG.assets_dir
+COMPILED_TEMPLATES_DIR = Path(__file__).resolve().parent / COMPILED_TEMPLATES_DIRNAME
+
+# Stages that --profile can select
+PROFILE_STAGES = ('parse', 'render', 'index', 'assets')
 
 
 def load_processed_ids() -> set:
@@ -34,7 +44,13 @@ def save_processed_ids(ids: set) -> None:
 def load_metadata() -> list:
     if METADATA_FILE.exists():
         with open(METADATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            metadata = json.load(f)
+        # Dates were saved with str(); restore them so they sort with new entries
+        for entry in metadata:
+            for key in ('created_at', 'updated_at'):
+                if isinstance(entry.get(key), str):
+                    entry[key] = datetime.fromisoformat(entry[key])
+        return metadata
     return []
 
 
@@ -46,15 +62,42 @@ def save_metadata(metadata: list) -> None:
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Process only new OpenAI conversations and update HTML output.")
-    parser.add_argument('--input', default='data/raw/openai_conversations.json', help='Path to OpenAI export file')
+    parser.add_argument('--input', default=str(CONFIG.raw_data_dir / 'openai_conversations.json'), help='Path to OpenAI export file')
+    add_profile_arguments(parser, PROFILE_STAGES)
     args = parser.parse_args()
 
+    with Profiler.from_args(args, 'openai_delta', str(CONFIG.data_dir / 'profiles')) as profiler:
+        process_delta(args, profiler)
+
+
+def process_delta(args: argparse.Namespace, profiler: Profiler) -> None:
+    """Render the OpenAI conversations that earlier runs have not processed."""
     openai_parser = OpenAIParser()
-    html_gen = HTMLGenerator(str(TEMPLATES_DIR), str(ASSETS_DIR))
-    index_gen = IndexGenerator(str(TEMPLATES_DIR))
-    asset_mgr = AssetManager(str(ASSETS_DIR))
+    cache_dir = str(CONFIG.cache_dir) if CONFIG.cache_dir else None
+    asset_mgr = AssetManager(str(ASSETS_DIR), store_dir=os.path.join(cache_dir, 'assets') if cache_dir else None)
+    html_gen = HTMLGenerator(
+        str(TEMPLATES_DIR),
+        str(ASSETS_DIR),
+        cache_dir=cache_dir,
+        compiled_templates_dir=str(COMPILED_TEMPLATES_DIR),
+        stream_threshold=CONFIG.stream_threshold_messages,
+        segment_size=CONFIG.segment_size,
+        minify_html=CONFIG.minify_html,
+        workers=CONFIG.workers,
+        memory_budget_mb=CONFIG.memory_budget_mb,
+        asset_names=asset_mgr.asset_names()
+    )
+    index_gen = IndexGenerator(
+        str(TEMPLATES_DIR),
+        cache_dir=cache_dir,
+        compiled_templates_dir=str(COMPILED_TEMPLATES_DIR),
+        minify_html=CONFIG.minify_html,
+        asset_names=asset_mgr.asset_names()
+    )
 
-    conversations = openai_parser.parse_file(args.input)
+    corpus_cache = CorpusCache(cache_dir, enabled=CONFIG.corpus_cache)
+    with profiler.stage('parse'):
+        conversations = corpus_cache.load(openai_parser, args.input, CONFIG.max_file_size_mb)
     if not conversations:
         print('No conversations found in input file.')
         return
@@ -70,33 +113,36 @@ def main() -> None:
     conversations_dir = STATE_DIR / 'openai'
     conversations_dir.mkdir(parents=True, exist_ok=True)
 
-    new_metadata = html_gen.generate_conversations_batch(
-        conversations=new_conversations,
-        output_dir=str(STATE_DIR),
-        source_subdir='openai',
-        assets_relative_path='../../assets',
-        index_relative_path='../../index.html',
-        source_index_relative_path='../index.html'
-    )
+    with profiler.stage('render'):
+        new_metadata = html_gen.generate_conversations_batch(
+            conversations=new_conversations,
+            output_dir=str(STATE_DIR),
+            source_subdir='openai',
+            assets_relative_path='../../assets',
+            index_relative_path='../../index.html',
+            source_index_relative_path='../index.html'
+        )
 
     metadata.extend(new_metadata)
 
-    index_gen.generate_source_index(
-        conversations=metadata,
-        source_name='openai',
-        output_path=str(STATE_DIR / 'openai' / 'index.html'),
-        assets_relative_path='../assets',
-        main_index_path='../index.html'
-    )
-    index_gen.generate_main_index(
-        all_conversations=metadata,
-        output_path=str(STATE_DIR / 'index.html'),
-        assets_relative_path='assets'
-    )
-
-    assets_output_dir = STATE_DIR / 'assets'
-    if not assets_output_dir.exists():
-        asset_mgr.setup_complete_assets(str(assets_output_dir), site_name='Chat Archive')
+    with profiler.stage('index'):
+        index_gen.generate_source_index(
+            conversations=metadata,
+            source_name='openai',
+            output_path=str(STATE_DIR / 'openai' / 'index.html'),
+            assets_relative_path='../assets',
+            main_index_path='../index.html'
+        )
+        index_gen.generate_main_index(
+            all_conversations=metadata,
+            output_path=str(STATE_DIR / 'index.html'),
+            assets_relative_path='assets'
+        )
+
+    # Always installed: pages of this run link to this build's fingerprinted
+    # assets, while files of earlier builds stay for the pages that use them
+    with profiler.stage('assets'):
+        asset_mgr.setup_complete_assets(str(STATE_DIR / 'assets'), site_name='Chat Archive')
 
     processed_ids.update(c.id for c in new_conversations)
     save_processed_ids(processed_ids)
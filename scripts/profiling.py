@@ -0,0 +1,292 @@
+# Copyright (C) 2025 Robin L. M. Cheung, MBA. All rights reserved.
+"""
+Opt-in profiling of selected stages with ``cProfile``.
+
+Entry points add the ``--profile`` options with ``add_profile_arguments`` and
+wrap their stages in ``Profiler.stage``. Each profiled stage is written to
+``<profile_dir>/<stage>.prof``. Worker processes started while a stage runs
+(render and export pools) profile themselves when their pool initializer
+calls ``init_worker``, and write ``<stage>-worker-<pid>.prof`` when they exit.
+
+``Profiler.close`` prints, and saves as ``summary.txt``, the top functions of
+every stage (workers merged) and a rough split of the time between
+Markdown, Jinja, filesystem calls and subprocesses such as wkhtmltopdf. The
+``.prof`` files can be explored further with ``python -m pstats`` or
+snakeviz.
+
+cProfile only sees the thread that enabled it; work done in thread pools
+(precompression with several workers) shows up as waiting.
+
+``cProfile``, ``pstats`` and ``multiprocessing`` are imported only when
+profiling is used, so importing this module costs nothing at start-up.
+"""
+import os
+import io
+import glob
+import argparse
+import contextlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Tell worker processes where, and for which stage, to write their stats
+PROFILE_DIR_ENV = 'CHAT_PROFILE_DIR'
+PROFILE_STAGE_ENV = 'CHAT_PROFILE_STAGE'
+
+DEFAULT_TOP = 25
+
+# Time categories, matched against the file of each function
+_CATEGORY_PATHS = [
+    ('markdown', (os.sep + 'markdown' + os.sep,)),
+    ('jinja', (os.sep + 'jinja2' + os.sep, '.html', os.sep + 'compiled_templates' + os.sep)),
+    ('subprocess', (os.sep + 'pdfkit' + os.sep, os.sep + 'imgkit' + os.sep, 'subprocess.py')),
+    ('filesystem', (os.sep + 'os.py', os.sep + 'shutil.py', os.sep + 'zipfile', os.sep + 'genericpath.py')),
+]
+
+# Built-in functions that count as filesystem time, or as waiting (for
+# workers, threads or a child process), unless a subprocess called them
+_FILESYSTEM_BUILTINS = ('io.open', "of '_io.", 'posix.', 'nt.', 'zlib.')
+_WAITING_BUILTINS = ("'acquire' of '_thread.", 'select.', 'time.sleep')
+
+_profiled_worker: Optional['cProfile.Profile'] = None
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser, stages: Sequence[str]) -> None:
+    """
+    Add the ``--profile`` options to a command's argument parser.
+
+    Args:
+        parser: Argument parser of the entry point
+        stages: Stage names the command defines
+    """
+    group = parser.add_argument_group('profiling')
+    group.add_argument('--profile', action='store_true', help='Profile the run with cProfile')
+    group.add_argument('--profile-stages', metavar='STAGES',
+                       help=f"Comma separated stages to profile (default: all of {','.join(stages)})")
+    group.add_argument('--profile-dir', metavar='DIR',
+                       help='Directory for the .prof files (default: data/profiles/<command>_<timestamp>)')
+    group.add_argument('--profile-top', type=int, default=DEFAULT_TOP, metavar='N',
+                       help=f'Functions listed per stage in the summary (default {DEFAULT_TOP})')
+
+
+class Profiler:
+    """Profiles the selected stages of one run."""
+
+    def __init__(self, out_dir: Optional[str] = None, stages: Optional[Sequence[str]] = None, top: int = DEFAULT_TOP):
+        """
+        Initialize the profiler.
+
+        Args:
+            out_dir: Directory for stats files; None disables profiling
+            stages: Stages to profile (default: every stage)
+            top: Functions listed per stage in the summary
+        """
+        self.out_dir = out_dir
+        self.stages = set(stages) if stages else None
+        self.top = top
+        self._profiles: Dict[str, 'cProfile.Profile'] = {}
+        self._active: Optional[str] = None
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace, command: str, base_dir: str) -> 'Profiler':
+        """
+        Create the profiler requested on the command line.
+
+        Args:
+            args: Parsed arguments (see ``add_profile_arguments``)
+            command: Command name, used in the default directory name
+            base_dir: Parent of the default profile directory
+
+        Returns:
+            Profiler, disabled unless ``--profile`` was given
+        """
+        if not getattr(args, 'profile', False):
+            return cls()
+        out_dir = args.profile_dir or os.path.join(
+            base_dir, f"{command}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+        stages = [s.strip() for s in (args.profile_stages or '').split(',') if s.strip()]
+        return cls(out_dir, stages or None, args.profile_top)
+
+    @property
+    def enabled(self) -> bool:
+        return self.out_dir is not None
+
+    def __enter__(self) -> 'Profiler':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Profile a stage if it was selected.
+
+        A stage entered again accumulates into the same profile. Stages do
+        not nest; an inner stage runs as part of the outer one.
+        """
+        if not self.enabled or self._active is not None or (self.stages and name not in self.stages):
+            yield
+            return
+
+        import cProfile
+
+        profile = self._profiles.setdefault(name, cProfile.Profile())
+        self._active = name
+        os.environ[PROFILE_DIR_ENV] = self.out_dir
+        os.environ[PROFILE_STAGE_ENV] = name
+        os.makedirs(self.out_dir, exist_ok=True)
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._active = None
+            os.environ.pop(PROFILE_DIR_ENV, None)
+            os.environ.pop(PROFILE_STAGE_ENV, None)
+
+    def close(self) -> Optional[str]:
+        """
+        Write the stats files and print the summary.
+
+        Returns:
+            Path of the summary file, or None if nothing was profiled
+        """
+        if not self.enabled or not os.path.isdir(self.out_dir):
+            return None
+        for name, profile in self._profiles.items():
+            profile.dump_stats(os.path.join(self.out_dir, f"{name}.prof"))
+        self._profiles.clear()
+
+        summary = summarize(self.out_dir, self.top)
+        summary_path = os.path.join(self.out_dir, 'summary.txt')
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(summary)
+        print(summary)
+        print(f"Profile written to {self.out_dir}")
+        return summary_path
+
+
+def init_worker() -> None:
+    """
+    Pool initializer: profile this worker if its parent is profiling a stage.
+
+    Stats are written when the worker exits normally, which is when its pool
+    shuts down.
+    """
+    global _profiled_worker
+    out_dir = os.environ.get(PROFILE_DIR_ENV)
+    if not out_dir or _profiled_worker is not None:
+        return
+    stage = os.environ.get(PROFILE_STAGE_ENV, 'worker')
+    path = os.path.join(out_dir, f"{stage}-worker-{os.getpid()}.prof")
+
+    import cProfile
+    import multiprocessing.util
+
+    _profiled_worker = cProfile.Profile()
+    _profiled_worker.enable()
+    # Pool workers leave through multiprocessing, which skips atexit handlers
+    multiprocessing.util.Finalize(None, _dump_worker_profile, args=(path,), exitpriority=10)
+
+
+def _dump_worker_profile(path: str) -> None:
+    global _profiled_worker
+    if _profiled_worker is not None:
+        _profiled_worker.disable()
+        _profiled_worker.dump_stats(path)
+        _profiled_worker = None
+
+
+def summarize(out_dir: str, top: int = DEFAULT_TOP) -> str:
+    """
+    Summarize the stats files in a profile directory.
+
+    Args:
+        out_dir: Directory written by ``Profiler``
+        top: Functions listed per stage
+
+    Returns:
+        Summary text: per stage (and per stage's merged workers) the time
+        split by category and the top functions by cumulative time
+    """
+    import pstats
+
+    groups: Dict[str, List[str]] = {}
+    for path in sorted(glob.glob(os.path.join(out_dir, '*.prof'))):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        stage, _, _ = stem.partition('-worker-')
+        key = f"{stage} (workers)" if '-worker-' in stem else stage
+        groups.setdefault(key, []).append(path)
+
+    out = io.StringIO()
+    for key, paths in groups.items():
+        stats = pstats.Stats(*paths, stream=io.StringIO())
+        total = stats.total_tt
+        label = f"{key}, {len(paths)} processes" if len(paths) > 1 else key
+        out.write(f"=== {label}: {total:.3f} s profiled\n")
+        categories = categorize(stats)
+        out.write('    ' + '  '.join(
+            f"{name} {seconds / total:.0%}" for name, seconds in categories if total
+        ) + '\n')
+        out.write(f"    {'cumtime':>9s} {'tottime':>9s} {'calls':>9s}  function\n")
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in top_functions(stats, top):
+            location = name if filename == '~' else f"{name} ({_short_path(filename)}:{line})"
+            out.write(f"    {cumtime:9.3f} {tottime:9.3f} {calls:9d}  {location}\n")
+        out.write('\n')
+    return out.getvalue()
+
+
+def top_functions(stats: 'pstats.Stats', top: int) -> List[Tuple[tuple, tuple]]:
+    """The ``top`` entries of ``stats.stats`` by cumulative time."""
+    return sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+
+
+def categorize(stats: 'pstats.Stats') -> List[Tuple[str, float]]:
+    """
+    Split the profiled (self) time into rough categories.
+
+    Python functions are categorized by their file. Built-in functions take
+    the category of their callers, except file and OS calls and lock or
+    select waits made outside a subprocess, which count as filesystem time
+    and waiting.
+
+    Returns:
+        (category, seconds) pairs, largest first
+    """
+    totals: Dict[str, float] = {}
+    for (filename, _, name), (_, _, tottime, _, callers) in stats.stats.items():
+        if filename != '~':
+            category = _category_of(filename)
+            totals[category] = totals.get(category, 0.0) + tottime
+            continue
+
+        caller_times = {
+            caller: caller_stats[2] for caller, caller_stats in callers.items()
+        } or {('~', 0, ''): tottime}
+        caller_total = sum(caller_times.values()) or 1.0
+        for (caller_file, _, _), seconds in caller_times.items():
+            category = _category_of(caller_file)
+            if category != 'subprocess':
+                if any(marker in name for marker in _WAITING_BUILTINS):
+                    category = 'waiting'
+                elif any(marker in name for marker in _FILESYSTEM_BUILTINS):
+                    category = 'filesystem'
+            totals[category] = totals.get(category, 0.0) + tottime * seconds / caller_total
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def _category_of(filename: str) -> str:
+    for category, markers in _CATEGORY_PATHS:
+        if any(marker in filename for marker in markers):
+            return category
+    return 'other'
+
+
+def _short_path(filename: str) -> str:
+    """Trim a path to the part after site-packages or the scripts directory."""
+    for marker in ('site-packages' + os.sep, 'scripts' + os.sep, 'lib' + os.sep):
+        index = filename.rfind(marker)
+        if index >= 0:
+            return filename[index + len(marker):]
+    return filename